@@ -2,6 +2,8 @@
 ASGI config for fitlife project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through fitlife.asgi_urls, so the read-heavy views run as
+async views on the event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -9,8 +11,21 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitlife.settings')
 
-application = get_asgi_application()
+
+class FitlifeASGIHandler(ASGIHandler):
+    urlconf = 'fitlife.asgi_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = FitlifeASGIHandler()
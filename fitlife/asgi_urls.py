@@ -0,0 +1,13 @@
+"""
+URL configuration of the ASGI deployment.
+
+Same URLs as fitlife.urls, except that the read-heavy tracker views are
+served by their async versions in tracker.async_views.
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('tracker.async_urls'))
+]
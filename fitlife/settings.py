@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +28,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Addresses allowed to scrape /metrics/
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -41,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its total covers every other middleware too
+    'tracker.instrumentation.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +60,8 @@ ROOT_URLCONF = 'fitlife.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, with render times reported by ServerTimingMiddleware
+        'BACKEND': 'tracker.instrumentation.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,13 +81,58 @@ WSGI_APPLICATION = 'fitlife.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Every new connection switches to WAL (readers no longer block the writer),
+# trades fsync on every commit for one per checkpoint, maps the file into
+# memory and waits up to 20s for the write lock instead of failing with
+# "database is locked". Transactions take the write lock when they begin, so
+# two read-then-write transactions cannot deadlock on lock upgrade.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-32000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Group concurrent workout logging into shared transactions (tracker.write_queue)
+TRACKER_WRITE_BATCHING = False
+
+# Sessions and the logged-in user are read from the cache and written through
+# to the database (tracker.auth). With FITLIFE_REDIS_URL set (and the redis
+# package installed) the cache is Redis, shared by every worker process, so a
+# logout or user change reaches all of them. Without it each process keeps its
+# own LocMem cache, sized for a session and a user per active user (about
+# 25,000 users) plus the plan catalogs; that only stays consistent with a
+# single worker process.
+if os.environ.get('FITLIFE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['FITLIFE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['tracker.auth.CachedUserBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
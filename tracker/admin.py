@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Workout, Exercise, ExerciseSet, WorkoutPlan, PlanDay, PlanExercise, Goal
+from .models import CatalogExercise, Workout, Exercise, ExerciseSet, WorkoutPlan, PlanDay, PlanExercise, Goal, ImportJob
 
+admin.site.register(CatalogExercise)
 admin.site.register(Workout)
 admin.site.register(Exercise)   
 admin.site.register(ExerciseSet)
@@ -8,3 +9,4 @@ admin.site.register(WorkoutPlan)
 admin.site.register(PlanDay)    
 admin.site.register(PlanExercise)
 admin.site.register(Goal)
+admin.site.register(ImportJob)
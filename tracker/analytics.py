@@ -0,0 +1,166 @@
+"""Columnar training metrics computed with NumPy.
+
+A user's sets are loaded once into parallel arrays (day, exercise, reps,
+weight) and every metric is derived from them with vectorized operations
+instead of a Python loop over model instances. Results are plain lists,
+ready to hand to Chart.js.
+
+NumPy is an optional dependency: importing this module works without it,
+but computing metrics raises ImproperlyConfigured.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from .models import ExerciseSet
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+LOAD_CHUNK_SIZE = 50000
+ROLLING_WEEKS = 4
+# Upper bounds of the intensity buckets, as a fraction of the best estimated 1RM
+INTENSITY_BINS = [0.5, 0.6, 0.7, 0.8, 0.9]
+INTENSITY_LABELS = ['<50%', '50-60%', '60-70%', '70-80%', '80-90%', '90%+']
+
+# 1970-01-05 was a Monday; weeks are counted from it so they start on Mondays
+_FIRST_MONDAY = 4
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured('tracker.analytics requires NumPy (pip install numpy)')
+
+
+class TrainingColumns:
+    """A user's sets as parallel arrays, oldest first"""
+
+    def __init__(self, days, exercise_ids, reps, weights):
+        self.days = days                  # datetime64[D]
+        self.exercise_ids = exercise_ids  # catalog ids, int64
+        self.reps = reps                  # int64
+        self.weights = weights            # float64
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def tonnage(self):
+        return self.reps * self.weights
+
+    @property
+    def e1rm(self):
+        """Epley estimate, matching the ExerciseSet.e1rm column"""
+        return np.where(self.reps <= 1, self.weights, self.weights * (1 + self.reps / 30))
+
+    def only(self, exercise_id):
+        mask = self.exercise_ids == exercise_id
+        return TrainingColumns(self.days[mask], self.exercise_ids[mask], self.reps[mask], self.weights[mask])
+
+
+def load_sets(user, exercise_ids=None):
+    """Read the user's sets in chunks straight into columnar arrays"""
+    _require_numpy()
+    sets = ExerciseSet.objects.filter(exercise__workout__user=user)
+    if exercise_ids is not None:
+        sets = sets.filter(exercise__catalog_id__in=exercise_ids)
+    rows = (
+        sets.order_by('exercise__workout__date')
+        .values_list('exercise__workout__date', 'exercise__catalog_id', 'reps', Cast(F('weight'), FloatField()))
+        .iterator(chunk_size=LOAD_CHUNK_SIZE)
+    )
+
+    chunks, chunk = [], []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == LOAD_CHUNK_SIZE:
+            chunks.append(_columns(chunk))
+            chunk = []
+    if chunk or not chunks:
+        chunks.append(_columns(chunk))
+    return TrainingColumns(*(np.concatenate(column) for column in zip(*chunks)))
+
+
+def _columns(rows):
+    days, exercise_ids, reps, weights = zip(*rows) if rows else ((), (), (), ())
+    return (
+        np.array(days, dtype='datetime64[D]'),
+        np.array(exercise_ids, dtype=np.int64),
+        np.array(reps, dtype=np.int64),
+        np.array(weights, dtype=np.float64),
+    )
+
+
+def _week_numbers(days):
+    return (days.astype(np.int64) - _FIRST_MONDAY) // 7
+
+
+def _week_starts(first_week, count):
+    return (np.arange(first_week, first_week + count) * 7 + _FIRST_MONDAY).astype('datetime64[D]')
+
+
+def weekly_tonnage(columns):
+    """``(week starts, tonnage)`` for every week from the first to the last set, empty weeks included"""
+    if not len(columns):
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+    weeks = _week_numbers(columns.days)
+    first = weeks.min()
+    tonnage = np.bincount(weeks - first, weights=columns.tonnage)
+    return _week_starts(first, len(tonnage)), tonnage
+
+
+def rolling_average(values, window=ROLLING_WEEKS):
+    """Trailing mean over ``window`` points; the first points average what is available"""
+    totals = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (totals[ends] - totals[starts]) / (ends - starts)
+
+
+def week_over_week(values):
+    """Relative change from the previous week, NaN where that week was empty"""
+    change = np.full(len(values), np.nan)
+    if len(values) > 1:
+        previous = values[:-1]
+        np.divide(values[1:] - previous, previous, out=change[1:], where=previous > 0)
+    return change
+
+
+def intensity_distribution(columns):
+    """Number of sets per intensity bucket, relative to each exercise's best estimated 1RM"""
+    counts = np.zeros(len(INTENSITY_LABELS), dtype=np.int64)
+    if not len(columns):
+        return counts
+    exercises, index = np.unique(columns.exercise_ids, return_inverse=True)
+    best = np.zeros(len(exercises))
+    np.maximum.at(best, index, columns.e1rm)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intensity = np.where(best[index] > 0, columns.weights / best[index], 0)
+    buckets = np.searchsorted(INTENSITY_BINS, intensity, side='right')
+    return np.bincount(buckets, minlength=len(INTENSITY_LABELS))
+
+
+def _chart_values(values, digits):
+    return [None if np.isnan(value) else round(float(value), digits) for value in values]
+
+
+def training_metrics(user, exercise_id=None, columns=None):
+    """Chart-ready weekly tonnage, its rolling average, week-over-week change and intensity mix"""
+    if columns is None:
+        columns = load_sets(user, None if exercise_id is None else [exercise_id])
+    elif exercise_id is not None:
+        columns = columns.only(exercise_id)
+
+    weeks, tonnage = weekly_tonnage(columns)
+    return {
+        'weeks': [str(week) for week in weeks],
+        'tonnage': _chart_values(tonnage, 2),
+        'rolling_tonnage': _chart_values(rolling_average(tonnage), 2),
+        'week_over_week': _chart_values(week_over_week(tonnage) * 100, 1),
+        'intensity': {
+            'labels': INTENSITY_LABELS,
+            'sets': intensity_distribution(columns).tolist(),
+        },
+    }
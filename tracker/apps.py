@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class TrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracker'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_timer
+        from .set_inputs import set_input_fragments
+
+        connection_created.connect(install_query_timer, dispatch_uid='tracker_query_timer')
+
+        # Render the set-input fragments once at startup rather than on the first request
+        set_input_fragments()
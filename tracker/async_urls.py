@@ -0,0 +1,15 @@
+from django.urls import include, path
+from . import async_views
+
+
+# The read-heavy views in their async versions, ahead of everything else in
+# tracker.urls; used by the ASGI deployment (fitlife.asgi)
+urlpatterns = [
+    path('workout-plans/', async_views.workout_plans, name='workout_plans'),
+    path('workout-history/', async_views.workout_history, name='workout_history'),
+    path('progress/', async_views.progress_tracking, name='progress'),
+    path('goals/', async_views.fitness_goals, name='fitness_goals'),
+    path('dashboard/', async_views.dashboard, name='dashboard'),
+    path('bmi-history/', async_views.bmi_history, name='bmi_history'),
+    path('', include('tracker.urls')),
+    ]
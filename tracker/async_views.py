@@ -0,0 +1,141 @@
+"""Async versions of the read-heavy views, served by the ASGI deployment.
+
+fitlife.asgi routes these URLs here (see tracker.async_urls). Every database
+read goes through the async ORM API, and the middleware stack is
+async-capable, so the ASGI handler runs a request on the event loop instead
+of handing the whole view to a worker thread. Templates only receive fully
+loaded objects and must not trigger queries of their own.
+"""
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+from . import records, rollups, series, summary
+from .history import aiter_workout_chunks, aworkout_page, history_queryset, parse_history_date
+from .models import Goal, BMIRecord
+from .plans import aplan_catalog, aplan_catalog_version
+from .progress import aexercise_progress, auser_exercise_names
+from .versions import conditional_on_data_version
+
+
+def login_required(view):
+    """login_required for async views, which also loads request.user up front.
+
+    Templates and context processors read request.user synchronously, which
+    would otherwise query the database from the event loop.
+    """
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapped
+
+
+@login_required
+@conditional_on_data_version(aplan_catalog_version)
+async def workout_plans(request):
+    """Display all workout plans"""
+    plans = await aplan_catalog(await aplan_catalog_version(request))
+    return render(request, 'workouts/plans.html', {'plans': plans})
+
+
+@login_required
+@conditional_on_data_version()
+async def workout_history(request):
+    """Display user's workout history, one keyset page at a time"""
+    filters = {
+        'start': parse_history_date(request.GET.get('start')),
+        'end': parse_history_date(request.GET.get('end')),
+        'exercise': request.GET.get('exercise', '').strip(),
+    }
+    workouts = history_queryset(request.user, **filters)
+    context = {'filters': filters}
+
+    if request.GET.get('stream'):
+        return stream_workout_history(request, workouts, context)
+
+    page, next_cursor = await aworkout_page(workouts, request.GET.get('cursor'))
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f'?{params.urlencode()}'
+
+    context.update({'workouts': page, 'next_url': next_url})
+    return render(request, 'workouts/history.html', context)
+
+
+def stream_workout_history(request, workouts, context):
+    """Send the page chrome first, then the workouts in bounded chunks"""
+    marker = '<!-- workout-history-stream -->'
+    page = render_to_string('workouts/history.html', {**context, 'stream_marker': marker}, request)
+    head, tail = page.split(marker)
+
+    async def content():
+        yield head
+        streamed = False
+        async for chunk in aiter_workout_chunks(workouts):
+            streamed = True
+            yield render_to_string('workouts/history_workouts.html', {'workouts': chunk})
+        if not streamed:
+            yield render_to_string('workouts/history_workouts.html', {'workouts': []})
+        yield tail
+
+    return StreamingHttpResponse(content(), content_type='text/html; charset=utf-8')
+
+
+@login_required
+@conditional_on_data_version()
+async def progress_tracking(request):
+    """Display progress tracking with charts"""
+    user_exercises = await auser_exercise_names(request.user)
+    selected_exercises = [name for name in request.GET.getlist('exercise') if name]
+
+    period = request.GET.get('period')
+    if period in rollups.ROLLUP_PERIODS:
+        chart_data = await rollups.arollup_series(request.user, selected_exercises, period)
+    else:
+        period = None
+        chart_data = await aexercise_progress(request.user, selected_exercises)
+    chart_data = series.downsample(chart_data, series.CHART_POINTS)
+
+    return render(request, 'workouts/progress.html', {
+        'exercises': user_exercises,
+        'selected_exercises': selected_exercises,
+        'selected_exercise': selected_exercises[0] if selected_exercises else None,
+        'period': period,
+        'chart_data': chart_data,
+        'personal_records': await records.apersonal_records(request.user, selected_exercises),
+    })
+
+
+@login_required
+@conditional_on_data_version()
+async def fitness_goals(request):
+    """Display user's fitness goals"""
+    goals = [goal async for goal in Goal.objects.filter(user=request.user)]
+    return render(request, 'workouts/goals.html', {'goals': goals})
+
+
+@login_required
+async def dashboard(request):
+    return render(request, 'workouts/dashboard.html', {
+        'user': request.user,
+        'summary': await summary.aget_summary(request.user.id),
+    })
+
+
+@login_required
+@conditional_on_data_version()
+async def bmi_history(request):
+    bmi_records = [record async for record in BMIRecord.objects.filter(user=request.user)]
+    return render(request, 'workouts/bmi_calculator.html', {
+        'bmi_records': bmi_records,
+        'active_tab': 'history',
+    })
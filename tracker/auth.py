@@ -0,0 +1,50 @@
+"""Cached authentication for the login_required hot path.
+
+Sessions use the cached_db engine: they are read from the cache and written
+through to the database, so a warm session costs no query. The user that
+AuthenticationMiddleware loads for every request comes from
+``CachedUserBackend``, which keeps it in the cache under its id.
+
+The receivers in tracker.signals keep that copy current. A saved user
+(profile update, password change, the last_login stamp at login) is dropped
+immediately and written back once the transaction commits. A deleted or
+logged-out user is dropped. The session auth hash is checked against the
+cached password hash, so a password change still ends the other sessions.
+Bulk ``update()`` calls on users send no signals and must call
+``forget_user`` themselves.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+# Bounds how stale a user can be when another process's cache missed an update
+USER_CACHE_TIMEOUT = 300
+
+
+def user_cache_key(user_id):
+    return f'tracker:user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def remember_user(user):
+    """Write ``user`` through to the cache once the current transaction commits"""
+    forget_user(user.pk)
+    if not user.get_deferred_fields():
+        transaction.on_commit(lambda: cache.set(user_cache_key(user.pk), user, USER_CACHE_TIMEOUT))
+
+
+class CachedUserBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup is served from the cache"""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
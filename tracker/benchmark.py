@@ -0,0 +1,354 @@
+"""Latency benchmark over every tracker URL.
+
+``ROUTES`` lists at least one request per URL pattern in tracker.urls,
+including the form posts behind the write views. ``seed`` creates a user
+with a configurable amount of history (built by ``create_history``, which
+the other benchmark commands use as well), goals, BMI records and plans.
+``measure`` drives a route through the test client and reports latency
+percentiles, SQL query count and time, and response size. The
+benchmark_urls command runs everything against a scratch database and
+compares the results with a stored baseline.
+"""
+import copy
+import datetime
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.urls import reverse
+
+from .models import (
+    BMIRecord, CatalogExercise, Exercise, ExerciseSet, Goal, ImportJob, PlanDay, PlanExercise, Workout, WorkoutPlan,
+)
+from .plans import DAYS_OF_WEEK, invalidate_plan_catalog
+from .records import rebuild_records
+from .rollups import rebuild_rollups
+from .summary import rebuild_summary
+from .versions import bump_data_version
+
+PLAN_EXERCISES = ['Squats', 'Bench Press', 'Deadlifts', 'Overhead Press', 'Barbell Rows', 'Pull-ups']
+
+# Real lift names, so the benchmark doesn't leave made-up entries in the exercise catalog
+BENCHMARK_EXERCISES = [
+    'Squats', 'Bench Press', 'Deadlifts', 'Overhead Press', 'Barbell Rows', 'Pull-ups',
+    'Romanian Deadlifts', 'Incline Dumbbell Press', 'Leg Press', 'Lat Pulldowns',
+]
+
+
+def use_database(name, options):
+    """Point the default alias at another SQLite file; connections opened from now on use it"""
+    connections.close_all()
+    del connections['default']
+    connections.settings['default'].update(NAME=name, OPTIONS=copy.deepcopy(options), CONN_MAX_AGE=0)
+
+
+def restore_database(original):
+    connections.close_all()
+    del connections['default']
+    connections.settings['default'].clear()
+    connections.settings['default'].update(original)
+
+
+@contextmanager
+def scratch_database():
+    """A freshly migrated copy of the schema in a temporary file, with the configured OPTIONS"""
+    original = copy.deepcopy(connections.settings['default'])
+    with TemporaryDirectory() as workdir:
+        try:
+            use_database(Path(workdir) / 'benchmark.sqlite3', original.get('OPTIONS', {}))
+            call_command('migrate', verbosity=0, interactive=False)
+            yield
+        finally:
+            restore_database(original)
+
+
+class Fixture:
+    """The seeded user and the objects the routes refer to"""
+
+    def __init__(self, user, plan, goal, job):
+        self.user = user
+        self.plan = plan
+        self.day = plan.days.first()
+        self.goal = goal
+        self.job = job
+        # Failing views are reported with their 500 rather than aborting the run
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(user)
+        self.anonymous = Client(raise_request_exception=False)
+
+
+def _create_plan(name, exercises=PLAN_EXERCISES):
+    plan = WorkoutPlan.objects.create(name=name, description='Benchmark plan')
+    days = PlanDay.objects.bulk_create([
+        PlanDay(plan=plan, name=f'{weekday.title()}: Day {order}', order=order)
+        for order, weekday in enumerate(DAYS_OF_WEEK[:5], 1)
+    ])
+    catalog = CatalogExercise.objects.resolve(exercises)
+    PlanExercise.objects.bulk_create([
+        PlanExercise(day=day, catalog=catalog[name], name=name, order=order)
+        for day in days
+        for order, name in enumerate(exercises, 1)
+    ])
+    return plan
+
+
+def _add_bmi_records(user, count):
+    BMIRecord.objects.bulk_create([
+        BMIRecord(user=user, weight=70 + i % 20, height=180, bmi=round((70 + i % 20) / 3.24, 1))
+        for i in range(count)
+    ])
+
+
+def create_history(user, total_sets, exercises=8, sets=8, days_per_batch=500):
+    """Bulk-insert a synthetic history of ``total_sets`` sets for ``user``"""
+    catalog = CatalogExercise.objects.resolve(BENCHMARK_EXERCISES[:exercises])
+    day, remaining = datetime.date(1990, 1, 1), total_sets
+    while remaining > 0:
+        with transaction.atomic():
+            workouts = []
+            for _ in range(days_per_batch):
+                if remaining <= 0:
+                    break
+                workouts.append(Workout(user=user, date=day))
+                day += datetime.timedelta(days=1 + len(workouts) % 2)
+                remaining -= exercises * sets
+            workouts = Workout.objects.bulk_create(workouts)
+            exercise_rows = Exercise.objects.bulk_create([
+                Exercise(workout=workout, catalog=catalog[name], name=name)
+                for workout in workouts
+                for name in BENCHMARK_EXERCISES[:exercises]
+            ])
+            ExerciseSet.objects.bulk_create([
+                ExerciseSet(exercise=exercise, set_number=s, reps=3 + (exercise.id + s) % 10, weight=40 + (exercise.id * 7 + s * 5) % 120)
+                for exercise in exercise_rows
+                for s in range(1, sets + 1)
+            ], batch_size=5000)
+
+
+def seed(sets=20000, goals=20, bmi_records=50, plans=10):
+    """Create the benchmark user and their data; derived tables are rebuilt at the end"""
+    user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+    create_history(user, sets)
+    Goal.objects.bulk_create([
+        Goal(user=user, title=f'Goal {i}', goal_type='strength', target_value=100 + i, current_value=i)
+        for i in range(goals)
+    ])
+    _add_bmi_records(user, bmi_records)
+    catalog = [_create_plan(f'Benchmark plan {i}') for i in range(plans)]
+    job = ImportJob.objects.create(user=user, source='history.csv', fingerprint=uuid.uuid4().hex, status='done')
+
+    rebuild_summary(user.id)
+    rebuild_records(user.id)
+    rebuild_rollups(user.id)
+    bump_data_version(user.id)
+    invalidate_plan_catalog()
+    return Fixture(user, catalog[0], Goal.objects.filter(user=user).first(), job)
+
+
+class Route:
+    """One request to benchmark.
+
+    ``url_kwargs`` and ``data`` are either values or callables taking
+    ``(fixture, iteration)``; they run before the timer starts, so they can
+    also create whatever the request consumes (e.g. a goal to delete).
+    """
+
+    def __init__(self, name, url_name, method='get', url_kwargs=None, data=None, anonymous=False, fresh_session=False):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.url_kwargs = url_kwargs
+        self.data = data
+        self.anonymous = anonymous
+        self.fresh_session = fresh_session
+
+    def _value(self, value, fixture, iteration):
+        return value(fixture, iteration) if callable(value) else value
+
+    def client(self, fixture):
+        if self.anonymous:
+            return fixture.anonymous
+        if self.fresh_session:
+            client = Client(raise_request_exception=False)
+            client.force_login(fixture.user)
+            return client
+        return fixture.client
+
+    def request(self, fixture, iteration):
+        path = reverse(self.url_name, kwargs=self._value(self.url_kwargs, fixture, iteration))
+        return path, self._value(self.data, fixture, iteration) or {}
+
+
+def _plan_form(fixture, iteration):
+    data = {'plan_name': f'Benchmark plan {iteration}', 'plan_description': 'Posted by the benchmark'}
+    for order, weekday in enumerate(DAYS_OF_WEEK[:5], 1):
+        data[f'{weekday}_name'] = f'{weekday.title()}: Day {order}'
+        data[f'{weekday}_exercises[]'] = PLAN_EXERCISES
+    return data
+
+
+def _logged_sets(fixture, iteration):
+    data = {'add_exercise': '1', 'exercise_name': 'Bench Press', 'sets_count': 3}
+    for i in range(1, 4):
+        data.update({f'reps_{i}': 5, f'weight_{i}': 60 + iteration % 40})
+    return data
+
+
+def _plan_day_sets(fixture, iteration):
+    data = {}
+    for exercise in fixture.day.exercises.all():
+        data[f'sets_{exercise.id}'] = 3
+        for i in range(1, 4):
+            data.update({f'reps_{exercise.id}_{i}': 5, f'weight_{exercise.id}_{i}': 50 + iteration % 40})
+    return data
+
+
+def _import_file(fixture, iteration):
+    # A different file each time, so every post is a new import job
+    day = datetime.date(1980, 1, 1) + datetime.timedelta(days=iteration)
+    rows = ''.join(f'{day},Bench Press,{5 + i},{60 + i * 2.5}\n' for i in range(20))
+    return {'file': SimpleUploadedFile(f'import-{iteration}.csv', f'date,exercise,reps,weight\n{rows}'.encode())}
+
+
+def _new_plan(fixture, iteration):
+    return {'plan_id': _create_plan(f'Doomed plan {iteration}').id}
+
+
+def _new_goal(fixture, iteration):
+    goal = Goal.objects.create(user=fixture.user, title=f'Doomed goal {iteration}', target_value=100)
+    return {'goal_id': goal.id}
+
+
+def _refill_bmi(fixture, iteration):
+    _add_bmi_records(fixture.user, 50)
+    return {}
+
+
+ROUTES = [
+    Route('login', 'login', anonymous=True),
+    Route('register', 'register', anonymous=True),
+    Route('log_workout', 'log_workout'),
+    Route('log_workout:add_exercise', 'log_workout', 'post', data=_logged_sets),
+    Route('get_set_inputs', 'get_set_inputs', data={'sets_count': 4}),
+    Route('workout_plans', 'workout_plans'),
+    Route('create_workout_plan', 'create_workout_plan'),
+    Route('create_workout_plan:submit', 'create_workout_plan', 'post', data=_plan_form),
+    Route('update_workout_plan', 'update_workout_plan', url_kwargs=lambda f, i: {'plan_id': f.plan.id}),
+    Route('update_workout_plan:submit', 'update_workout_plan', 'post',
+          url_kwargs=lambda f, i: {'plan_id': f.plan.id}, data=_plan_form),
+    Route('delete_workout_plan', 'delete_workout_plan', 'post', url_kwargs=_new_plan),
+    Route('plan_exercises', 'plan_exercises', url_kwargs=lambda f, i: {'day_id': f.day.id}),
+    Route('start_workout', 'start_workout', url_kwargs=lambda f, i: {'day_id': f.day.id}),
+    Route('start_workout:submit', 'start_workout', 'post',
+          url_kwargs=lambda f, i: {'day_id': f.day.id}, data=_plan_day_sets),
+    Route('workout_history', 'workout_history'),
+    Route('workout_history:filtered', 'workout_history', data={'exercise': 'Squats', 'start': '1995-01-01'}),
+    Route('workout_history:stream', 'workout_history', data={'stream': 1}),
+    Route('export_history', 'export_history', url_kwargs={'fmt': 'csv'}),
+    Route('import_history', 'import_history', 'post', data=_import_file),
+    Route('import_status', 'import_status', url_kwargs=lambda f, i: {'job_id': f.job.id}),
+    Route('progress', 'progress', data={'exercise': 'Squats'}),
+    Route('progress:compare', 'progress', data={'exercise': ['Squats', 'Bench Press', 'Deadlifts']}),
+    Route('progress:weekly', 'progress', data={'exercise': 'Squats', 'period': 'week'}),
+    Route('progress_series', 'progress_series', data={'exercise': ['Squats', 'Bench Press'], 'points': 200}),
+    Route('progress_series:window', 'progress_series',
+          data={'exercise': 'Squats', 'metric': 'volume', 'start': '1995-01-01', 'end': '1999-12-31'}),
+    Route('fitness_goals', 'fitness_goals'),
+    Route('add_goal', 'add_goal'),
+    Route('add_goal:submit', 'add_goal', 'post',
+          data={'title': 'Squat 150', 'goal_type': 'strength', 'target_value': 150, 'unit': 'kg'}),
+    Route('update_goal_progress', 'update_goal_progress', 'post',
+          url_kwargs=lambda f, i: {'goal_id': f.goal.id}, data=lambda f, i: {'current_value': i % 100}),
+    Route('delete_goal', 'delete_goal', 'post', url_kwargs=_new_goal),
+    Route('dashboard', 'dashboard'),
+    Route('bmi_calculator', 'bmi_calculator'),
+    Route('bmi_calculator:submit', 'bmi_calculator', 'post', data={'weight': 80, 'height': 180}),
+    Route('bmi_history', 'bmi_history'),
+    Route('bmi_series', 'bmi_series', data={'metric': 'weight', 'points': 100}),
+    Route('bmi_learn_more', 'bmi_learn_more'),
+    Route('clear_bmi_history', 'clear_bmi_history', 'post', data=_refill_bmi),
+    Route('logout', 'logout', fresh_session=True),
+    Route('metrics', 'metrics'),
+]
+
+
+def _at(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _QueryTimer:
+    """Execute wrapper counting queries and timing them (the query log rounds to milliseconds)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def measure(route, fixture, iterations, warmup=2):
+    """Latency percentiles, SQL and response size of ``iterations`` requests to ``route``"""
+    timings, query_counts, sql_times, sizes = [], [], [], []
+    for iteration in range(warmup + iterations):
+        client = route.client(fixture)
+        path, data = route.request(fixture, iteration)
+        queries = _QueryTimer()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = getattr(client, route.method)(path, data)
+            size = sum(map(len, response.streaming_content)) if response.streaming else len(response.content)
+            elapsed = time.perf_counter() - started
+        if iteration < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        query_counts.append(queries.count)
+        sql_times.append(queries.seconds * 1000)
+        sizes.append(size)
+
+    timings.sort()
+    return {
+        'method': route.method.upper(),
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_at(timings, 0.95), 3),
+        'p99_ms': round(_at(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': statistics.median(query_counts),
+        'sql_ms': round(statistics.median(sql_times), 3),
+        'bytes': statistics.median(sizes),
+    }
+
+
+def compare(results, baseline, tolerance=0.2, min_ms=1.0):
+    """Routes that got slower or issue more queries than in ``baseline``.
+
+    Returns ``(route, metric, baseline value, current value)``. A latency
+    counts as a regression when p95 grew by more than ``tolerance`` and by
+    more than ``min_ms``, so sub-millisecond noise does not trip it; query
+    counts must not grow at all.
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + tolerance) and current['p95_ms'] - before['p95_ms'] > min_ms:
+            regressions.append((name, 'p95_ms', before['p95_ms'], current['p95_ms']))
+        if current['queries'] > before['queries']:
+            regressions.append((name, 'queries', before['queries'], current['queries']))
+    return regressions
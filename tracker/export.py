@@ -0,0 +1,94 @@
+"""Streaming export of a user's training history.
+
+Sets are read through one flat ``values()`` join over Workout, Exercise and
+ExerciseSet with ``.iterator()``, so only ``EXPORT_CHUNK_SIZE`` rows are held
+at a time whatever the size of the account. Rows are encoded as CSV or JSON
+lines and, when asked for, gzipped on the fly.
+"""
+import csv
+import json
+import zlib
+
+from .models import ExerciseSet
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Output column -> lookup in the flat join
+EXPORT_COLUMNS = {
+    'date': 'exercise__workout__date',
+    'workout_id': 'exercise__workout_id',
+    'exercise': 'exercise__name',
+    'catalog_exercise': 'exercise__catalog__name',
+    'set_number': 'set_number',
+    'reps': 'reps',
+    'weight': 'weight',
+    'e1rm': 'e1rm',
+    'volume': 'volume',
+}
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the value straight back"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(user):
+    """Every set the user logged, oldest first, as tuples in EXPORT_COLUMNS order"""
+    return (
+        ExerciseSet.objects
+        .filter(exercise__workout__user=user)
+        .order_by('exercise__workout__date', 'exercise__workout_id', 'exercise_id', 'set_number')
+        .values_list(*EXPORT_COLUMNS.values())
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def _batched(lines, size=EXPORT_CHUNK_SIZE):
+    """Join encoded lines into blocks so the response is not sent line by line"""
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= size:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(list(EXPORT_COLUMNS))
+    yield from _batched(writer.writerow(row) for row in rows)
+
+
+def iter_jsonl(rows):
+    columns = list(EXPORT_COLUMNS)
+    for block in _batched(
+        json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows
+    ):
+        yield block
+
+
+def gzip_stream(chunks):
+    """Compress a stream of text chunks into a gzip stream as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(user, fmt, compress=False):
+    """The encoded (and optionally gzipped) export of ``user``'s history"""
+    encode = iter_csv if fmt == 'csv' else iter_jsonl
+    chunks = encode(export_rows(user))
+    if compress:
+        return gzip_stream(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
@@ -0,0 +1,142 @@
+"""Goal progress derived from the logged data.
+
+Each tracked goal type reads one source:
+
+- strength (with an exercise): the heaviest weight lifted, which is the
+  rank-1 'weight' PersonalRecord, so it never scans the history
+- frequency: workouts in the current week or month, one indexed count
+- bodyweight: the weight of the latest BMIRecord
+
+Cardio, custom and strength goals without an exercise keep their manually
+entered value. Open goals are refreshed with set-based UPDATEs from the
+receivers in tracker.signals and, for bulk writes, by the callers directly,
+after the personal records are up to date. Only rows whose value changed are
+written, so ``updated_at`` is the time of the last progress; a stalled goal
+that moves becomes active again. Strength and frequency goals that reach
+their target are marked completed. A bodyweight goal can be a loss or a
+gain, so it is never completed automatically.
+``rebuild_goals`` refreshes everything and backs the recompute_goals command.
+``evaluate_goals`` moves every user's goals to completed, overdue or stalled
+and backs the evaluate_goals command.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import summary
+from .models import BMIRecord, DashboardSummary, DataVersion, Goal, PersonalRecord, Workout
+
+ZERO = Value(Decimal(0), output_field=DecimalField(max_digits=10, decimal_places=2))
+# An open goal without progress for this long is marked stalled
+STALL_AFTER = datetime.timedelta(days=30)
+
+
+def period_start(period, today=None):
+    """First day of the current week (Monday) or month"""
+    today = today or timezone.localdate()
+    if period == 'month':
+        return today.replace(day=1)
+    return today - datetime.timedelta(days=today.weekday())
+
+
+def _open(user_id, goal_type, goal_ids=None):
+    goals = Goal.objects.filter(user_id=user_id, goal_type=goal_type, status__in=Goal.OPEN_STATUSES)
+    if goal_ids is not None:
+        goals = goals.filter(id__in=goal_ids)
+    return goals
+
+
+def _refresh(user_id, goals, value, complete=True):
+    """Set ``goals`` to ``value`` where it changed, then complete those that reached their target"""
+    if not goals.exclude(current_value=value).update(current_value=value, status='active', updated_at=timezone.now()):
+        return
+    if complete and goals.filter(current_value__gte=F('target_value')).update(status='completed', updated_at=timezone.now()):
+        summary.refresh_active_goals(user_id)
+
+
+def refresh_strength(user_id, catalog_ids=None, goal_ids=None):
+    """Set strength goals to the heaviest weight lifted for their exercise"""
+    goals = _open(user_id, 'strength', goal_ids).filter(exercise__isnull=False)
+    if catalog_ids is not None:
+        goals = goals.filter(exercise_id__in=catalog_ids)
+    heaviest = PersonalRecord.objects.filter(
+        user_id=user_id, catalog_id=OuterRef('exercise_id'), kind='weight', rank=1,
+    ).values('value')[:1]
+    _refresh(user_id, goals, Coalesce(Subquery(heaviest), ZERO))
+
+
+def refresh_frequency(user_id, goal_ids=None, today=None):
+    """Set frequency goals to the number of workouts in their current period"""
+    for period, label in Goal.PERIODS:
+        goals = _open(user_id, 'frequency', goal_ids).filter(period=period)
+        sessions = Workout.objects.filter(user_id=user_id, date__gte=period_start(period, today)).values('user_id')
+        count = sessions.annotate(count=Count('id')).values('count')
+        _refresh(user_id, goals, Coalesce(Subquery(count), ZERO))
+
+
+def refresh_bodyweight(user_id, goal_ids=None):
+    """Set bodyweight goals to the latest recorded weight"""
+    latest = BMIRecord.objects.filter(user_id=user_id).order_by('-created_at').values('weight')[:1]
+    _refresh(user_id, _open(user_id, 'bodyweight', goal_ids), Coalesce(Subquery(latest), ZERO), complete=False)
+
+
+def refresh_goal(goal):
+    """Bring one goal up to date, e.g. after it was created or its source changed"""
+    if goal.goal_type == 'strength':
+        refresh_strength(goal.user_id, goal_ids=[goal.id])
+    elif goal.goal_type == 'frequency':
+        refresh_frequency(goal.user_id, goal_ids=[goal.id])
+    elif goal.goal_type == 'bodyweight':
+        refresh_bodyweight(goal.user_id, goal_ids=[goal.id])
+
+
+def rebuild_goals(user_id, today=None):
+    """Refresh every tracked goal of a user"""
+    refresh_strength(user_id)
+    refresh_frequency(user_id, today=today)
+    refresh_bodyweight(user_id)
+
+
+def _batches(ids, size=900):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def evaluate_goals(now=None, stall_after=STALL_AFTER):
+    """Mark every user's open goals completed, overdue or stalled; returns the rows changed per status.
+
+    Each transition is one UPDATE over the whole table, applied in that
+    order, so a goal that reached its target is completed even if its
+    deadline has passed. The users a transition touches are read with the
+    same filter just before it, inside the transaction, and only their
+    dashboard counts and data versions are refreshed.
+    """
+    now = now or timezone.now()
+    open_goals = Goal.objects.filter(status__in=Goal.OPEN_STATUSES)
+    transitions = [
+        ('completed', open_goals.exclude(goal_type='bodyweight').filter(current_value__gte=F('target_value'))),
+        ('overdue', open_goals.filter(deadline__lt=timezone.localdate(now))),
+        ('stalled', Goal.objects.filter(status='active', updated_at__lt=now - stall_after)),
+    ]
+    changed, users = {}, {}
+    with transaction.atomic():
+        for status, goals in transitions:
+            users[status] = set(goals.values_list('user_id', flat=True))
+            changed[status] = goals.update(status=status, updated_at=now) if users[status] else 0
+
+        # Stalled goals are still open, so only the first two change the dashboard count
+        open_count = Goal.objects.filter(
+            user_id=OuterRef('user_id'), status__in=Goal.OPEN_STATUSES,
+        ).values('user_id').annotate(count=Count('id')).values('count')
+        for batch in _batches(users['completed'] | users['overdue']):
+            DashboardSummary.objects.filter(user_id__in=batch).update(
+                active_goals=Coalesce(Subquery(open_count), 0), updated_at=now,
+            )
+        for batch in _batches(users['completed'] | users['overdue'] | users['stalled']):
+            DataVersion.objects.filter(user_id__in=batch).update(version=F('version') + 1, updated_at=now)
+    return changed
@@ -0,0 +1,104 @@
+import datetime
+
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.utils.dateparse import parse_date
+
+from .models import Workout, Exercise, normalize_exercise_name
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_STREAM_CHUNK_SIZE = 50
+
+
+def parse_history_date(value):
+    """Parse a YYYY-MM-DD query parameter, ignoring anything malformed"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def encode_cursor(workout):
+    return f'{workout.date.isoformat()}.{workout.id}'
+
+
+def decode_cursor(cursor):
+    """Turn a cursor back into a (date, id) pair, or None if it is invalid"""
+    try:
+        date, workout_id = (cursor or '').split('.')
+        return datetime.date.fromisoformat(date), int(workout_id)
+    except ValueError:
+        return None
+
+
+def history_queryset(user, start=None, end=None, exercise=None):
+    """The user's workouts, newest first, with the filters applied in SQL"""
+    workouts = Workout.objects.filter(user=user)
+    if start:
+        workouts = workouts.filter(date__gte=start)
+    if end:
+        workouts = workouts.filter(date__lte=end)
+    if exercise:
+        workouts = workouts.filter(Exists(
+            Exercise.objects.filter(
+                workout=OuterRef('pk'),
+                catalog__normalized_name=normalize_exercise_name(exercise),
+            )
+        ))
+    return workouts.order_by('-date', '-id')
+
+
+def _after_cursor(workouts, cursor):
+    position = decode_cursor(cursor)
+    if position:
+        date, workout_id = position
+        workouts = workouts.filter(Q(date__lt=date) | Q(date=date, id__lt=workout_id))
+    return workouts
+
+
+def _page_queryset(workouts, cursor, size):
+    return _after_cursor(workouts, cursor).prefetch_related(
+        Prefetch('exercises', queryset=Exercise.objects.order_by('id').prefetch_related('sets'))
+    )[:size + 1]
+
+
+def _split_page(page, size):
+    if len(page) > size:
+        page = page[:size]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+def workout_page(workouts, cursor=None, size=HISTORY_PAGE_SIZE):
+    """Fetch one keyset page of ``workouts`` after ``cursor``.
+
+    Returns the page and the cursor of the next one (None on the last page).
+    Only the workouts on the page have their exercises and sets prefetched.
+    """
+    return _split_page(list(_page_queryset(workouts, cursor, size)), size)
+
+
+async def aworkout_page(workouts, cursor=None, size=HISTORY_PAGE_SIZE):
+    """Async version of workout_page"""
+    return _split_page([workout async for workout in _page_queryset(workouts, cursor, size)], size)
+
+
+def iter_workout_chunks(workouts, size=HISTORY_STREAM_CHUNK_SIZE):
+    """Yield every workout in ``workouts`` as successive keyset pages"""
+    cursor = None
+    while True:
+        page, cursor = workout_page(workouts, cursor, size)
+        if page:
+            yield page
+        if not cursor:
+            break
+
+
+async def aiter_workout_chunks(workouts, size=HISTORY_STREAM_CHUNK_SIZE):
+    """Async version of iter_workout_chunks"""
+    cursor = None
+    while True:
+        page, cursor = await aworkout_page(workouts, cursor, size)
+        if page:
+            yield page
+        if not cursor:
+            break
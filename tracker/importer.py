@@ -0,0 +1,197 @@
+"""Chunked import of workout history exported from other apps.
+
+Files are CSV (with a header row) or JSON lines, optionally gzipped, with at
+least the columns ``date``, ``exercise``, ``reps`` and ``weight`` -- the
+same names tracker.export writes, so an export can be imported back. Rows
+are parsed as a stream and written in batches of ``IMPORT_BATCH_SIZE``, each
+in its own transaction together with the ImportJob checkpoint. A failed or
+interrupted import therefore resumes after its last committed batch when the
+same file is imported again.
+"""
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import goals, records, rollups, summary
+from .models import CatalogExercise, Workout, Exercise, ExerciseSet, ImportJob
+from .versions import bump_data_version
+from .workout_log import parse_set
+
+IMPORT_BATCH_SIZE = 2000
+IMPORT_FORMATS = ('csv', 'jsonl')
+REQUIRED_COLUMNS = ('date', 'exercise', 'reps', 'weight')
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def import_format(filename):
+    """Guess the format from a file name such as ``history.jsonl.gz``"""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for fmt in IMPORT_FORMATS:
+        if name.endswith(f'.{fmt}'):
+            return fmt
+    return None
+
+
+def fingerprint(binary):
+    """sha256 of a binary file object, leaving it rewound"""
+    digest = hashlib.sha256()
+    for block in iter(lambda: binary.read(1 << 16), b''):
+        digest.update(block)
+    binary.seek(0)
+    return digest.hexdigest()
+
+
+def open_text(binary, filename):
+    if filename.lower().endswith('.gz'):
+        binary = gzip.GzipFile(fileobj=binary)
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def _raw_rows(text, fmt):
+    if fmt == 'csv':
+        for row in csv.DictReader(text):
+            yield row
+        return
+    for line in text:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def parse_rows(text, fmt):
+    """Yield ``(row number, date, exercise name, reps, weight)`` for each data row"""
+    for number, row in enumerate(_raw_rows(text, fmt), 1):
+        if not isinstance(row, dict) or any(
+            column not in row or row[column] in (None, '') for column in REQUIRED_COLUMNS
+        ):
+            raise ImportRowError(f'Row {number}: expected the columns {", ".join(REQUIRED_COLUMNS)}')
+        try:
+            date = datetime.date.fromisoformat(str(row['date'])[:10])
+            reps, weight = parse_set(row['reps'], str(row['weight']))
+        except ValueError:
+            raise ImportRowError(f'Row {number}: invalid date, reps or weight')
+        name = ' '.join(str(row['exercise']).split())[:200]
+        yield number, date, name, reps, weight
+
+
+def _write_batch(user_id, batch):
+    """Insert one batch of parsed rows, returning the number of sets created"""
+    dates = {date for _, date, _, _, _ in batch}
+    workouts = dict(Workout.objects.filter(user_id=user_id, date__in=dates).values_list('date', 'id'))
+    created = Workout.objects.bulk_create([
+        Workout(user_id=user_id, date=date) for date in sorted(dates - workouts.keys())
+    ])
+    workouts.update((workout.date, workout.id) for workout in created)
+
+    catalog = CatalogExercise.objects.resolve({name for _, _, name, _, _ in batch})
+
+    # Sets of an exercise already on that day (for example from the previous
+    # batch) are appended to it rather than starting a second entry
+    next_set, exercise_ids = {}, {}
+    existing = (
+        Exercise.objects
+        .filter(workout_id__in=workouts.values(), catalog_id__in={entry.id for entry in catalog.values()})
+        .annotate(last_set=Max('sets__set_number'))
+        .order_by('id')
+        .values_list('id', 'workout_id', 'catalog_id', 'last_set')
+    )
+    for exercise_id, workout_id, catalog_id, last_set in existing:
+        exercise_ids[workout_id, catalog_id] = exercise_id
+        next_set[exercise_id] = (last_set or 0) + 1
+
+    new_exercises = {}
+    for _, date, name, _, _ in batch:
+        key = workouts[date], catalog[name].id
+        if key not in exercise_ids and key not in new_exercises:
+            new_exercises[key] = Exercise(workout_id=key[0], catalog_id=key[1], name=name)
+    for key, exercise in zip(new_exercises, Exercise.objects.bulk_create(new_exercises.values())):
+        exercise_ids[key] = exercise.id
+        next_set[exercise.id] = 1
+
+    sets = []
+    for _, date, name, reps, weight in batch:
+        exercise_id = exercise_ids[workouts[date], catalog[name].id]
+        sets.append(ExerciseSet(exercise_id=exercise_id, set_number=next_set[exercise_id], reps=reps, weight=weight))
+        next_set[exercise_id] += 1
+    ExerciseSet.objects.bulk_create(sets, batch_size=IMPORT_BATCH_SIZE)
+    rollups.refresh_rollups(user_id, {(catalog[name].id, date) for _, date, name, _, _ in batch})
+    bump_data_version(user_id)
+    return len(sets)
+
+
+def _fail(job, error):
+    job.status, job.error = 'failed', str(error)
+    job.save(update_fields=['status', 'error', 'updated_at'])
+
+
+def run_import(job, text, fmt, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Import ``text`` for ``job``, resuming after its checkpoint.
+
+    ``progress`` is called with the job after every committed batch. A bad
+    row or a file that cannot be decoded (a ``.gz`` that is not gzip, text
+    that is not UTF-8) marks the job failed, keeping the batches before it,
+    and raises ImportRowError.
+    """
+    rows = parse_rows(text, fmt)
+    written = False
+    try:
+        # Rows up to the checkpoint were committed by an earlier run
+        for _ in islice(rows, job.rows_imported):
+            pass
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                created = _write_batch(job.user_id, batch)
+                ImportJob.objects.filter(id=job.id).update(
+                    rows_imported=batch[-1][0],
+                    sets_created=F('sets_created') + created,
+                    updated_at=timezone.now(),
+                )
+            written = True
+            job.refresh_from_db(fields=['rows_imported', 'sets_created'])
+            if progress:
+                progress(job)
+    except ImportRowError as error:
+        _fail(job, error)
+        raise
+    except (OSError, UnicodeDecodeError, csv.Error) as error:
+        # Decoding happens while the rows stream, so these surface mid-import
+        unreadable = ImportRowError(f'The file could not be read ({error})')
+        _fail(job, unreadable)
+        raise unreadable from error
+    finally:
+        # bulk_create sends no signals, so bring the derived tables up to date once
+        if written:
+            summary.rebuild_summary(job.user_id)
+            records.rebuild_records(job.user_id)
+            goals.rebuild_goals(job.user_id)
+
+    job.status, job.error = 'done', ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+    return job
+
+
+def start_import(user, source, digest):
+    """The job for this file: a new one, or the unfinished one to resume"""
+    job, created = ImportJob.objects.get_or_create(user=user, fingerprint=digest, defaults={'source': source})
+    if not created and job.status != 'done':
+        job.status, job.error = 'running', ''
+        job.save(update_fields=['status', 'error', 'updated_at'])
+    return job
@@ -0,0 +1,121 @@
+"""Per-request timing: SQL, template rendering and the whole request.
+
+``ServerTimingMiddleware`` opens a ``RequestTiming`` for each request in a
+context variable. Context variables follow a request into the threads
+that sync_to_async runs the async ORM in, so the same bookkeeping works
+for the async views. Two hooks fill it in:
+
+- ``time_query``, an execute wrapper added to every database connection
+  as it is opened. It counts and times each query.
+- ``DjangoTemplates``, the Django template backend with timed renders.
+
+The middleware reports the totals in a Server-Timing header and records
+them in the histograms of tracker.metrics, labelled with the resolved URL
+name. Queries and templates of a streaming response run after the
+response has left the middleware, so they are not included.
+"""
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.template.backends import django as django_backend
+
+from . import metrics
+
+_current = ContextVar('tracker_request_timing', default=None)
+
+
+class RequestTiming:
+    __slots__ = ('queries', 'sql', 'template')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+
+
+def time_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.sql += time.perf_counter() - started
+        timing.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver; the wrapper list outlives reconnects, so add it only once"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The Django template backend, with rendering time added to the current request's timing"""
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = RequestTiming()
+        started = time.perf_counter()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        started = time.perf_counter()
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, time.perf_counter() - started)
+
+    def finish(self, request, response, timing, elapsed):
+        match = request.resolver_match
+        view = match.url_name or match.view_name if match else '<unresolved>'
+        metrics.REQUEST_DURATION.observe(elapsed, view, request.method, response.status_code)
+        metrics.DB_DURATION.observe(timing.sql, view)
+        metrics.DB_QUERIES.observe(timing.queries, view)
+        metrics.TEMPLATE_DURATION.observe(timing.template, view)
+
+        response['Server-Timing'] = (
+            f'db;desc="{timing.queries} queries";dur={timing.sql * 1000:.2f}, '
+            f'tpl;desc="templates";dur={timing.template * 1000:.2f}, '
+            f'app;desc="{view}";dur={elapsed * 1000:.2f}'
+        )
+        return response
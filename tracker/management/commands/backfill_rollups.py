@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Populate the weekly and monthly rollup tables from logged sets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', metavar='USERNAME',
+                            help='Only backfill these users (repeatable)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['users']:
+            users = users.filter(username__in=options['users'])
+
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator(chunk_size=500):
+            rebuild_rollups(user_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled rollups for {rebuilt} user{"" if rebuilt == 1 else "s"}'))
@@ -0,0 +1,87 @@
+import datetime
+import time
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker import analytics
+from tracker.benchmark import create_history
+from tracker.models import ExerciseSet
+
+
+def orm_loop_metrics(user):
+    """The same metrics computed the way the views do it: a loop over model instances"""
+    weekly, best, sets = defaultdict(float), defaultdict(float), []
+    rows = ExerciseSet.objects.filter(exercise__workout__user=user).select_related('exercise__workout')
+    for exercise_set in rows.iterator(chunk_size=2000):
+        date = exercise_set.exercise.workout.date
+        weight = float(exercise_set.weight)
+        weekly[date - datetime.timedelta(days=date.weekday())] += exercise_set.reps * weight
+        e1rm = weight if exercise_set.reps <= 1 else weight * (1 + exercise_set.reps / 30)
+        catalog_id = exercise_set.exercise.catalog_id
+        best[catalog_id] = max(best[catalog_id], e1rm)
+        sets.append((catalog_id, weight))
+
+    weeks, tonnage = [], []
+    if weekly:
+        week, last = min(weekly), max(weekly)
+        while week <= last:
+            weeks.append(week)
+            tonnage.append(weekly.get(week, 0.0))
+            week += datetime.timedelta(days=7)
+
+    rolling = []
+    for i in range(len(tonnage)):
+        window = tonnage[max(0, i - analytics.ROLLING_WEEKS + 1):i + 1]
+        rolling.append(sum(window) / len(window))
+    change = [None] + [
+        (tonnage[i] - tonnage[i - 1]) / tonnage[i - 1] if tonnage[i - 1] else None
+        for i in range(1, len(tonnage))
+    ]
+    intensity = [0] * len(analytics.INTENSITY_LABELS)
+    for catalog_id, weight in sets:
+        intensity[bisect_right(analytics.INTENSITY_BINS, weight / best[catalog_id] if best[catalog_id] else 0)] += 1
+    return tonnage, rolling, change, intensity
+
+
+class Command(BaseCommand):
+    help = 'Compare the NumPy analytics module with an ORM loop on a large synthetic user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sets', type=int, default=1000000)
+        parser.add_argument('--skip-orm', action='store_true', help='Only time the columnar path')
+
+    def handle(self, *args, **options):
+        analytics._require_numpy()
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+        try:
+            started = time.perf_counter()
+            create_history(user, options['sets'])
+            count = ExerciseSet.objects.filter(exercise__workout__user=user).count()
+            self.stdout.write(f'Created {count:,} sets in {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            columns = analytics.load_sets(user)
+            loaded = time.perf_counter()
+            metrics = analytics.training_metrics(user, columns=columns)
+            computed = time.perf_counter()
+            self.stdout.write(
+                f'  columnar: {computed - started:.2f}s '
+                f'(load {loaded - started:.2f}s, compute {(computed - loaded) * 1000:.1f} ms)'
+            )
+
+            if not options['skip_orm']:
+                started = time.perf_counter()
+                tonnage, rolling, change, intensity = orm_loop_metrics(user)
+                self.stdout.write(f'  ORM loop: {time.perf_counter() - started:.2f}s')
+                same = (
+                    len(tonnage) == len(metrics['tonnage'])
+                    and all(abs(a - b) < 0.01 for a, b in zip(tonnage, metrics['tonnage']))
+                    and intensity == metrics['intensity']['sets']
+                )
+                self.stdout.write('  results match' if same else self.style.ERROR('  results differ'))
+        finally:
+            user.delete()
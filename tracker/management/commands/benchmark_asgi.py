@@ -0,0 +1,154 @@
+import asyncio
+import io
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from fitlife.asgi import application as asgi_application
+from fitlife.wsgi import application as wsgi_application
+from tracker.records import rebuild_records
+from tracker.rollups import rebuild_rollups
+from tracker.summary import rebuild_summary
+from tracker.benchmark import create_history
+
+# The read views that have async versions
+URLS = [
+    '/dashboard/',
+    '/workout-history/',
+    '/progress/?exercise=Bench+Press',
+    '/progress/?exercise=Squat&period=week',
+    '/goals/',
+    '/bmi-history/',
+    '/workout-plans/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the read views under WSGI (thread pool) and ASGI (async views) at high concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=3000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--sets', type=int, default=20000, help='Size of the benchmark user\'s history')
+
+    def wsgi_request(self, url):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': self.cookie,
+            'wsgi.input': io.BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        statuses = []
+        started = time.perf_counter()
+        response = wsgi_application(environ, lambda status, headers: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return time.perf_counter() - started, statuses[0].startswith('200')
+
+    def run_wsgi(self, urls):
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            return list(pool.map(self.wsgi_request, urls))
+
+    async def asgi_request(self, application, url):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': parts.path,
+            'raw_path': parts.path.encode(),
+            'query_string': parts.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'cookie', self.cookie.encode())],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        done, status, requested = asyncio.Event(), [], False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Only disconnect once the response has been sent
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                done.set()
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - started, status[0] == 200
+
+    async def run_asgi(self, application, urls):
+        queue, results = list(reversed(urls)), []
+
+        async def worker():
+            while queue:
+                results.append(await self.asgi_request(application, queue.pop()))
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return results
+
+    def report(self, label, results, elapsed):
+        timings = sorted(timing for timing, ok in results)
+        failed = sum(not ok for timing, ok in results)
+        self.stdout.write(
+            f'{label:>30}: {len(results) / elapsed:,.0f} req/s, '
+            f'p50 {statistics.median(timings) * 1000:.1f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.1f} ms'
+            + (self.style.ERROR(f', {failed} failed') if failed else '')
+        )
+
+    def handle(self, *args, **options):
+        self.concurrency = options['concurrency']
+        urls = [URLS[i % len(URLS)] for i in range(options['requests'])]
+        settings.ALLOWED_HOSTS = ['localhost']
+        settings.DEBUG = False
+
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+        try:
+            create_history(user, options['sets'])
+            rebuild_summary(user.id)
+            rebuild_records(user.id)
+            rebuild_rollups(user.id)
+            client = Client()
+            client.force_login(user)
+            self.cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+            self.stdout.write(f'{len(urls):,} requests, {self.concurrency} concurrent clients')
+            started = time.perf_counter()
+            self.report('WSGI, thread pool', self.run_wsgi(urls), time.perf_counter() - started)
+
+            for label, application in [
+                ('ASGI, sync views', get_asgi_application()),
+                ('ASGI, async views', asgi_application),
+            ]:
+                started = time.perf_counter()
+                results = asyncio.run(self.run_asgi(application, urls))
+                self.report(label, results, time.perf_counter() - started)
+        finally:
+            user.delete()
@@ -0,0 +1,89 @@
+import copy
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+
+from tracker import write_queue
+from tracker.benchmark import restore_database, use_database
+from tracker.workout_log import save_exercises
+
+# The previous configuration: rollback journal, deferred transactions, Python's 5s default busy timeout
+LEGACY_OPTIONS = {}
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent workout logging against scratch SQLite databases, before and after tuning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=100, help='Writes per thread')
+
+    def log_sets(self, user, results):
+        succeeded = failed = 0
+        try:
+            for i in range(self.writes):
+                try:
+                    write_queue.run_write(save_exercises, [('Bench Press', [(5, 60 + i % 40)] * 3)], user=user)
+                    succeeded += 1
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    failed += 1
+        finally:
+            connection.close()
+        results.append((succeeded, failed))
+
+    def run(self, template, workdir, label, options, batching=False):
+        database = workdir / f'{label.replace(" ", "-")}.sqlite3'
+        shutil.copy(template, database)
+        use_database(database, options)
+        users = [User.objects.create_user(f'contention-{i}') for i in range(self.threads)]
+        connection.close()
+
+        results = []
+        with override_settings(TRACKER_WRITE_BATCHING=batching):
+            # A fresh queue, so its worker thread connects to this scenario's database
+            write_queue._write_queue = write_queue.WriteQueue()
+            threads = [threading.Thread(target=self.log_sets, args=(user, results)) for user in users]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        succeeded = sum(ok for ok, failed in results)
+        failed = sum(failed for ok, failed in results)
+        self.stdout.write(
+            f'{label:>24}: {succeeded / elapsed:,.0f} writes/s, '
+            f'{failed / (succeeded + failed):.1%} "database is locked" ({failed} of {succeeded + failed})'
+        )
+
+    def handle(self, *args, **options):
+        self.threads, self.writes = options['threads'], options['writes']
+        tuned = settings.DATABASES['default'].get('OPTIONS', {})
+        original = copy.deepcopy(connections.settings['default'])
+
+        with tempfile.TemporaryDirectory() as workdir:
+            workdir = Path(workdir)
+            template = workdir / 'template.sqlite3'
+            try:
+                use_database(template, LEGACY_OPTIONS)
+                call_command('migrate', verbosity=0, interactive=False)
+
+                self.stdout.write(f'{self.threads} threads x {self.writes} writes of 3 sets')
+                self.run(template, workdir, 'legacy', LEGACY_OPTIONS)
+                self.run(template, workdir, 'tuned', tuned)
+                self.run(template, workdir, 'tuned + write queue', tuned, batching=True)
+            finally:
+                write_queue._write_queue = write_queue.WriteQueue()
+                restore_database(original)
@@ -0,0 +1,128 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tracker.benchmark import scratch_database
+from tracker.goals import STALL_AFTER, evaluate_goals
+from tracker.models import DashboardSummary, DataVersion, Goal
+from .generate_data import _insert, relaxed_pragmas
+
+
+def orm_loop_evaluate(users, now, stall_after=STALL_AFTER):
+    """The same transitions applied the way the views do it: load each goal, change it, save it"""
+    changed = dict.fromkeys(['completed', 'overdue', 'stalled'], 0)
+    today = timezone.localdate(now)
+    goals = Goal.objects.filter(user_id__in=users, status__in=Goal.OPEN_STATUSES).order_by('id')
+    for goal in goals.iterator(chunk_size=2000):
+        if goal.goal_type != 'bodyweight' and goal.current_value >= goal.target_value:
+            goal.status = 'completed'
+        elif goal.deadline and goal.deadline < today:
+            goal.status = 'overdue'
+        elif goal.status == 'active' and goal.updated_at < now - stall_after:
+            goal.status = 'stalled'
+        else:
+            continue
+        changed[goal.status] += 1
+        with transaction.atomic():
+            goal.save()
+    return changed
+
+
+class Command(BaseCommand):
+    help = 'Time evaluate_goals on a scratch database with a million goals, against a per-object loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--goals', type=int, default=1000000)
+        parser.add_argument('--goals-per-user', type=int, default=20)
+        parser.add_argument('--loop-users', type=int, default=500,
+                            help='Users whose goals the per-object loop evaluates, to extrapolate from')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            now = timezone.now()
+            started = time.perf_counter()
+            users, expected = self.create_goals(options, now)
+            self.stdout.write(
+                f'Created {options["goals"]:,} goals for {len(users):,} users in {time.perf_counter() - started:.1f}s; '
+                f'expected transitions {expected}'
+            )
+
+            sample = users[:options['loop_users']]
+            sampled_goals = Goal.objects.filter(user_id__in=sample).count()
+            started = time.perf_counter()
+            looped = orm_loop_evaluate(sample, now)
+            loop_seconds = time.perf_counter() - started
+            per_goal = loop_seconds / max(sampled_goals, 1)
+            self.stdout.write(
+                f'  ORM loop: {sampled_goals:,} goals in {loop_seconds:.2f}s, {looped}; '
+                f'about {per_goal * options["goals"]:.0f}s for all {options["goals"]:,}'
+            )
+
+            started = time.perf_counter()
+            changed = evaluate_goals(now)
+            self.stdout.write(f'  set-based: {time.perf_counter() - started:.2f}s, {changed}')
+
+            started = time.perf_counter()
+            again = evaluate_goals(now)
+            self.stdout.write(f'  second run: {time.perf_counter() - started:.2f}s, {again}')
+
+            total = {status: changed[status] + looped[status] for status in changed}
+            if total == expected and not any(again.values()):
+                self.stdout.write(self.style.SUCCESS('  transitions match the generated data'))
+            else:
+                self.stdout.write(self.style.ERROR(f'  transitions differ: {total} != {expected}'))
+
+    def create_goals(self, options, now):
+        """Users with goals spread over every lifecycle case; returns the user ids and the expected transitions"""
+        rng = random.Random(options['seed'])
+        per_user = options['goals_per_user']
+        user_count = -(-options['goals'] // per_user)
+        users = User.objects.bulk_create(
+            [User(username=f'goal-benchmark-{i}') for i in range(user_count)], batch_size=5000,
+        )
+        today = timezone.localdate(now)
+        expected = dict.fromkeys(['completed', 'overdue', 'stalled'], 0)
+        rows, remaining = [], options['goals']
+        columns = ['user', 'title', 'description', 'goal_type', 'target_value', 'current_value', 'unit',
+                   'deadline', 'period', 'status', 'created_at', 'updated_at']
+        with relaxed_pragmas(), connection.cursor() as cursor:
+            for user in users:
+                for i in range(min(per_user, remaining)):
+                    # Untracked types, so saving in the loop does not recompute their values from (no) history
+                    goal_type = rng.choice(['strength', 'cardio', 'custom'])
+                    status = rng.choice(['active'] * 8 + ['stalled', 'paused', 'completed'])
+                    target = 100
+                    current = rng.choice([rng.uniform(0, 99), rng.uniform(0, 99), rng.uniform(100, 120)])
+                    deadline = today + datetime.timedelta(days=rng.randint(-60, 120)) if rng.random() < 0.6 else None
+                    updated = now - datetime.timedelta(days=rng.randint(0, 90))
+                    if status in Goal.OPEN_STATUSES:
+                        if current >= target:
+                            expected['completed'] += 1
+                        elif deadline and deadline < today:
+                            expected['overdue'] += 1
+                        elif status == 'active' and updated < now - STALL_AFTER:
+                            expected['stalled'] += 1
+                    updated = connection.ops.adapt_datetimefield_value(updated)
+                    rows.append((user.id, f'Goal {i}', '', goal_type, target, round(current, 2), 'kg',
+                                 deadline and str(deadline), 'week', status, updated, updated))
+                remaining -= per_user
+                if len(rows) >= 50000:
+                    with transaction.atomic():
+                        _insert(cursor, Goal, columns, rows)
+                    rows.clear()
+            with transaction.atomic():
+                _insert(cursor, Goal, columns, rows)
+
+        DashboardSummary.objects.bulk_create(
+            [DashboardSummary(user_id=user.id) for user in users], batch_size=5000,
+        )
+        DataVersion.objects.bulk_create(
+            [DataVersion(user_id=user.id, version=1, updated_at=now) for user in users], batch_size=5000,
+        )
+        return [user.id for user in users], expected
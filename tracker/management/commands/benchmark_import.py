@@ -0,0 +1,64 @@
+import csv
+import datetime
+import io
+import tempfile
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker.importer import IMPORT_BATCH_SIZE, fingerprint, open_text, run_import, start_import
+from tracker.benchmark import BENCHMARK_EXERCISES
+
+
+def write_history(binary, rows, exercises=6, sets=5):
+    """Write ``rows`` sets of a plausible training history as CSV"""
+    text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(['date', 'exercise', 'reps', 'weight'])
+    day = datetime.date(2000, 1, 1)
+    written = 0
+    while written < rows:
+        for name in BENCHMARK_EXERCISES[:exercises]:
+            for s in range(sets):
+                if written == rows:
+                    break
+                writer.writerow([day.isoformat(), name, 8, f'{60 + s * 2.5:.2f}'])
+                written += 1
+        day += datetime.timedelta(days=1)
+    text.flush()
+    text.detach()
+    binary.seek(0)
+
+
+class Command(BaseCommand):
+    help = 'Measure rows per second of the bulk history importer for several batch sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, action='append', dest='batch_sizes',
+                            help=f'Repeatable; defaults to 500, {IMPORT_BATCH_SIZE} and 10000')
+
+    def handle(self, *args, **options):
+        batch_sizes = options['batch_sizes'] or [500, IMPORT_BATCH_SIZE, 10000]
+        with tempfile.TemporaryFile() as binary:
+            write_history(binary, options['rows'])
+            digest = fingerprint(binary)
+
+            for batch_size in batch_sizes:
+                user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+                try:
+                    job = start_import(user, 'benchmark.csv', digest)
+                    binary.seek(0)
+                    text = open_text(binary, 'benchmark.csv')
+                    started = time.perf_counter()
+                    run_import(job, text, 'csv', batch_size)
+                    elapsed = time.perf_counter() - started
+                    text.detach()
+                    self.stdout.write(
+                        f'batch {batch_size:>6}: {job.rows_imported} rows in {elapsed:.2f}s '
+                        f'({job.rows_imported / elapsed:,.0f} rows/s, including the summary and record rebuild)'
+                    )
+                finally:
+                    user.delete()
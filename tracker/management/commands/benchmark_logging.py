@@ -0,0 +1,91 @@
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker.benchmark import BENCHMARK_EXERCISES
+from tracker.models import CatalogExercise, Workout, Exercise, ExerciseSet
+from tracker.workout_log import save_exercises
+
+
+@contextmanager
+def count_statements(stats):
+    """Count SQL statements and commits issued on the default connection.
+
+    Statements run outside an atomic block are committed on their own by
+    SQLite's autocommit, so each of them counts as a commit as well (except
+    the BEGIN that opens a transaction).
+    """
+    def wrapper(execute, sql, params, many, context):
+        stats['queries'] += 1
+        if not connection.in_atomic_block and sql != 'BEGIN':
+            stats['commits'] += 1
+        return execute(sql, params, many, context)
+
+    original_commit = connection.commit
+
+    def commit():
+        stats['commits'] += 1
+        return original_commit()
+
+    connection.commit = commit
+    try:
+        with connection.execute_wrapper(wrapper):
+            yield stats
+    finally:
+        del connection.commit
+
+
+def log_row_by_row(user, entries):
+    """The previous write path: one autocommitted INSERT per row"""
+    catalog = CatalogExercise.objects.resolve([name for name, sets in entries])
+    workout = Workout.objects.create(user=user)
+    for name, sets in entries:
+        exercise = Exercise.objects.create(workout=workout, catalog=catalog[name], name=name)
+        for i, (reps, weight) in enumerate(sets, 1):
+            ExerciseSet.objects.create(exercise=exercise, set_number=i, reps=reps, weight=weight)
+
+
+def log_batched(user, entries):
+    save_exercises(entries, user=user)
+
+
+class Command(BaseCommand):
+    help = 'Measure queries, commits and time per logged workout for the workout write path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workouts', type=int, default=50)
+        parser.add_argument('--exercises', type=int, default=6, choices=range(1, len(BENCHMARK_EXERCISES) + 1))
+        parser.add_argument('--sets', type=int, default=5)
+
+    def handle(self, *args, **options):
+        entries = [
+            (name, [(8, Decimal('60.00') + s) for s in range(options['sets'])])
+            for name in BENCHMARK_EXERCISES[:options['exercises']]
+        ]
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+        try:
+            for label, log in (('row-by-row', log_row_by_row), ('batched', log_batched)):
+                stats = {'queries': 0, 'commits': 0}
+                elapsed = 0
+                for _ in range(options['workouts']):
+                    started = time.perf_counter()
+                    with count_statements(stats):
+                        log(user, entries)
+                    elapsed += time.perf_counter() - started
+                    # A user has one workout per day, so clear it before the next round
+                    Workout.objects.filter(user=user).delete()
+
+                per_workout = options['workouts']
+                self.stdout.write(
+                    f"{label:>10}: {stats['queries'] / per_workout:.1f} queries, "
+                    f"{stats['commits'] / per_workout:.1f} commits, "
+                    f"{elapsed / per_workout * 1000:.2f} ms per workout "
+                    f"({options['exercises']} exercises x {options['sets']} sets)"
+                )
+        finally:
+            user.delete()
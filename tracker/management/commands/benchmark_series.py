@@ -0,0 +1,84 @@
+import datetime
+import gzip
+import json
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker import series
+from tracker.benchmark import create_history, scratch_database
+from tracker.models import BMIRecord
+from tracker.progress import exercise_progress
+from tracker.summary import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size and response time of full chart series with the downsampled series endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sets', type=int, default=200000, help='Sets in the benchmark history (64 per workout)')
+        parser.add_argument('--bmi-records', type=int, default=3000)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+            create_history(user, options['sets'])
+            self.add_bmi_records(user, options['bmi_records'])
+            rebuild_summary(user.id)
+            client = Client()
+            client.force_login(user)
+            self.iterations = options['iterations']
+
+            full = self.time(lambda: json.dumps(exercise_progress(user, ['Squats'])).encode())
+            self.report('full progress series (embedded before)', full)
+            self.report('progress page', self.time(lambda: client.get(reverse('progress'), {'exercise': 'Squats'}).content))
+            self.report('progress series endpoint', self.time(
+                lambda: client.get(reverse('progress_series'), {'exercise': 'Squats'}).content,
+            ))
+            self.report('bmi history page', self.time(lambda: client.get(reverse('bmi_history')).content))
+            self.report('bmi series endpoint', self.time(lambda: client.get(reverse('bmi_series')).content))
+
+            points = exercise_progress(user, ['Squats'])['Squats']
+            plain = json.dumps(series.downsample({'Squats': points}, series.CHART_POINTS)).encode()
+            encoded = json.dumps(series.encode_series({'Squats': points}, 'weight', series.CHART_POINTS)).encode()
+            self.stdout.write(
+                f'{len(points):,} points reduced to {series.CHART_POINTS}: '
+                f'{self.size(plain)} as point objects, {self.size(encoded)} delta-encoded'
+            )
+
+    def add_bmi_records(self, user, count):
+        records = BMIRecord.objects.bulk_create([
+            BMIRecord(user=user, weight=95 - i * 15 / count, height=180, bmi=round((95 - i * 15 / count) / 3.24, 1))
+            for i in range(count)
+        ])
+        # auto_now_add stamps them all now; spread them over the past days
+        today = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.executemany('UPDATE tracker_bmirecord SET created_at = %s WHERE id = %s', [
+                (connection.ops.adapt_datetimefield_value(today - datetime.timedelta(days=count - i)), record.id)
+                for i, record in enumerate(records)
+            ])
+
+    def time(self, produce):
+        produce()
+        timings = []
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            body = produce()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), body
+
+    def size(self, body):
+        return f'{len(body):,} bytes ({len(gzip.compress(body)):,} gzipped)'
+
+    def report(self, label, result):
+        elapsed, body = result
+        self.stdout.write(f'{label:>40}: {elapsed:8.2f} ms, {self.size(body)}')
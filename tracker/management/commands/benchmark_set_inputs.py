@@ -0,0 +1,106 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import JsonResponse
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+
+from tracker.set_inputs import MAX_SETS
+
+
+@login_required
+def legacy_get_set_inputs(request):
+    """The previous implementation: rebuilt by string concatenation on every call"""
+    sets_count = request.GET.get('sets_count', 0)
+    try:
+        sets_count = int(sets_count)
+        if sets_count < 1 or sets_count > 8:
+            return JsonResponse({'error': 'Invalid sets count'})
+    except ValueError:
+        return JsonResponse({'error': 'Invalid sets count'})
+
+    html = ''
+    for i in range(1, sets_count + 1):
+        html += f'''
+        <div class="set-group">
+            <div class="set-title">Set {i}</div>
+            <div class="set-row">
+                <input type="number" 
+                       name="reps_{i}" 
+                       class="set-input" 
+                       placeholder="Reps" 
+                       min="1"
+                       required>
+                <input type="number" 
+                       name="weight_{i}" 
+                       class="set-input" 
+                       placeholder="Weight (kg)" 
+                       min="0" 
+                       step="0.5"
+                       required>
+            </div>
+        </div>
+        '''
+
+    return JsonResponse({'html': html})
+
+
+# Served through the full middleware stack next to the real URLs
+urlpatterns = [
+    path('legacy-set-inputs/', legacy_get_set_inputs),
+    path('', include('fitlife.urls')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare latency and throughput of get_set_inputs with the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def measure(self, client, url, counts=range(1, MAX_SETS + 1), headers=None):
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for i in range(self.requests):
+                request_started = time.perf_counter()
+                client.get(url, {'sets_count': counts[i % len(counts)]}, headers=headers or {})
+                timings.append(time.perf_counter() - request_started)
+            elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            'mean_ms': statistics.fmean(timings) * 1000,
+            'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+            'rps': self.requests / elapsed,
+            'queries': len(queries) / self.requests,
+        }
+
+    def handle(self, *args, **options):
+        self.requests = options['requests']
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex}')
+        try:
+            with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver'], DEBUG=False):
+                logged_in = Client()
+                logged_in.force_login(user)
+                anonymous = Client()
+                etag = anonymous.get('/get-set-inputs/', {'sets_count': 1})['ETag']
+
+                results = [
+                    ('legacy (logged in)', self.measure(logged_in, '/legacy-set-inputs/')),
+                    ('prebuilt', self.measure(anonymous, '/get-set-inputs/')),
+                    ('revalidated (304)', self.measure(anonymous, '/get-set-inputs/', [1], {'If-None-Match': etag})),
+                ]
+        finally:
+            user.delete()
+
+        for label, result in results:
+            self.stdout.write(
+                f"{label:>26}: {result['mean_ms']:.3f} ms mean, {result['p95_ms']:.3f} ms p95, "
+                f"{result['rps']:,.0f} req/s, {result['queries']:.1f} queries per request"
+            )
@@ -0,0 +1,92 @@
+import json
+import platform
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from tracker.benchmark import ROUTES, compare, measure, scratch_database, seed
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every tracker URL against a scratch database and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--sets', type=int, default=20000, help='Sets in the benchmark user\'s history')
+        parser.add_argument('--goals', type=int, default=20)
+        parser.add_argument('--bmi-records', type=int, default=50)
+        parser.add_argument('--plans', type=int, default=10)
+        parser.add_argument('--route', action='append', help='Only run routes whose name starts with this')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown, as a fraction')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--without-instrumentation', action='store_true',
+                            help='Run without ServerTimingMiddleware and timed templates, to measure their overhead')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        routes = [
+            route for route in ROUTES
+            if not options['route'] or any(route.name.startswith(prefix) for prefix in options['route'])
+        ]
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['routes']
+
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'DEBUG': False}
+        if options['without_instrumentation']:
+            overrides['MIDDLEWARE'] = [name for name in settings.MIDDLEWARE if name != 'tracker.instrumentation.ServerTimingMiddleware']
+            overrides['TEMPLATES'] = [
+                {**engine, 'BACKEND': 'django.template.backends.django.DjangoTemplates'}
+                if engine['BACKEND'] == 'tracker.instrumentation.DjangoTemplates' else engine
+                for engine in settings.TEMPLATES
+            ]
+
+        volumes = {key: options[key] for key in ('sets', 'goals', 'bmi_records', 'plans')}
+        results = {}
+        with scratch_database(), override_settings(**overrides):
+            started = time.perf_counter()
+            fixture = seed(**volumes)
+            self.stdout.write(f'Seeded {volumes} in {time.perf_counter() - started:.1f}s')
+            for route in routes:
+                results[route.name] = measure(route, fixture, options['iterations'])
+                self.report(route.name, results[route.name], baseline)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'created': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'iterations': options['iterations'],
+                    'volumes': volumes,
+                    'routes': results,
+                }, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['tolerance'])
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(f'Regression in {name}: {metric} {before} -> {after}'))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+            elif options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+
+    def report(self, name, result, baseline):
+        line = (
+            f"{name:>28} {result['status']}: p50 {result['p50_ms']:8.2f} ms, p95 {result['p95_ms']:8.2f} ms, "
+            f"p99 {result['p99_ms']:8.2f} ms, {result['queries']:4g} queries ({result['sql_ms']:.2f} ms), "
+            f"{result['bytes']:,.0f} bytes"
+        )
+        before = (baseline or {}).get(name)
+        if before:
+            line += f", p95 {(result['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}% vs baseline"
+        self.stdout.write(line)
@@ -0,0 +1,19 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from tracker.goals import STALL_AFTER, evaluate_goals
+
+
+class Command(BaseCommand):
+    help = 'Mark open goals completed, overdue or stalled for every user (safe to run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stall-days', type=int, default=STALL_AFTER.days,
+                            help='Mark active goals without progress for this many days as stalled')
+
+    def handle(self, *args, **options):
+        changed = evaluate_goals(stall_after=datetime.timedelta(days=options['stall_days']))
+        for status, count in changed.items():
+            self.stdout.write(f'{status}: {count} goal{"" if count == 1 else "s"}')
+        self.stdout.write(self.style.SUCCESS(f'Updated {sum(changed.values())} goals'))
@@ -0,0 +1,319 @@
+import datetime
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from tracker.goals import rebuild_goals
+from tracker.models import BMIRecord, CatalogExercise, Exercise, ExerciseSet, Goal, PlanDay, PlanExercise, Workout, WorkoutPlan
+from tracker.plans import invalidate_plan_catalog
+from tracker.records import rebuild_records
+from tracker.rollups import rebuild_rollups
+from tracker.summary import rebuild_summary
+from tracker.versions import bump_data_version
+
+# The sample catalogue that populate_db.py used to create; rest days have no exercises
+SAMPLE_PLANS = {
+    'Push Pull Legs (PPL)': ('A classic split routine focusing on different movement patterns.', [
+        ('Monday: Push Day', ['Bench Press', 'Overhead Press', 'Incline Dumbbell Press',
+                              'Lateral Raises', 'Tricep Dips', 'Close-Grip Bench Press']),
+        ('Tuesday: Pull Day', ['Pull-ups', 'Barbell Rows', 'Lat Pulldowns',
+                               'Face Pulls', 'Bicep Curls', 'Hammer Curls']),
+        ('Wednesday: Leg Day', ['Squats', 'Romanian Deadlifts', 'Bulgarian Split Squats',
+                                'Leg Press', 'Calf Raises', 'Leg Curls']),
+        ('Thursday: Rest', []),
+        ('Friday: Push Day', ['Incline Barbell Press', 'Dumbbell Shoulder Press', 'Decline Press',
+                              'Cable Lateral Raises', 'Overhead Tricep Extension', 'Diamond Push-ups']),
+        ('Saturday: Pull Day', ['Deadlifts', 'T-Bar Rows', 'Cable Rows',
+                                'Reverse Flyes', 'Preacher Curls', 'Cable Curls']),
+        ('Sunday: Rest', []),
+    ]),
+    'Full Body Split': ('Hit every major muscle group in each session.', [
+        ('Workout A', ['Squats', 'Bench Press', 'Barbell Rows',
+                       'Overhead Press', 'Romanian Deadlifts', 'Plank']),
+        ('Workout B', ['Deadlifts', 'Incline Dumbbell Press', 'Pull-ups',
+                       'Dumbbell Shoulder Press', 'Lunges', 'Russian Twists']),
+        ('Workout C', ['Front Squats', 'Dumbbell Bench Press', 'T-Bar Rows',
+                       'Lateral Raises', 'Hip Thrusts', 'Mountain Climbers']),
+    ]),
+}
+
+# Typical working weight (kg) of an intermediate lifter for each exercise slot:
+# the first two exercises of a day are the main lifts, the rest accessories
+SLOT_WEIGHTS = [80, 60, 35, 25, 15, 15]
+GOAL_UNITS = {'strength': 'kg', 'cardio': 'km', 'frequency': 'sessions', 'bodyweight': 'kg', 'custom': 'times'}
+PASSWORD = 'fitlife-synthetic'
+
+# Only durability is relaxed; WAL stays on, so readers are not locked out during the load
+LOAD_PRAGMAS = {'synchronous': 'OFF', 'cache_size': '-262144', 'temp_store': 'MEMORY'}
+
+
+def _round_weight(weight):
+    step = 2.5 if weight >= 20 else 1
+    return round(max(step, round(weight / step) * step), 2)
+
+
+class Generator:
+    """Deterministic training history for one user, as rows ready for executemany"""
+
+    def __init__(self, seed, index, user_id, first_day, last_day, ids):
+        self.rng = random.Random(seed * 1000003 + index)
+        self.user_id = user_id
+        self.first_day = first_day
+        self.last_day = last_day
+        # Next free primary keys, shared by all users of a load
+        self.ids = ids
+
+    def _now(self, day, hour):
+        moment = datetime.datetime.combine(day, datetime.time(hour, self.rng.randrange(60)), datetime.timezone.utc)
+        return connection.ops.adapt_datetimefield_value(moment)
+
+    def history(self, catalog, workouts, exercises, sets):
+        rng = self.rng
+        plan_days = [day for day in rng.choice(list(SAMPLE_PLANS.values()))[1] if day[1]]
+        weekdays = sorted(rng.sample(range(7), rng.choice([2, 3, 3, 4, 4, 5])))
+        strength = rng.lognormvariate(0, 0.25)
+        start_weights = {}
+        start = self.first_day + datetime.timedelta(days=rng.randrange(0, 180))
+        rotation = 0
+        best = {}
+
+        week = start - datetime.timedelta(days=start.weekday())
+        while week <= self.last_day:
+            weeks_in = (week - start).days / 7
+            # Holidays, illness: about one week in sixteen is skipped entirely
+            if rng.random() < 1 / 16:
+                week += datetime.timedelta(days=7)
+                continue
+            # Progress slows down over time; every eighth week is a lighter deload
+            progression = 1 + 0.12 * math.log1p(max(weeks_in, 0) / 4)
+            if int(weeks_in) % 8 == 7:
+                progression *= 0.9
+
+            for weekday in weekdays:
+                day = week + datetime.timedelta(days=weekday)
+                if day < start or day > self.last_day or rng.random() < 0.08:
+                    continue
+                workout_id = self.ids['workout']
+                self.ids['workout'] += 1
+                workouts.append((workout_id, self.user_id, str(day), self._now(day, rng.randint(6, 20))))
+                created = self._now(day, 21)
+
+                day_name, lifts = plan_days[rotation % len(plan_days)]
+                rotation += 1
+                for slot, lift in enumerate(lifts):
+                    if slot > 1 and rng.random() < 0.1:
+                        continue
+                    exercise_id = self.ids['exercise']
+                    self.ids['exercise'] += 1
+                    exercises.append((exercise_id, workout_id, catalog[lift], lift, created))
+
+                    if lift not in start_weights:
+                        start_weights[lift] = SLOT_WEIGHTS[slot] * strength * rng.uniform(0.8, 1.2)
+                    target = start_weights[lift] * progression * rng.uniform(0.95, 1.05)
+                    reps = rng.randint(4, 8) if slot < 2 else rng.randint(8, 15)
+                    for number in range(1, rng.choice([3, 3, 4, 4, 5]) + 1):
+                        weight = _round_weight(target)
+                        sets.append((self.ids['set'], exercise_id, number, reps, weight))
+                        self.ids['set'] += 1
+                        best[lift] = max(best.get(lift, 0), weight)
+                        # Fatigue: later sets lose a rep now and then
+                        reps = max(1, reps - (rng.random() < 0.4))
+            week += datetime.timedelta(days=7)
+        return best
+
+    def bmi_records(self, records):
+        rng = self.rng
+        height = min(205, max(150, rng.gauss(175, 9)))
+        weight = rng.gauss(25, 3.5) * (height / 100) ** 2
+        drift = rng.uniform(-0.015, 0.01)
+        day = self.first_day + datetime.timedelta(days=rng.randrange(0, 60))
+        while day <= self.last_day:
+            bmi = weight / (height / 100) ** 2
+            records.append((self.user_id, round(weight, 2), round(height, 2), round(bmi, 1), self._now(day, 7)))
+            gap = rng.randint(14, 35)
+            weight = max(40, weight + drift * gap + rng.gauss(0, 0.8))
+            day += datetime.timedelta(days=gap)
+
+    def goals(self, catalog, goals, best):
+        rng = self.rng
+        today = self.last_day
+        for _ in range(rng.randint(2, 6)):
+            goal_type = rng.choice(['strength', 'strength', 'bodyweight', 'frequency', 'cardio', 'custom'])
+            exercise_id, period = None, rng.choice(['week', 'month'])
+            if goal_type == 'strength' and best:
+                lift = rng.choice(sorted(best))
+                target = _round_weight(best[lift] * 1.1)
+                title = f'{lift} {target:g} kg'
+                exercise_id = catalog[lift]
+                current = best[lift] * rng.uniform(0.8, 1.15)
+            else:
+                title, target = f'{goal_type.title()} goal', rng.choice([10, 20, 50, 100])
+                current = target * rng.uniform(0, 1.1)
+            status = 'completed' if current >= target else rng.choice(['active'] * 6 + ['paused'])
+            created = today - datetime.timedelta(days=rng.randint(0, 365))
+            deadline = created + datetime.timedelta(days=rng.choice([30, 60, 90, 180])) if rng.random() < 0.7 else None
+            goals.append((
+                self.user_id, title, '', goal_type, target, round(min(current, target * 1.1), 2),
+                GOAL_UNITS[goal_type], str(deadline) if deadline else None, exercise_id, period, status,
+                self._now(created, 12), self._now(created, 12),
+            ))
+
+
+@contextmanager
+def relaxed_pragmas():
+    """Apply LOAD_PRAGMAS for the duration of a bulk load, then restore the previous values"""
+    if connection.in_atomic_block:
+        # SQLite ignores or refuses these inside a transaction
+        yield
+        return
+    with connection.cursor() as cursor:
+        saved = {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in LOAD_PRAGMAS}
+        for name, value in LOAD_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in saved.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.execute('PRAGMA optimize')
+
+
+def _insert(cursor, model, fields, rows):
+    if not rows:
+        return
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    cursor.executemany(f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users with years of realistic training history (replaces populate_db.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--years', type=float, default=3)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same data')
+        parser.add_argument('--prefix', default='synthetic', help='Usernames are <prefix>-<n>@example.com')
+        parser.add_argument('--batch-size', type=int, default=200000, help='Sets per transaction')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated users first')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Leave summaries, records and rollups to the rebuild commands')
+        parser.add_argument('--no-plans', action='store_true', help='Do not create the sample workout plans')
+
+    def handle(self, *args, **options):
+        if not options['no_plans']:
+            self.create_sample_plans()
+        if options['users'] < 1:
+            return
+
+        usernames = [f'{options["prefix"]}-{i}@example.com' for i in range(options['users'])]
+        existing = User.objects.filter(username__startswith=f'{options["prefix"]}-')
+        if options['clear']:
+            self.clear(existing)
+        elif existing.filter(username__in=usernames).exists():
+            raise CommandError(f'Users named {options["prefix"]}-N@example.com already exist; use --clear or --prefix')
+
+        started = time.perf_counter()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create([User(username=name, email=name, password=password) for name in usernames])
+        user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        self.stdout.write(f'Created {len(usernames)} users (password "{PASSWORD}")')
+
+        counts = self.load(options, [user_ids[name] for name in usernames])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {counts["workouts"]:,} workouts, {counts["exercises"]:,} exercises, {counts["sets"]:,} sets, '
+            f'{counts["bmi"]:,} BMI records and {counts["goals"]:,} goals in {elapsed:.1f}s '
+            f'({counts["sets"] / elapsed:,.0f} sets/s)'
+        ))
+
+        if not options['skip_derived']:
+            started = time.perf_counter()
+            for user_id in user_ids.values():
+                rebuild_summary(user_id)
+                rebuild_records(user_id)
+                rebuild_rollups(user_id)
+                rebuild_goals(user_id)
+                bump_data_version(user_id)
+            self.stdout.write(f'Rebuilt summaries, records, rollups and goals in {time.perf_counter() - started:.1f}s')
+
+    def create_sample_plans(self):
+        created = 0
+        for name, (description, days) in SAMPLE_PLANS.items():
+            if WorkoutPlan.objects.filter(name=name).exists():
+                continue
+            with transaction.atomic():
+                plan = WorkoutPlan.objects.create(name=name, description=description)
+                plan_days = PlanDay.objects.bulk_create([
+                    PlanDay(plan=plan, name=day_name, order=order) for order, (day_name, lifts) in enumerate(days, 1)
+                ])
+                catalog = CatalogExercise.objects.resolve({lift for day_name, lifts in days for lift in lifts})
+                PlanExercise.objects.bulk_create([
+                    PlanExercise(day=day, catalog=catalog[lift], name=lift, order=order)
+                    for day, (day_name, lifts) in zip(plan_days, days)
+                    for order, lift in enumerate(lifts, 1)
+                ])
+            created += 1
+        if created:
+            invalidate_plan_catalog()
+        self.stdout.write(f'Created {created} sample workout plan{"" if created == 1 else "s"}')
+
+    def clear(self, users):
+        # Bottom-up, so each step is one DELETE rather than a cascade collected in Python
+        with transaction.atomic():
+            ExerciseSet.objects.filter(exercise__workout__user__in=users).delete()
+            Exercise.objects.filter(workout__user__in=users).delete()
+            Workout.objects.filter(user__in=users).delete()
+            deleted, per_model = users.delete()
+        self.stdout.write(f'Deleted {per_model.get(User._meta.label, 0)} previously generated users')
+
+    def load(self, options, user_ids):
+        catalog = {
+            lift: entry.id for lift, entry in CatalogExercise.objects.resolve(
+                {lift for description, days in SAMPLE_PLANS.values() for day_name, lifts in days for lift in lifts}
+            ).items()
+        }
+        ids = {
+            key: (model.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+            for key, model in [('workout', Workout), ('exercise', Exercise), ('set', ExerciseSet)]
+        }
+        today = timezone.localdate()
+        first_day = today - datetime.timedelta(days=round(options['years'] * 365))
+        counts = dict.fromkeys(['workouts', 'exercises', 'sets', 'bmi', 'goals'], 0)
+        pending = {key: [] for key in counts}
+
+        def flush():
+            with transaction.atomic(), connection.cursor() as cursor:
+                _insert(cursor, Workout, ['id', 'user', 'date', 'created_at'], pending['workouts'])
+                _insert(cursor, Exercise, ['id', 'workout', 'catalog', 'name', 'created_at'], pending['exercises'])
+                _insert(cursor, ExerciseSet, ['id', 'exercise', 'set_number', 'reps', 'weight'], pending['sets'])
+                _insert(cursor, BMIRecord, ['user', 'weight', 'height', 'bmi', 'created_at'], pending['bmi'])
+                _insert(cursor, Goal, [
+                    'user', 'title', 'description', 'goal_type', 'target_value', 'current_value',
+                    'unit', 'deadline', 'exercise', 'period', 'status', 'created_at', 'updated_at',
+                ], pending['goals'])
+            for key, rows in pending.items():
+                counts[key] += len(rows)
+                rows.clear()
+
+        # Foreign keys can only be switched off outside a transaction
+        with connection.constraint_checks_disabled(), relaxed_pragmas():
+            for index, user_id in enumerate(user_ids):
+                generator = Generator(options['seed'], index, user_id, first_day, today, ids)
+                best = generator.history(catalog, pending['workouts'], pending['exercises'], pending['sets'])
+                generator.bmi_records(pending['bmi'])
+                generator.goals(catalog, pending['goals'], best)
+                if len(pending['sets']) >= options['batch_size']:
+                    flush()
+                    self.stdout.write(f'  {index + 1}/{len(user_ids)} users, {counts["sets"]:,} sets')
+            flush()
+        return counts
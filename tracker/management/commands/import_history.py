@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importer import (
+    IMPORT_BATCH_SIZE, IMPORT_FORMATS, ImportRowError, fingerprint, import_format, open_text, run_import, start_import,
+)
+
+
+class Command(BaseCommand):
+    help = "Import a CSV or JSON-lines workout history into a user's account, resuming unfinished imports"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+
+        path = options['path']
+        fmt = options['format'] or import_format(path)
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format')
+
+        with open(path, 'rb') as binary:
+            job = start_import(user, os.path.basename(path), fingerprint(binary))
+            if job.status == 'done':
+                self.stdout.write(f'{path} was already imported ({job.sets_created} sets)')
+                return
+            if job.rows_imported:
+                self.stdout.write(f'Resuming after row {job.rows_imported}')
+
+            started, resumed_at = time.perf_counter(), job.rows_imported
+
+            def progress(job):
+                elapsed = time.perf_counter() - started
+                rate = (job.rows_imported - resumed_at) / elapsed if elapsed else 0
+                self.stdout.write(f'{job.rows_imported} rows, {job.sets_created} sets ({rate:,.0f} rows/s)')
+
+            try:
+                run_import(job, open_text(binary, path), fmt, options['batch_size'], progress)
+            except ImportRowError as error:
+                raise CommandError(f'{error}. The {job.rows_imported} rows before its batch were imported.')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {job.sets_created} sets from {path}'))
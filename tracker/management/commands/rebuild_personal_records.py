@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker.records import rebuild_records
+
+
+class Command(BaseCommand):
+    help = 'Recompute every personal-record list from the logged sets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', metavar='USERNAME',
+                            help='Only rebuild these users (repeatable)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['users']:
+            users = users.filter(username__in=options['users'])
+
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator(chunk_size=500):
+            rebuild_records(user_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt personal records for {rebuilt} user{"" if rebuilt == 1 else "s"}'))
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker.goals import rebuild_goals
+from tracker.models import Goal
+from tracker.versions import bump_data_version
+
+
+class Command(BaseCommand):
+    help = 'Recompute the progress of every tracked goal from the logged data (run daily to roll frequency goals over)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', metavar='USERNAME',
+                            help='Only recompute these users (repeatable)')
+
+    def handle(self, *args, **options):
+        # Only users with an open (active or stalled) goal have anything to recompute
+        open_goals = Goal.objects.filter(status__in=Goal.OPEN_STATUSES)
+        users = User.objects.filter(id__in=open_goals.values('user_id')).order_by('id')
+        if options['users']:
+            users = users.filter(username__in=options['users'])
+
+        recomputed = 0
+        for user_id in users.values_list('id', flat=True).iterator(chunk_size=500):
+            rebuild_goals(user_id)
+            bump_data_version(user_id)
+            recomputed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Recomputed goals for {recomputed} user{"" if recomputed == 1 else "s"}'))
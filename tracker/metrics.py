@@ -0,0 +1,76 @@
+"""In-process histograms exposed in the Prometheus text format.
+
+Each worker process keeps its own counts; Prometheus scrapes and sums them
+per instance. Observations take a lock and a bisect, so recording a request
+costs a few microseconds.
+"""
+import threading
+from bisect import bisect_left
+
+# Prometheus' default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        # Buckets are upper bounds, inclusive; past the last one only +Inf counts it
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'fitlife_request_duration_seconds', 'Time to produce a response, by URL name', ('view', 'method', 'status'),
+)
+DB_DURATION = Histogram(
+    'fitlife_db_duration_seconds', 'SQL time per request, by URL name', ('view',),
+)
+DB_QUERIES = Histogram(
+    'fitlife_db_queries_per_request', 'SQL queries per request, by URL name', ('view',), QUERY_COUNT_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    'fitlife_template_duration_seconds', 'Template rendering time per request, by URL name', ('view',),
+)
+HISTOGRAMS = [REQUEST_DURATION, DB_DURATION, DB_QUERIES, TEMPLATE_DURATION]
+
+
+def exposition():
+    """Every histogram in the Prometheus text format"""
+    return '\n'.join(line for histogram in HISTOGRAMS for line in histogram.expose()) + '\n'
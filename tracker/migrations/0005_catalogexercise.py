@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_bmirecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='catalog',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='logged_exercises', to='tracker.catalogexercise'),
+        ),
+        migrations.AddField(
+            model_name='planexercise',
+            name='catalog',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='plan_exercises', to='tracker.catalogexercise'),
+        ),
+    ]
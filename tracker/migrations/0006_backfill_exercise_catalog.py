@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def normalize(name):
+    # Kept in sync with tracker.models.normalize_exercise_name
+    return ' '.join(name.split()).casefold()
+
+
+def backfill_catalog(apps, schema_editor):
+    CatalogExercise = apps.get_model('tracker', 'CatalogExercise')
+    Exercise = apps.get_model('tracker', 'Exercise')
+    PlanExercise = apps.get_model('tracker', 'PlanExercise')
+
+    # Group every distinct spelling under its normalized name; the most
+    # common spelling becomes the catalog's display name
+    spellings = {}
+    for model in (Exercise, PlanExercise):
+        for row in model.objects.values('name').annotate(uses=models.Count('id')):
+            variants = spellings.setdefault(normalize(row['name']), {})
+            variants[row['name']] = variants.get(row['name'], 0) + row['uses']
+
+    for key, variants in spellings.items():
+        display = ' '.join(max(variants, key=lambda name: (variants[name], name)).split())
+        entry = CatalogExercise.objects.create(name=display, normalized_name=key)
+        for model in (Exercise, PlanExercise):
+            model.objects.filter(name__in=list(variants)).update(catalog=entry)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_catalogexercise'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+    ]
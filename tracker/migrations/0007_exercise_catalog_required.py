@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_backfill_exercise_catalog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exercise',
+            name='catalog',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='logged_exercises', to='tracker.catalogexercise'),
+        ),
+        migrations.AlterField(
+            model_name='planexercise',
+            name='catalog',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='plan_exercises', to='tracker.catalogexercise'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['workout', 'catalog'], name='tracker_exe_workout_6491d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['catalog', 'workout'], name='tracker_exe_catalog_f2c30f_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_same_day_workouts(apps, schema_editor):
+    """Fold duplicate workouts on the same day into the earliest one"""
+    Workout = apps.get_model('tracker', 'Workout')
+    Exercise = apps.get_model('tracker', 'Exercise')
+
+    duplicates = (
+        Workout.objects.values('user_id', 'date')
+        .annotate(workouts=Count('id'), keep=Min('id'))
+        .filter(workouts__gt=1)
+    )
+    for group in duplicates:
+        extra = Workout.objects.filter(user_id=group['user_id'], date=group['date']).exclude(id=group['keep'])
+        Exercise.objects.filter(workout__in=extra).update(workout_id=group['keep'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_exercise_catalog_required'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_same_day_workouts, migrations.RunPython.noop),
+    ]
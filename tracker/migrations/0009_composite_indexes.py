@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_merge_same_day_workouts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Add the composite indexes first, then drop the single-column
+        # foreign key indexes they make redundant
+        migrations.AddConstraint(
+            model_name='workout',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_workout_per_user_per_day'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciseset',
+            index=models.Index(fields=['exercise', 'set_number'], name='tracker_exe_exercis_e93368_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['user', '-created_at'], name='tracker_goa_user_id_f6e589_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bmirecord',
+            index=models.Index(fields=['user', '-created_at'], name='tracker_bmi_user_id_fc4c06_idx'),
+        ),
+        migrations.AlterField(
+            model_name='workout',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='exercise',
+            name='workout',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='exercises', to='tracker.workout'),
+        ),
+        migrations.AlterField(
+            model_name='exerciseset',
+            name='exercise',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sets', to='tracker.exercise'),
+        ),
+        migrations.AlterField(
+            model_name='goal',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='bmirecord',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracker', '0009_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('lifetime_volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_sessions', models.PositiveIntegerField(default=0)),
+                ('week_start', models.DateField(blank=True, null=True)),
+                ('week_sessions', models.PositiveIntegerField(default=0)),
+                ('last_workout_date', models.DateField(blank=True, null=True)),
+                ('streak', models.PositiveIntegerField(default=0)),
+                ('latest_bmi', models.DecimalField(blank=True, decimal_places=1, max_digits=4, null=True)),
+                ('latest_bmi_at', models.DateTimeField(blank=True, null=True)),
+                ('active_goals', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
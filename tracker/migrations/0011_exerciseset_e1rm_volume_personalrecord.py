@@ -0,0 +1,69 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:24
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_dashboardsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('weight', 'Heaviest weight'), ('e1rm', 'Best estimated 1RM'), ('volume', 'Best set volume')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('reps', models.PositiveIntegerField()),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('achieved_on', models.DateField()),
+            ],
+            options={
+                'ordering': ['kind', 'rank'],
+            },
+        ),
+        migrations.AddField(
+            model_name='exerciseset',
+            name='e1rm',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(reps__lte=1, then=models.F('weight')), default=models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(models.F('weight'), '*', django.db.models.expressions.CombinedExpression(models.Value(1.0), '+', django.db.models.expressions.CombinedExpression(models.F('reps'), '/', models.Value(30.0)))), output_field=models.DecimalField(decimal_places=2, max_digits=8))), output_field=models.DecimalField(decimal_places=2, max_digits=8)),
+        ),
+        migrations.AddField(
+            model_name='exerciseset',
+            name='volume',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('reps'), '*', models.F('weight')), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddIndex(
+            model_name='exerciseset',
+            index=models.Index(fields=['exercise', '-e1rm'], name='tracker_exe_exercis_940c71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciseset',
+            index=models.Index(fields=['exercise', '-volume'], name='tracker_exe_exercis_f367c5_idx'),
+        ),
+        migrations.AddField(
+            model_name='personalrecord',
+            name='catalog',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='tracker.catalogexercise'),
+        ),
+        migrations.AddField(
+            model_name='personalrecord',
+            name='exercise_set',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.exerciseset'),
+        ),
+        migrations.AddField(
+            model_name='personalrecord',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='personalrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'catalog', 'kind', 'rank'), name='unique_personal_record_rank'),
+        ),
+    ]
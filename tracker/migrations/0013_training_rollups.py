@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_workout_date_default_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('sets', models.PositiveIntegerField()),
+                ('reps', models.PositiveIntegerField()),
+                ('tonnage', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('max_weight', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('catalog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.catalogexercise')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('user', 'catalog', 'period_start'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('sets', models.PositiveIntegerField()),
+                ('reps', models.PositiveIntegerField()),
+                ('tonnage', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('max_weight', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('catalog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.catalogexercise')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('user', 'catalog', 'period_start'), name='unique_weekly_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='exercise',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='goals', to='tracker.catalogexercise'),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='period',
+            field=models.CharField(choices=[('week', 'Per week'), ('month', 'Per month')], default='week', max_length=10),
+        ),
+    ]
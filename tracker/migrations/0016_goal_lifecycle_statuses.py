@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_goal_sources'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='goal',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('paused', 'Paused'), ('overdue', 'Overdue'), ('stalled', 'Stalled')], default='active', max_length=20),
+        ),
+    ]
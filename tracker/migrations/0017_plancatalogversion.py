@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0016_goal_lifecycle_statuses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanCatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField()),
+            ],
+        ),
+    ]
@@ -1,33 +1,111 @@
+import datetime
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+def normalize_exercise_name(name):
+    """Catalog key for an exercise name: "Bench  Press " and "bench press" are the same lift"""
+    return ' '.join(name.split()).casefold()
+
+class CatalogExerciseManager(models.Manager):
+    def resolve(self, names):
+        """Map each name to its catalog entry, creating any that are missing"""
+        keys = {name: normalize_exercise_name(name) for name in names}
+        found = {entry.normalized_name: entry for entry in self.filter(normalized_name__in=set(keys.values()))}
+        
+        missing = {}
+        for name, key in keys.items():
+            if key not in found:
+                missing.setdefault(key, ' '.join(name.split()))
+        if missing:
+            self.bulk_create(
+                [self.model(name=name, normalized_name=key) for key, name in missing.items()],
+                ignore_conflicts=True
+            )
+            found.update((entry.normalized_name, entry) for entry in self.filter(normalized_name__in=missing))
+        
+        return {name: found[key] for name, key in keys.items()}
+
+class CatalogExercise(models.Model):
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+    
+    objects = CatalogExerciseManager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
 
 class Workout(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # A default rather than auto_now_add, so imported history keeps its original dates
+    date = models.DateField(default=timezone.localdate, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-date']
+        constraints = [
+            # One workout per user per day; its index also serves history and date-range lookups
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_workout_per_user_per_day'),
+        ]
     
     def __str__(self):
         return f"Workout - {self.date}"
 
 class Exercise(models.Model):
-    workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='exercises')
+    workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='exercises', db_index=False)
+    catalog = models.ForeignKey(CatalogExercise, on_delete=models.PROTECT, related_name='logged_exercises', db_index=False)
     name = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # The user's exercise list and per-exercise history
+            models.Index(fields=['workout', 'catalog']),
+            models.Index(fields=['catalog', 'workout']),
+        ]
+    
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        if self.catalog_id is None:
+            self.catalog = CatalogExercise.objects.resolve([self.name])[self.name]
+        super().save(*args, **kwargs)
 
 class ExerciseSet(models.Model):
-    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='sets')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='sets', db_index=False)
     set_number = models.PositiveIntegerField()
     reps = models.PositiveIntegerField()
     weight = models.DecimalField(max_digits=6, decimal_places=2)
+    # Epley estimate; a single rep is its own one-rep max
+    e1rm = models.GeneratedField(
+        expression=models.Case(
+            models.When(reps__lte=1, then=models.F('weight')),
+            default=models.ExpressionWrapper(
+                models.F('weight') * (models.Value(1.0) + models.F('reps') / models.Value(30.0)),
+                output_field=models.DecimalField(max_digits=8, decimal_places=2),
+            ),
+        ),
+        output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        db_persist=True,
+    )
+    volume = models.GeneratedField(
+        expression=models.F('reps') * models.F('weight'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     
     class Meta:
         ordering = ['set_number']
+        indexes = [
+            models.Index(fields=['exercise', 'set_number']),
+            models.Index(fields=['exercise', '-e1rm']),
+            models.Index(fields=['exercise', '-volume']),
+        ]
     
     def __str__(self):
         return f"Set {self.set_number}: {self.reps} reps × {self.weight}kg"
@@ -54,6 +132,7 @@ class PlanDay(models.Model):
 
 class PlanExercise(models.Model):
     day = models.ForeignKey(PlanDay, on_delete=models.CASCADE, related_name='exercises')
+    catalog = models.ForeignKey(CatalogExercise, on_delete=models.PROTECT, related_name='plan_exercises')
     name = models.CharField(max_length=200)
     order = models.PositiveIntegerField(default=1)
     
@@ -63,6 +142,11 @@ class PlanExercise(models.Model):
     def __str__(self):
         return f"{self.day.name} - {self.name}"
     
+    def save(self, *args, **kwargs):
+        if self.catalog_id is None:
+            self.catalog = CatalogExercise.objects.resolve([self.name])[self.name]
+        super().save(*args, **kwargs)
+    
 class Goal(models.Model):
     GOAL_TYPES = [
         ('strength', 'Strength Goal'),
@@ -76,9 +160,18 @@ class Goal(models.Model):
         ('active', 'Active'),
         ('completed', 'Completed'),
         ('paused', 'Paused'),
+        ('overdue', 'Overdue'),
+        ('stalled', 'Stalled'),
+    ]
+    # Still being worked on: counted as active on the dashboard and kept up to date by tracker.goals
+    OPEN_STATUSES = ('active', 'stalled')
+    
+    PERIODS = [
+        ('week', 'Per week'),
+        ('month', 'Per month'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     goal_type = models.CharField(max_length=20, choices=GOAL_TYPES, default='custom')
@@ -86,12 +179,18 @@ class Goal(models.Model):
     current_value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     unit = models.CharField(max_length=50, default='kg')  # kg, km, times, etc.
     deadline = models.DateField(null=True, blank=True)
+    # Data sources for tracker.goals: the lift of a strength goal, the window of a frequency goal
+    exercise = models.ForeignKey(CatalogExercise, on_delete=models.SET_NULL, null=True, blank=True, related_name='goals')
+    period = models.CharField(max_length=10, choices=PERIODS, default='week')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
     
     def __str__(self):
         return self.title
@@ -103,10 +202,15 @@ class Goal(models.Model):
             return min(percentage, 100)  # Cap at 100%
         return 0
     
+    @property
+    def is_tracked(self):
+        """Whether tracker.goals keeps current_value up to date from the logged data"""
+        return self.goal_type in ('frequency', 'bodyweight') or (self.goal_type == 'strength' and self.exercise_id is not None)
+    
 # Add this to your existing models.py file
 
 class BMIRecord(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     weight = models.DecimalField(max_digits=5, decimal_places=2)
     height = models.DecimalField(max_digits=5, decimal_places=2)
     bmi = models.DecimalField(max_digits=4, decimal_places=1)
@@ -114,6 +218,9 @@ class BMIRecord(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - BMI: {self.bmi}"
@@ -127,4 +234,143 @@ class BMIRecord(models.Model):
         elif 25 <= self.bmi < 30:
             return "Overweight"
         else:
-            return "Obese"
\ No newline at end of file
+            return "Obese"
+
+
+class PersonalRecord(models.Model):
+    """One entry of a user's top-k list for an exercise, maintained by tracker.records"""
+    KINDS = [
+        ('weight', 'Heaviest weight'),
+        ('e1rm', 'Best estimated 1RM'),
+        ('volume', 'Best set volume'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    catalog = models.ForeignKey(CatalogExercise, on_delete=models.CASCADE, related_name='personal_records')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    rank = models.PositiveSmallIntegerField()
+    value = models.DecimalField(max_digits=10, decimal_places=2)
+    exercise_set = models.ForeignKey(ExerciseSet, on_delete=models.CASCADE, related_name='+')
+    reps = models.PositiveIntegerField()
+    weight = models.DecimalField(max_digits=6, decimal_places=2)
+    achieved_on = models.DateField()
+    
+    class Meta:
+        ordering = ['kind', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'catalog', 'kind', 'rank'], name='unique_personal_record_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.catalog.name} {self.get_kind_display()} #{self.rank}: {self.value}"
+
+class TrainingRollup(models.Model):
+    """Per-period totals of one exercise for a user, maintained by tracker.rollups"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    catalog = models.ForeignKey(CatalogExercise, on_delete=models.CASCADE, related_name='+')
+    period_start = models.DateField()
+    sets = models.PositiveIntegerField()
+    reps = models.PositiveIntegerField()
+    tonnage = models.DecimalField(max_digits=16, decimal_places=2)
+    max_weight = models.DecimalField(max_digits=6, decimal_places=2)
+    
+    class Meta:
+        abstract = True
+        ordering = ['period_start']
+
+class WeeklyRollup(TrainingRollup):
+    """Keyed by the Monday that starts the ISO week"""
+    
+    class Meta(TrainingRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'catalog', 'period_start'], name='unique_weekly_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.catalog.name} week of {self.period_start}"
+
+class MonthlyRollup(TrainingRollup):
+    """Keyed by the first day of the month"""
+    
+    class Meta(TrainingRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'catalog', 'period_start'], name='unique_monthly_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.catalog.name} {self.period_start:%B %Y}"
+
+class DashboardSummary(models.Model):
+    """Running per-user totals for the dashboard, kept current by tracker.summary"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard_summary')
+    lifetime_volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_sessions = models.PositiveIntegerField(default=0)
+    week_start = models.DateField(null=True, blank=True)
+    week_sessions = models.PositiveIntegerField(default=0)
+    last_workout_date = models.DateField(null=True, blank=True)
+    streak = models.PositiveIntegerField(default=0)  # consecutive days ending at last_workout_date
+    latest_bmi = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
+    latest_bmi_at = models.DateTimeField(null=True, blank=True)
+    active_goals = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - Dashboard summary"
+    
+    @property
+    def sessions_this_week(self):
+        today = timezone.now().date()
+        if self.week_start == today - datetime.timedelta(days=today.weekday()):
+            return self.week_sessions
+        return 0
+    
+    @property
+    def current_streak(self):
+        # A streak survives until the end of the day after the last workout
+        if self.last_workout_date and (timezone.now().date() - self.last_workout_date).days <= 1:
+            return self.streak
+        return 0
+
+class DataVersion(models.Model):
+    """Counter bumped in the same transaction as every write to a user's tracker data"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='data_version')
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.user.username} - data version {self.version}"
+
+class PlanCatalogVersion(models.Model):
+    """Single-row counter bumped in the same transaction as every change to the workout plans"""
+    version = models.PositiveBigIntegerField()
+    
+    def __str__(self):
+        return f"Plan catalog version {self.version}"
+
+class ImportJob(models.Model):
+    """Checkpoint of a bulk history import, advanced in the same transaction as each batch"""
+    STATUSES = [
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+        ('done', 'Done'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs', db_index=False)
+    source = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of the uploaded file
+    status = models.CharField(max_length=10, choices=STATUSES, default='running')
+    rows_imported = models.PositiveIntegerField(default=0)
+    sets_created = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Re-importing the same file resumes its job instead of duplicating the sets
+            models.UniqueConstraint(fields=['user', 'fingerprint'], name='unique_import_per_user_file'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.source} ({self.status}, {self.rows_imported} rows)"
@@ -0,0 +1,204 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import CatalogExercise, PlanCatalogVersion, WorkoutPlan, PlanDay, PlanExercise
+
+DAYS_OF_WEEK = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Plans edited outside the plan views (admin, shell) show up after this at the latest
+PLAN_CATALOG_TIMEOUT = 60 * 60
+
+
+def _version_row():
+    return PlanCatalogVersion.objects.filter(pk=1).values_list('version', flat=True)
+
+
+def _fresh_version():
+    # A never-before-used version, so a recreated row can't resurrect a
+    # catalog another database left in the cache
+    return {'version': time.time_ns()}
+
+
+def plan_catalog_version(request=None):
+    """The catalog version from the database, so every process sees a change as soon as it commits.
+
+    With a ``request`` it is looked up once per request, so the ETag and the
+    page are built from the same version.
+    """
+    if request is not None and hasattr(request, '_tracker_plan_catalog_version'):
+        return request._tracker_plan_catalog_version
+    version = _version_row().first()
+    if version is None:
+        version = PlanCatalogVersion.objects.get_or_create(pk=1, defaults=_fresh_version())[0].version
+    if request is not None:
+        request._tracker_plan_catalog_version = version
+    return version
+
+
+async def aplan_catalog_version(request=None):
+    """Async version of plan_catalog_version"""
+    if request is not None and hasattr(request, '_tracker_plan_catalog_version'):
+        return request._tracker_plan_catalog_version
+    version = await _version_row().afirst()
+    if version is None:
+        version = (await PlanCatalogVersion.objects.aget_or_create(pk=1, defaults=_fresh_version()))[0].version
+    if request is not None:
+        request._tracker_plan_catalog_version = version
+    return version
+
+
+def _catalog_queryset():
+    return WorkoutPlan.objects.order_by('id').prefetch_related('days__exercises')
+
+
+def plan_catalog(version=None):
+    """Every workout plan with its days and exercises already loaded.
+
+    The tree is built with two prefetch queries and cached under ``version``
+    (the current catalog version by default), so warm requests don't touch
+    the plan tables at all.
+    """
+    if version is None:
+        version = plan_catalog_version()
+    key = f'tracker:plan-catalog:{version}'
+    plans = cache.get(key)
+    if plans is None:
+        plans = list(_catalog_queryset())
+        cache.set(key, plans, PLAN_CATALOG_TIMEOUT)
+    return plans
+
+
+async def aplan_catalog(version=None):
+    """Async version of plan_catalog"""
+    if version is None:
+        version = await aplan_catalog_version()
+    key = f'tracker:plan-catalog:{version}'
+    plans = await cache.aget(key)
+    if plans is None:
+        plans = [plan async for plan in _catalog_queryset()]
+        await cache.aset(key, plans, PLAN_CATALOG_TIMEOUT)
+    return plans
+
+
+def invalidate_plan_catalog():
+    """Bump the catalog version in the current transaction, so the change and the new version commit together"""
+    if not PlanCatalogVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        PlanCatalogVersion.objects.get_or_create(pk=1, defaults=_fresh_version())
+
+
+def submitted_plan_days(post):
+    """The training days posted by the create/update plan forms.
+
+    Returns ``(weekday, day_name, [exercise names])`` in weekday order,
+    skipping rest days and days without a name.
+    """
+    days = []
+    for weekday in DAYS_OF_WEEK:
+        is_rest_day = post.get(f'{weekday}_rest') == 'on'
+        day_name = post.get(f'{weekday}_name', '').strip()
+
+        if not is_rest_day and day_name:
+            exercise_names = [name.strip() for name in post.getlist(f'{weekday}_exercises[]')]
+            days.append((weekday, day_name, [name for name in exercise_names if name]))
+    return days
+
+
+def _weekday_of(day_name):
+    # Same convention as the update form, e.g. "Monday: Push Day" -> "monday"
+    return day_name.split(':')[0].strip().lower()
+
+
+def _match_exercises(existing, names):
+    """Pair submitted exercise names with existing rows.
+
+    Same-name rows are kept first; whatever is left on both sides is paired
+    up in order and renamed, so a renamed exercise keeps its primary key.
+    Returns ``(pairs, leftover rows)`` where a pair's row is None for a new
+    exercise.
+    """
+    unused = list(existing)
+    pairs = [None] * len(names)
+    for i, name in enumerate(names):
+        for row in unused:
+            if row.name == name:
+                pairs[i] = row
+                unused.remove(row)
+                break
+
+    leftovers = iter(list(unused))
+    for i, row in enumerate(pairs):
+        if row is None:
+            row = next(leftovers, None)
+            if row is not None:
+                unused.remove(row)
+                pairs[i] = row
+    return list(zip(pairs, names)), unused
+
+
+@transaction.atomic
+def update_plan_tree(plan, days):
+    """Bring ``plan``'s days and exercises in line with ``days``.
+
+    Only rows that actually changed are written, using bulk statements in a
+    single transaction. Unchanged days and exercises keep their primary keys,
+    so links such as ``start_workout/<day_id>`` stay valid. Returns whether
+    anything was written.
+    """
+    existing_days = list(plan.days.prefetch_related('exercises'))
+    catalog = CatalogExercise.objects.resolve(
+        [name for weekday, day_name, exercise_names in days for name in exercise_names]
+    )
+    by_weekday = {}
+    for day in existing_days:
+        by_weekday.setdefault(_weekday_of(day.name), day)
+
+    kept_days, new_days = [], []
+    for order, (weekday, day_name, exercise_names) in enumerate(days, 1):
+        day = by_weekday.pop(weekday, None)
+        if day is None:
+            day = next((d for d in by_weekday.values() if d.name == day_name), None)
+            if day is not None:
+                by_weekday.pop(_weekday_of(day.name))
+        if day is None:
+            new_days.append((PlanDay(plan=plan, name=day_name, order=order), exercise_names))
+        else:
+            kept_days.append((day, day_name, order, exercise_names))
+    kept_ids = {day.id for day, *rest in kept_days}
+    removed_days = [day.id for day in existing_days if day.id not in kept_ids]
+
+    changed_days, changed_exercises, new_exercises, removed_exercises = [], [], [], []
+    for day, day_name, order, exercise_names in kept_days:
+        if (day.name, day.order) != (day_name, order):
+            day.name, day.order = day_name, order
+            changed_days.append(day)
+
+        pairs, unused = _match_exercises(day.exercises.all(), exercise_names)
+        for exercise_order, (exercise, name) in enumerate(pairs, 1):
+            if exercise is None:
+                new_exercises.append(PlanExercise(day=day, catalog=catalog[name], name=name, order=exercise_order))
+            elif (exercise.name, exercise.order) != (name, exercise_order):
+                exercise.name, exercise.order, exercise.catalog = name, exercise_order, catalog[name]
+                changed_exercises.append(exercise)
+        removed_exercises.extend(exercise.id for exercise in unused)
+
+    if removed_exercises:
+        PlanExercise.objects.filter(id__in=removed_exercises).delete()
+    if removed_days:
+        PlanDay.objects.filter(id__in=removed_days).delete()
+    if changed_days:
+        PlanDay.objects.bulk_update(changed_days, ['name', 'order'])
+    if changed_exercises:
+        PlanExercise.objects.bulk_update(changed_exercises, ['name', 'order', 'catalog'])
+    if new_days:
+        PlanDay.objects.bulk_create([day for day, names in new_days])
+        new_exercises.extend(
+            PlanExercise(day=day, catalog=catalog[name], name=name, order=exercise_order)
+            for day, names in new_days
+            for exercise_order, name in enumerate(names, 1)
+        )
+    if new_exercises:
+        PlanExercise.objects.bulk_create(new_exercises)
+    return bool(removed_exercises or removed_days or changed_days or changed_exercises or new_days or new_exercises)
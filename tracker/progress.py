@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+
+from .models import CatalogExercise, Exercise, ExerciseSet, normalize_exercise_name
+
+
+def _exercise_names(user):
+    return (
+        CatalogExercise.objects
+        .filter(id__in=Exercise.objects.filter(workout__user=user).values('catalog_id'))
+        .values_list('name', flat=True)
+    )
+
+
+def user_exercise_names(user):
+    """Catalog names of every exercise the user has logged"""
+    return list(_exercise_names(user))
+
+
+async def auser_exercise_names(user):
+    return [name async for name in _exercise_names(user)]
+
+
+def _progress_keys(exercise_names):
+    return list(dict.fromkeys(normalize_exercise_name(name) for name in exercise_names if name))
+
+
+def _progress_rows(user, keys, start=None, end=None):
+    window = {}
+    if start:
+        window['exercise__workout__date__gte'] = start
+    if end:
+        window['exercise__workout__date__lte'] = end
+    return (
+        ExerciseSet.objects
+        .filter(exercise__workout__user=user, exercise__catalog__normalized_name__in=keys, **window)
+        .values('exercise__catalog__normalized_name', 'exercise__catalog__name', 'exercise__workout__date', 'weight')
+        .annotate(
+            best_reps=Max('reps'),
+            volume=Sum(ExpressionWrapper(
+                F('reps') * F('weight'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )),
+        )
+        .order_by('exercise__catalog__normalized_name', 'exercise__workout__date', 'weight')
+    )
+
+
+def _fold_progress(rows, keys):
+    names, points = {}, defaultdict(dict)
+    for row in rows:
+        key = row['exercise__catalog__normalized_name']
+        names[key] = row['exercise__catalog__name']
+        series = points[key]
+        date = row['exercise__workout__date']
+        point = series.get(date)
+        if point is None:
+            point = series[date] = {'max_weight': 0, 'volume': 0, 'best_reps': 0}
+        # Rows arrive in ascending weight order, so the last one per date is the top set
+        point['max_weight'] = row['weight']
+        point['best_reps'] = row['best_reps']
+        point['volume'] += row['volume'] or 0
+
+    return {
+        names[key]: [
+            {
+                'date': date.strftime('%Y-%m-%d'),
+                'weight': float(point['max_weight']),
+                'volume': float(point['volume']),
+                'reps': point['best_reps'],
+            }
+            for date, point in sorted(points[key].items())
+        ]
+        for key in keys
+        if key in points
+    }
+
+
+def exercise_progress(user, exercise_names, start=None, end=None):
+    """Per-date max weight, total volume and best-set reps for each exercise, optionally within [start, end].
+
+    Names are matched through the exercise catalog, so spelling variants of
+    the same lift share one series keyed by the catalog name. Everything
+    comes from one grouped query over (exercise, date, weight); the rows are
+    then folded per date, so the number of queries does not depend on how
+    many sessions the user has logged.
+    """
+    keys = _progress_keys(exercise_names)
+    if not keys:
+        return {}
+    return _fold_progress(_progress_rows(user, keys, start, end), keys)
+
+
+async def aexercise_progress(user, exercise_names, start=None, end=None):
+    """Async version of exercise_progress"""
+    keys = _progress_keys(exercise_names)
+    if not keys:
+        return {}
+    return _fold_progress([row async for row in _progress_rows(user, keys, start, end)], keys)
@@ -0,0 +1,165 @@
+"""Top-k personal records per user and exercise.
+
+Each (user, exercise, kind) keeps its PR_TOP_K best sessions, ranked by the
+best set of that session for the kind: heaviest weight, best estimated 1RM
+(the generated ExerciseSet.e1rm column) or best set volume (ExerciseSet.volume).
+New sets are merged into the stored lists as they are logged, so reading a
+user's records is an index lookup on PersonalRecord rather than a scan of
+their history.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import ExerciseSet, PersonalRecord, normalize_exercise_name
+
+PR_TOP_K = 5
+RECORD_KINDS = [kind for kind, label in PersonalRecord.KINDS]
+
+_SET_FIELDS = {
+    'id': 'id',
+    'workout_id': 'exercise__workout_id',
+    'catalog_id': 'exercise__catalog_id',
+    'date': 'exercise__workout__date',
+    'reps': 'reps',
+    'weight': 'weight',
+    'e1rm': 'e1rm',
+    'volume': 'volume',
+}
+
+
+def _iter_sets(queryset):
+    rows = queryset.values(*_SET_FIELDS.values()).iterator(chunk_size=2000)
+    for row in rows:
+        yield {key: row[column] for key, column in _SET_FIELDS.items()}
+
+
+def _entry(row, kind):
+    return {
+        'value': row[kind],
+        'exercise_set_id': row['id'],
+        'workout_id': row['workout_id'],
+        'reps': row['reps'],
+        'weight': row['weight'],
+        'achieved_on': row['date'],
+    }
+
+
+def _offer(best, entry):
+    """Keep ``entry`` if it beats the best so far for its workout (earliest set wins ties)"""
+    current = best.get(entry['workout_id'])
+    if current is None or (entry['value'], -entry['exercise_set_id']) > (current['value'], -current['exercise_set_id']):
+        best[entry['workout_id']] = entry
+
+
+def _ranked(best):
+    return sorted(best.values(), key=lambda e: (-e['value'], e['exercise_set_id']))[:PR_TOP_K]
+
+
+def _store(user_id, lists):
+    """Insert ranked rows for the given ``{(catalog_id, kind): entries}``"""
+    PersonalRecord.objects.bulk_create([
+        PersonalRecord(
+            user_id=user_id,
+            catalog_id=catalog_id,
+            kind=kind,
+            rank=rank,
+            value=entry['value'],
+            exercise_set_id=entry['exercise_set_id'],
+            reps=entry['reps'],
+            weight=entry['weight'],
+            achieved_on=entry['achieved_on'],
+        )
+        for (catalog_id, kind), entries in lists.items()
+        for rank, entry in enumerate(entries, 1)
+    ])
+
+
+def record_sets(user_id, set_ids):
+    """Merge newly logged sets into the user's top-k lists"""
+    new_sets = list(_iter_sets(ExerciseSet.objects.filter(id__in=set_ids)))
+    if not new_sets:
+        return
+    catalog_ids = {row['catalog_id'] for row in new_sets}
+
+    current = defaultdict(list)
+    stored = PersonalRecord.objects.filter(
+        user_id=user_id, catalog_id__in=catalog_ids
+    ).select_related('exercise_set__exercise').order_by('rank')
+    for record in stored:
+        current[record.catalog_id, record.kind].append({
+            'value': record.value,
+            'exercise_set_id': record.exercise_set_id,
+            'workout_id': record.exercise_set.exercise.workout_id,
+            'reps': record.reps,
+            'weight': record.weight,
+            'achieved_on': record.achieved_on,
+        })
+
+    changed = {}
+    for catalog_id in catalog_ids:
+        candidates = [row for row in new_sets if row['catalog_id'] == catalog_id]
+        for kind in RECORD_KINDS:
+            best = {}
+            for entry in current[catalog_id, kind] + [_entry(row, kind) for row in candidates]:
+                _offer(best, entry)
+            new = _ranked(best)
+            if [e['exercise_set_id'] for e in new] != [e['exercise_set_id'] for e in current[catalog_id, kind]]:
+                changed[catalog_id, kind] = new
+
+    if changed:
+        stale = Q()
+        for catalog_id, kind in changed:
+            stale |= Q(catalog_id=catalog_id, kind=kind)
+        with transaction.atomic():
+            PersonalRecord.objects.filter(stale, user_id=user_id).delete()
+            _store(user_id, changed)
+
+
+def rebuild_records(user_id, catalog_ids=None):
+    """Recompute top-k lists from the user's full history.
+
+    Used after sets are deleted (a list may then have fewer than k entries)
+    and by the rebuild_personal_records command. ``catalog_ids`` limits the
+    work to the given exercises.
+    """
+    sets = ExerciseSet.objects.filter(exercise__workout__user_id=user_id)
+    existing = PersonalRecord.objects.filter(user_id=user_id)
+    if catalog_ids is not None:
+        sets = sets.filter(exercise__catalog_id__in=catalog_ids)
+        existing = existing.filter(catalog_id__in=catalog_ids)
+
+    # Only the best set per workout is held in memory, never the full history
+    best = defaultdict(dict)
+    for row in _iter_sets(sets):
+        for kind in RECORD_KINDS:
+            _offer(best[row['catalog_id'], kind], _entry(row, kind))
+
+    with transaction.atomic():
+        existing.delete()
+        _store(user_id, {key: _ranked(by_workout) for key, by_workout in best.items()})
+
+
+def _records_queryset(user, exercise_names):
+    keys = [normalize_exercise_name(name) for name in exercise_names if name]
+    return PersonalRecord.objects.filter(
+        user=user, catalog__normalized_name__in=keys
+    ).select_related('catalog').order_by('catalog__name', 'kind', 'rank')
+
+
+def _group_records(stored):
+    records = defaultdict(lambda: defaultdict(list))
+    for record in stored:
+        records[record.catalog.name][record.kind].append(record)
+    return {name: dict(kinds) for name, kinds in records.items()}
+
+
+def personal_records(user, exercise_names):
+    """``{catalog name: {kind: [PersonalRecord, ...]}}`` for the given exercises"""
+    return _group_records(_records_queryset(user, exercise_names))
+
+
+async def apersonal_records(user, exercise_names):
+    """Async version of personal_records"""
+    return _group_records([record async for record in _records_queryset(user, exercise_names)])
@@ -0,0 +1,132 @@
+"""Weekly and monthly rollups of logged sets.
+
+WeeklyRollup and MonthlyRollup hold set count, rep count, tonnage and max
+weight per (user, exercise, period), so long-range charts read one row per
+period instead of every set. Writes call ``refresh_rollups`` with the
+(catalog id, date) pairs they touched; it recomputes the periods around
+those dates from ExerciseSet with one grouped query per granularity, which
+also handles deletes (a max weight cannot be decremented). ``rebuild_rollups``
+backs the backfill_rollups command.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import ExerciseSet, MonthlyRollup, WeeklyRollup, normalize_exercise_name
+from .summary import week_start
+
+ROLLUP_PERIODS = ('week', 'month')
+
+
+def month_start(date):
+    return date.replace(day=1)
+
+
+def _next_week(start):
+    return start + datetime.timedelta(days=7)
+
+
+def _next_month(start):
+    return (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+# model, SQL truncation, start of the period containing a date, start of the following period
+_ROLLUPS = {
+    'week': (WeeklyRollup, TruncWeek, week_start, _next_week),
+    'month': (MonthlyRollup, TruncMonth, month_start, _next_month),
+}
+
+
+def _aggregate(sets, trunc):
+    return (
+        sets.annotate(period=trunc('exercise__workout__date'))
+        .values('exercise__catalog_id', 'period')
+        .annotate(set_count=Count('id'), rep_count=Sum('reps'), total=Sum('volume'), heaviest=Max('weight'))
+        .order_by()
+    )
+
+
+def _store(model, user_id, rows):
+    model.objects.bulk_create([
+        model(
+            user_id=user_id,
+            catalog_id=row['exercise__catalog_id'],
+            period_start=row['period'],
+            sets=row['set_count'],
+            reps=row['rep_count'],
+            tonnage=row['total'],
+            max_weight=row['heaviest'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+@transaction.atomic
+def refresh_rollups(user_id, touched):
+    """Recompute the periods containing each ``(catalog_id, date)`` in ``touched``"""
+    touched = set(touched)
+    if not touched:
+        return
+    catalog_ids = {catalog_id for catalog_id, date in touched}
+    dates = [date for catalog_id, date in touched]
+
+    for model, trunc, start_of, next_start in _ROLLUPS.values():
+        first, end = start_of(min(dates)), next_start(start_of(max(dates)))
+        sets = ExerciseSet.objects.filter(
+            exercise__workout__user_id=user_id,
+            exercise__catalog_id__in=catalog_ids,
+            exercise__workout__date__gte=first,
+            exercise__workout__date__lt=end,
+        )
+        model.objects.filter(
+            user_id=user_id, catalog_id__in=catalog_ids, period_start__gte=first, period_start__lt=end
+        ).delete()
+        _store(model, user_id, _aggregate(sets, trunc))
+
+
+@transaction.atomic
+def rebuild_rollups(user_id):
+    """Recompute all of a user's rollups from their full history"""
+    sets = ExerciseSet.objects.filter(exercise__workout__user_id=user_id)
+    for model, trunc, start_of, next_start in _ROLLUPS.values():
+        model.objects.filter(user_id=user_id).delete()
+        _store(model, user_id, _aggregate(sets, trunc))
+
+
+def _series_rows(user, exercise_names, period):
+    keys = list(dict.fromkeys(normalize_exercise_name(name) for name in exercise_names if name))
+    rows = (
+        _ROLLUPS[period][0].objects
+        .filter(user=user, catalog__normalized_name__in=keys)
+        .values_list('catalog__normalized_name', 'catalog__name', 'period_start', 'max_weight', 'tonnage', 'reps', 'sets')
+        .order_by('catalog__normalized_name', 'period_start')
+    )
+    return keys, rows
+
+
+def _fold_series(keys, rows):
+    names, points = {}, defaultdict(list)
+    for key, name, start, max_weight, tonnage, reps, sets in rows:
+        names[key] = name
+        points[key].append({
+            'date': start.strftime('%Y-%m-%d'),
+            'weight': float(max_weight),
+            'volume': float(tonnage),
+            'reps': reps,
+            'sets': sets,
+        })
+    return {names[key]: points[key] for key in keys if key in points}
+
+
+def rollup_series(user, exercise_names, period):
+    """Per-period points for each exercise, in the shape exercise_progress returns"""
+    return _fold_series(*_series_rows(user, exercise_names, period))
+
+
+async def arollup_series(user, exercise_names, period):
+    """Async version of rollup_series"""
+    keys, rows = _series_rows(user, exercise_names, period)
+    return _fold_series(keys, [row async for row in rows])
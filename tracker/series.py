@@ -0,0 +1,112 @@
+"""Downsampled, delta-encoded chart series.
+
+A multi-year history has thousands of points per exercise, far more than
+a chart is wide. ``lttb`` reduces a series to a point budget with
+Largest-Triangle-Three-Buckets: the first and last points are kept, the
+rest are split into equal buckets, and each bucket keeps the point forming
+the largest triangle with the previous pick and the next bucket's average,
+so peaks and dips survive. ``encode_series`` then sends each series as
+day offsets and values in hundredths, both delta-encoded, so a steady
+history compresses to short runs of small integers. A client decodes a
+series by cumulative sums: ``day = origin + sum(x[:i + 1])`` and
+``value = sum(y[:i + 1]) / scale``.
+"""
+import datetime
+
+from django.utils import timezone
+
+from .models import BMIRecord
+
+CHART_POINTS = 500
+MAX_CHART_POINTS = 5000
+VALUE_SCALE = 100
+PROGRESS_METRICS = ('weight', 'volume', 'reps')
+# Metric -> the name its series is sent under
+BMI_METRICS = {'bmi': 'BMI', 'weight': 'Bodyweight'}
+
+
+def point_budget(value, default=CHART_POINTS):
+    """A ``points`` query parameter clamped to 3..MAX_CHART_POINTS"""
+    try:
+        budget = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(3, min(budget, MAX_CHART_POINTS))
+
+
+def _day(point):
+    return datetime.date.fromisoformat(point['date']).toordinal()
+
+
+def lttb(points, budget, metric):
+    """At most ``budget`` of ``points`` (dicts with 'date' and ``metric``), keeping the shape of the metric"""
+    count = len(points)
+    if count <= budget or budget < 3:
+        return list(points)
+    xs = [_day(point) for point in points]
+    ys = [float(point[metric]) for point in points]
+
+    picked, previous = [0], 0
+    every = (count - 2) / (budget - 2)
+    for bucket in range(budget - 2):
+        # The triangle's third corner is the average of the next bucket
+        start, end = int((bucket + 1) * every) + 1, min(int((bucket + 2) * every) + 1, count)
+        avg_x = sum(xs[start:end]) / (end - start)
+        avg_y = sum(ys[start:end]) / (end - start)
+
+        px, py = xs[previous], ys[previous]
+        best, best_area = None, -1.0
+        for i in range(int(bucket * every) + 1, start):
+            area = abs((px - avg_x) * (ys[i] - py) - (px - xs[i]) * (avg_y - py))
+            if area > best_area:
+                best, best_area = i, area
+        picked.append(best)
+        previous = best
+    picked.append(count - 1)
+    return [points[i] for i in picked]
+
+
+def downsample(series, budget, metric='weight'):
+    """``{name: points}`` with every series reduced to ``budget`` points"""
+    return {name: lttb(points, budget, metric) for name, points in series.items()}
+
+
+def _deltas(values):
+    previous, deltas = 0, []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def encode_series(series, metric, budget, origin=None):
+    """The JSON body for ``{name: points}``: downsampled, then delta-encoded per series"""
+    if origin is None:
+        firsts = [points[0]['date'] for points in series.values() if points]
+        origin = datetime.date.fromisoformat(min(firsts)) if firsts else timezone.localdate()
+    encoded = {}
+    for name, points in series.items():
+        sampled = lttb(points, budget, metric)
+        encoded[name] = {
+            'points': len(points),
+            'x': _deltas([_day(point) - origin.toordinal() for point in sampled]),
+            'y': _deltas([round(point[metric] * VALUE_SCALE) for point in sampled]),
+        }
+    return {'metric': metric, 'origin': origin.isoformat(), 'scale': VALUE_SCALE, 'series': encoded}
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def bmi_points(user, start=None, end=None):
+    """The user's BMI records in ``[start, end]``, oldest first, as chart points"""
+    records = BMIRecord.objects.filter(user=user)
+    if start:
+        records = records.filter(created_at__gte=_day_start(start))
+    if end:
+        records = records.filter(created_at__lt=_day_start(end + datetime.timedelta(days=1)))
+    return [
+        {'date': timezone.localdate(created_at).isoformat(), 'bmi': float(bmi), 'weight': float(weight)}
+        for created_at, bmi, weight in records.order_by('created_at').values_list('created_at', 'bmi', 'weight')
+    ]
@@ -0,0 +1,34 @@
+"""Prebuilt responses for the set-input fragments of the log form.
+
+There are only MAX_SETS possible fragments and none of them depends on the
+user, so each is rendered once from workouts/set_inputs.html, encoded as the
+JSON the form's script expects and given a strong ETag. The form requests
+them with a version derived from their content, which lets browsers and
+proxies keep them for a year.
+"""
+import functools
+import hashlib
+import json
+
+from django.template.loader import render_to_string
+
+MAX_SETS = 8
+SET_INPUTS_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@functools.cache
+def set_input_fragments():
+    """``{sets count: (JSON body, ETag)}`` for every valid count"""
+    fragments = {}
+    for count in range(1, MAX_SETS + 1):
+        html = render_to_string('workouts/set_inputs.html', {'sets': range(1, count + 1)})
+        body = json.dumps({'html': html}).encode('utf-8')
+        fragments[count] = body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return fragments
+
+
+@functools.cache
+def set_inputs_version():
+    """Changes whenever any fragment does; used to bust caches in the fragment URL"""
+    etags = ''.join(etag for body, etag in set_input_fragments().values())
+    return hashlib.sha256(etags.encode()).hexdigest()[:12]
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import goals, records, rollups, summary
+from .auth import forget_user, remember_user
+from .models import Workout, Exercise, ExerciseSet, Goal, BMIRecord
+from .versions import bump_data_version
+
+
+@receiver(post_save, sender=Workout)
+def workout_saved(sender, instance, created, **kwargs):
+    if created:
+        summary.record_workout(instance)
+        goals.refresh_frequency(instance.user_id)
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_saved(sender, instance, **kwargs):
+    bump_data_version(instance.workout.user_id)
+
+
+@receiver(post_save, sender=ExerciseSet)
+def exercise_set_saved(sender, instance, created, **kwargs):
+    exercise = instance.exercise
+    user_id = exercise.workout.user_id
+    if created:
+        summary.record_volume(user_id, instance.reps * Decimal(instance.weight))
+        records.record_sets(user_id, [instance.id])
+    else:
+        summary.refresh_volume(user_id)
+        records.rebuild_records(user_id, [exercise.catalog_id])
+    goals.refresh_strength(user_id, [exercise.catalog_id])
+    rollups.refresh_rollups(user_id, [(exercise.catalog_id, exercise.workout.date)])
+    bump_data_version(user_id)
+
+
+@receiver(post_save, sender=BMIRecord)
+def bmi_record_saved(sender, instance, created, **kwargs):
+    if created:
+        summary.record_bmi(instance)
+    else:
+        summary.refresh_latest_bmi(instance.user_id)
+    goals.refresh_bodyweight(instance.user_id)
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=Goal)
+def goal_saved(sender, instance, **kwargs):
+    if instance.is_tracked:
+        goals.refresh_goal(instance)
+    summary.refresh_active_goals(instance.user_id)
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    remember_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_receiver(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,144 @@
+"""Incremental maintenance of DashboardSummary rows.
+
+Single-row saves of workouts, sets, BMI records and goals are picked up by
+the receivers in tracker.signals. Bulk writes (which send no signals) and
+deletes call the functions here directly. ``rebuild_summary`` recomputes a
+row from scratch and backs the rebuild_dashboard_summaries command.
+"""
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+from django.utils import timezone
+
+from .models import DashboardSummary, Workout, ExerciseSet, Goal, BMIRecord
+
+SET_VOLUME = ExpressionWrapper(F('reps') * F('weight'), output_field=DecimalField(max_digits=16, decimal_places=2))
+
+
+def week_start(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def _streak_ending(user_id, last_date):
+    """Number of consecutive workout days ending at ``last_date``"""
+    streak, expected = 0, last_date
+    dates = Workout.objects.filter(user_id=user_id, date__lte=last_date).order_by('-date').values_list('date', flat=True)
+    for date in dates.iterator(chunk_size=100):
+        if date != expected:
+            break
+        streak += 1
+        expected -= datetime.timedelta(days=1)
+    return streak
+
+
+@transaction.atomic
+def rebuild_summary(user_id):
+    """Recompute a user's summary from their full history"""
+    workouts = Workout.objects.filter(user_id=user_id)
+    last_workout_date = workouts.aggregate(last=Max('date'))['last']
+    latest_bmi = BMIRecord.objects.filter(user_id=user_id).order_by('-created_at').first()
+
+    values = {
+        'lifetime_volume': ExerciseSet.objects.filter(
+            exercise__workout__user_id=user_id
+        ).aggregate(volume=Sum(SET_VOLUME))['volume'] or 0,
+        'total_sessions': workouts.count(),
+        'week_start': None,
+        'week_sessions': 0,
+        'last_workout_date': last_workout_date,
+        'streak': 0,
+        'latest_bmi': latest_bmi.bmi if latest_bmi else None,
+        'latest_bmi_at': latest_bmi.created_at if latest_bmi else None,
+        'active_goals': Goal.objects.filter(user_id=user_id, status__in=Goal.OPEN_STATUSES).count(),
+    }
+    if last_workout_date:
+        values['week_start'] = week_start(last_workout_date)
+        values['week_sessions'] = workouts.filter(date__gte=values['week_start']).count()
+        values['streak'] = _streak_ending(user_id, last_workout_date)
+
+    summary, created = DashboardSummary.objects.update_or_create(user_id=user_id, defaults=values)
+    return summary
+
+
+def get_summary(user_id):
+    """The user's summary, built on first use"""
+    return DashboardSummary.objects.filter(user_id=user_id).first() or rebuild_summary(user_id)
+
+
+async def aget_summary(user_id):
+    """Async version of get_summary"""
+    found = await DashboardSummary.objects.filter(user_id=user_id).afirst()
+    # Building the first summary is a one-off write, left to the sync code
+    return found or await sync_to_async(rebuild_summary)(user_id)
+
+
+def _update_or_rebuild(user_id, **changes):
+    changes['updated_at'] = timezone.now()
+    if not DashboardSummary.objects.filter(user_id=user_id).update(**changes):
+        rebuild_summary(user_id)
+
+
+@transaction.atomic
+def record_workout(workout):
+    """Count a newly created workout towards sessions, the week and the streak"""
+    summary = DashboardSummary.objects.select_for_update().filter(user_id=workout.user_id).first()
+    if summary is None:
+        rebuild_summary(workout.user_id)
+        return
+
+    date = workout.date
+    summary.total_sessions += 1
+
+    week = week_start(date)
+    if summary.week_start == week:
+        summary.week_sessions += 1
+    elif summary.week_start is None or week > summary.week_start:
+        summary.week_start, summary.week_sessions = week, 1
+
+    last = summary.last_workout_date
+    if last is None or date > last + datetime.timedelta(days=1):
+        summary.last_workout_date, summary.streak = date, 1
+    elif date == last + datetime.timedelta(days=1):
+        summary.last_workout_date, summary.streak = date, summary.streak + 1
+    elif date < last:
+        # A back-dated workout may close a gap inside the current streak
+        summary.streak = _streak_ending(workout.user_id, last)
+
+    summary.save()
+
+
+def record_volume(user_id, volume):
+    """Add (or with a negative ``volume``, remove) lifted volume"""
+    if volume:
+        _update_or_rebuild(user_id, lifetime_volume=F('lifetime_volume') + volume)
+
+
+def forget_exercise(exercise):
+    """Remove an exercise's volume; call before deleting it"""
+    volume = exercise.sets.aggregate(volume=Sum(SET_VOLUME))['volume']
+    record_volume(exercise.workout.user_id, -(volume or 0))
+
+
+def refresh_volume(user_id):
+    """Recompute lifetime volume after a set was edited in place"""
+    volume = ExerciseSet.objects.filter(exercise__workout__user_id=user_id).aggregate(volume=Sum(SET_VOLUME))['volume']
+    _update_or_rebuild(user_id, lifetime_volume=volume or 0)
+
+
+def record_bmi(record):
+    _update_or_rebuild(record.user_id, latest_bmi=record.bmi, latest_bmi_at=record.created_at)
+
+
+def refresh_latest_bmi(user_id):
+    latest = BMIRecord.objects.filter(user_id=user_id).order_by('-created_at').first()
+    _update_or_rebuild(
+        user_id,
+        latest_bmi=latest.bmi if latest else None,
+        latest_bmi_at=latest.created_at if latest else None,
+    )
+
+
+def refresh_active_goals(user_id):
+    _update_or_rebuild(user_id, active_goals=Goal.objects.filter(user_id=user_id, status__in=Goal.OPEN_STATUSES).count())
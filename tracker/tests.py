@@ -1,3 +1,1488 @@
-from django.test import TestCase
+import csv
+import datetime
+import difflib
+import gzip
+import io
+import json
+import re
+import threading
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CatalogExercise, Workout, Exercise, ExerciseSet, WorkoutPlan, PlanDay, PlanExercise, Goal, BMIRecord, DashboardSummary, PersonalRecord, ImportJob, WeeklyRollup, MonthlyRollup, DataVersion, PlanCatalogVersion
+from .progress import exercise_progress, user_exercise_names
+from .history import history_queryset, workout_page
+from .plans import DAYS_OF_WEEK, invalidate_plan_catalog, plan_catalog_version
+from .summary import rebuild_summary
+from .records import PR_TOP_K, personal_records, rebuild_records
+from .export import EXPORT_COLUMNS
+from .importer import ImportRowError, run_import, start_import
+from . import analytics
+from .rollups import rebuild_rollups
+from .set_inputs import MAX_SETS, set_inputs_version
+from .write_queue import WriteQueue, run_write
+from .auth import CachedUserBackend, forget_user, user_cache_key
+from . import benchmark, goals, metrics, series, urls
+
+
+def log_session(user, date, exercises):
+    """Create a workout on ``date`` with ``{name: [(reps, weight), ...]}``"""
+    workout = Workout.objects.create(user=user)
+    Workout.objects.filter(id=workout.id).update(date=date)
+    workout.date = date
+    for name, sets in exercises.items():
+        exercise = Exercise.objects.create(workout=workout, name=name)
+        for i, (reps, weight) in enumerate(sets, 1):
+            ExerciseSet.objects.create(exercise=exercise, set_number=i, reps=reps, weight=weight)
+    return workout
+
+
+class ProgressEngineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.start = datetime.date(2024, 1, 1)
+
+    def test_per_date_metrics(self):
+        log_session(self.user, self.start, {
+            'Squats': [(5, 100), (3, 110), (8, 90)],
+            'Bench Press': [(5, 80)],
+        })
+        log_session(self.user, self.start + datetime.timedelta(days=2), {
+            'Squats': [(4, 110), (2, 110)],
+        })
+
+        progress = exercise_progress(self.user, ['Squats', 'Bench Press', 'Deadlifts'])
+
+        self.assertEqual(list(progress), ['Squats', 'Bench Press'])
+        self.assertEqual(progress['Squats'], [
+            {'date': '2024-01-01', 'weight': 110.0, 'volume': 1550.0, 'reps': 3},
+            {'date': '2024-01-03', 'weight': 110.0, 'volume': 660.0, 'reps': 4},
+        ])
+        self.assertEqual(progress['Bench Press'], [
+            {'date': '2024-01-01', 'weight': 80.0, 'volume': 400.0, 'reps': 5},
+        ])
+
+    def test_spelling_variants_share_a_series(self):
+        log_session(self.user, self.start, {'Bench Press': [(5, 80)]})
+        log_session(self.user, self.start + datetime.timedelta(days=1), {'bench  press ': [(5, 85)]})
+
+        self.assertEqual(user_exercise_names(self.user), ['Bench Press'])
+        progress = exercise_progress(self.user, ['BENCH PRESS'])
+        self.assertEqual([point['weight'] for point in progress['Bench Press']], [80.0, 85.0])
+
+    def test_other_users_are_excluded(self):
+        other = User.objects.create_user('other@example.com', password='pass12345')
+        log_session(other, self.start, {'Squats': [(5, 200)]})
+        self.assertEqual(exercise_progress(self.user, ['Squats']), {})
+
+    def test_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        url = reverse('progress') + '?exercise=Squats&exercise=Bench+Press'
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        log_session(self.user, self.start, {'Squats': [(5, 100)], 'Bench Press': [(5, 60)]})
+        count_queries()  # warms the cached user
+        baseline = count_queries()
+
+        for day in range(1, 30):
+            log_session(self.user, self.start + datetime.timedelta(days=day), {
+                'Squats': [(5, Decimal(100 + day))] * 3,
+                'Bench Press': [(5, Decimal(60 + day))] * 3,
+            })
+        self.assertEqual(count_queries(), baseline)
+
+
+class WorkoutHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        start = datetime.date(2024, 1, 1)
+        for day in range(10):
+            name = 'Squats' if day % 2 else 'Bench Press'
+            log_session(self.user, start + datetime.timedelta(days=day), {name: [(5, 100)]})
+
+    def test_keyset_pages_cover_history_once(self):
+        workouts = history_queryset(self.user)
+        seen, cursor = [], None
+        while True:
+            page, cursor = workout_page(workouts, cursor, size=3)
+            seen.extend(workout.id for workout in page)
+            if not cursor:
+                break
+        expected = list(Workout.objects.filter(user=self.user).order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters_are_applied(self):
+        workouts = history_queryset(
+            self.user,
+            start=datetime.date(2024, 1, 2),
+            end=datetime.date(2024, 1, 7),
+            exercise='squats',
+        )
+        self.assertEqual(
+            [(w.date.day, w.exercises.get().name) for w in workouts],
+            [(6, 'Squats'), (4, 'Squats'), (2, 'Squats')],
+        )
+
+    def test_page_links_to_older_workouts(self):
+        response = self.client.get(reverse('workout_history'))
+        self.assertEqual(len(response.context['workouts']), 10)
+        self.assertIsNone(response.context['next_url'])
+
+        page, cursor = workout_page(history_queryset(self.user), size=4)
+        self.assertEqual([w.date.day for w in page], [10, 9, 8, 7])
+        response = self.client.get(reverse('workout_history'), {'cursor': cursor, 'exercise': 'Squats'})
+        self.assertEqual([w.date.day for w in response.context['workouts']], [6, 4, 2])
+
+    def test_streaming_render(self):
+        response = self.client.get(reverse('workout_history'), {'stream': '1'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('class="workout-card"'), 10)
+        self.assertIn('</html>', content)
+
+
+class WorkoutLoggingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        plan = WorkoutPlan.objects.create(name='Full Body')
+        self.day = PlanDay.objects.create(plan=plan, name='Workout A')
+        self.plan_exercises = [
+            PlanExercise.objects.create(day=self.day, name=f'Exercise {i}', order=i)
+            for i in range(1, 7)
+        ]
+
+    def full_day_post(self, sets=5):
+        data = {}
+        for plan_exercise in self.plan_exercises:
+            data[f'sets_{plan_exercise.id}'] = sets
+            for set_num in range(1, sets + 1):
+                data[f'reps_{plan_exercise.id}_{set_num}'] = 8
+                data[f'weight_{plan_exercise.id}_{set_num}'] = 60 + set_num
+        return data
+
+    def test_plan_day_is_written_with_batched_inserts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('start_workout', args=[self.day.id]), self.full_day_post())
+        self.assertRedirects(response, reverse('workout_plans'), fetch_redirect_response=False)
+
+        log_tables = ('tracker_catalogexercise', 'tracker_workout', 'tracker_exercise', 'tracker_exerciseset')
+        inserts = [q['sql'].split('"')[1] for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        # The plan's exercises are already in the catalog, so only three INSERTs remain
+        self.assertEqual([table for table in inserts if table in log_tables], [
+            'tracker_workout', 'tracker_exercise', 'tracker_exerciseset',
+        ])
+        self.assertEqual(Exercise.objects.filter(workout__user=self.user).count(), 6)
+        self.assertEqual(ExerciseSet.objects.filter(exercise__workout__user=self.user).count(), 30)
+        self.assertEqual(
+            list(ExerciseSet.objects.filter(exercise__name='Exercise 1').values_list('set_number', 'weight')),
+            [(i, Decimal(60 + i)) for i in range(1, 6)],
+        )
+
+    def test_invalid_set_writes_nothing(self):
+        data = self.full_day_post()
+        data[f'weight_{self.plan_exercises[-1].id}_5'] = 'heavy'
+        response = self.client.post(reverse('start_workout', args=[self.day.id]), data)
+        self.assertRedirects(response, reverse('start_workout', args=[self.day.id]), fetch_redirect_response=False)
+        self.assertFalse(Workout.objects.filter(user=self.user).exists())
+
+    def test_add_exercise_validates_before_writing(self):
+        data = {'add_exercise': '1', 'exercise_name': 'Squats', 'sets_count': 2,
+                'reps_1': 5, 'weight_1': 100, 'reps_2': 0, 'weight_2': 100}
+        self.client.post(reverse('log_workout'), data)
+        self.assertFalse(Exercise.objects.exists())
+
+        data['reps_2'] = 3
+        self.client.post(reverse('log_workout'), data)
+        self.assertEqual(
+            list(ExerciseSet.objects.values_list('set_number', 'reps')),
+            [(1, 5), (2, 3)],
+        )
+
+
+class PlanCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        for p in range(3):
+            plan = WorkoutPlan.objects.create(name=f'Plan {p}')
+            for d in range(1, 4):
+                day = PlanDay.objects.create(plan=plan, name=f'Day {d}', order=d)
+                for e in range(1, 4):
+                    PlanExercise.objects.create(day=day, name=f'Exercise {e}', order=e)
+
+    def plan_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('workout_plans'))
+        self.assertEqual(response.status_code, 200)
+        plan_tables = ('"tracker_workoutplan"', '"tracker_planday"', '"tracker_planexercise"')
+        return [q['sql'] for q in ctx.captured_queries if any(table in q['sql'] for table in plan_tables)]
+
+    def test_warm_catalog_runs_no_plan_queries(self):
+        self.assertEqual(len(self.plan_queries()), 3)
+        self.assertEqual(self.plan_queries(), [])
+
+    def test_version_is_read_once_per_request(self):
+        self.plan_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('workout_plans'))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'tracker_plancatalogversion' in q['sql']]), 1)
+
+    def test_writes_invalidate_catalog(self):
+        self.plan_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_workout_plan'), {
+                'plan_name': 'New Plan',
+                'monday_name': 'Monday: Legs',
+                'monday_exercises[]': ['Squats'],
+            })
+        response = self.client.get(reverse('workout_plans'))
+        self.assertContains(response, '<h2 class="plan-title">New Plan</h2>')
+
+        plan = WorkoutPlan.objects.get(name='New Plan')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_workout_plan', args=[plan.id]))
+        response = self.client.get(reverse('workout_plans'))
+        self.assertNotContains(response, '<h2 class="plan-title">New Plan</h2>')
+
+    def test_create_writes_the_plan_in_bulk(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('create_workout_plan'), {
+                'plan_name': 'Split',
+                'monday_name': 'Monday: Legs',
+                'monday_exercises[]': ['Squats', ' Lunges ', ''],
+                'tuesday_name': 'Tuesday: Push',
+                'tuesday_exercises[]': ['Bench Press'],
+                'wednesday_name': 'Wednesday: Pull',
+                'wednesday_rest': 'on',
+            })
+        plan = WorkoutPlan.objects.get(name='Split')
+        self.assertEqual(
+            [(day.name, day.order, [(e.name, e.order) for e in day.exercises.order_by('order')]) for day in plan.days.order_by('order')],
+            [('Monday: Legs', 1, [('Squats', 1), ('Lunges', 2)]), ('Tuesday: Push', 2, [('Bench Press', 1)])],
+        )
+        inserts = [q['sql'].split('"')[1] for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(inserts.count('tracker_planday'), 1)
+        self.assertEqual(inserts.count('tracker_planexercise'), 1)
+
+    def test_delete_needs_a_post(self):
+        plan = WorkoutPlan.objects.get(name='Plan 0')
+        self.client.get(reverse('delete_workout_plan', args=[plan.id]))
+        self.assertTrue(WorkoutPlan.objects.filter(id=plan.id).exists())
+        self.client.post(reverse('delete_workout_plan', args=[plan.id]))
+        self.assertFalse(WorkoutPlan.objects.filter(id=plan.id).exists())
+
+    def test_version_is_shared_through_the_database(self):
+        self.plan_queries()
+        # As generate_data or another worker would: nothing but the database is shared
+        WorkoutPlan.objects.create(name='Generated Plan')
+        invalidate_plan_catalog()
+        self.assertEqual(PlanCatalogVersion.objects.get().version, plan_catalog_version())
+        self.assertContains(self.client.get(reverse('workout_plans')), '<h2 class="plan-title">Generated Plan</h2>')
+
+
+class PlanUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.plan = WorkoutPlan.objects.create(name='PPL', description='Split')
+        self.days = {}
+        for order, (name, exercises) in enumerate([
+            ('Monday: Push', ['Bench Press', 'Overhead Press', 'Dips']),
+            ('Tuesday: Pull', ['Pull-ups', 'Rows']),
+            ('Wednesday: Legs', ['Squats', 'Leg Press']),
+        ], 1):
+            day = PlanDay.objects.create(plan=self.plan, name=name, order=order)
+            for exercise_order, exercise in enumerate(exercises, 1):
+                PlanExercise.objects.create(day=day, name=exercise, order=exercise_order)
+            self.days[name.split(':')[0].lower()] = day
+
+    def form(self, **changes):
+        data = {'plan_name': 'PPL', 'plan_description': 'Split'}
+        for weekday in DAYS_OF_WEEK:
+            day = self.days.get(weekday)
+            if day is None:
+                data[f'{weekday}_rest'] = 'on'
+            else:
+                data[f'{weekday}_name'] = day.name
+                data[f'{weekday}_exercises[]'] = [e.name for e in day.exercises.all()]
+        data.update(changes)
+        for weekday in DAYS_OF_WEEK:
+            if f'{weekday}_name' in changes:
+                data.pop(f'{weekday}_rest', None)
+        return data
+
+    def tree(self):
+        return [
+            (day.id, day.name, day.order, [(e.id, e.name, e.order) for e in day.exercises.all()])
+            for day in self.plan.days.all()
+        ]
+
+    def post(self, data):
+        url = reverse('update_workout_plan', args=[self.plan.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('workout_plans'), fetch_redirect_response=False)
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_unchanged_form_writes_nothing(self):
+        before = self.tree()
+        queries = self.post(self.form())
+        self.assertEqual(self.tree(), before)
+        self.assertFalse([q for q in queries if q.startswith(('INSERT', 'UPDATE "tracker', 'DELETE'))])
+
+    def test_rename_keeps_primary_keys(self):
+        before = self.tree()
+        version = plan_catalog_version()
+        queries = self.post(self.form(**{'monday_exercises[]': ['Bench Press', 'Military Press', 'Dips']}))
+        after = self.tree()
+
+        self.assertEqual([day[0] for day in after], [day[0] for day in before])
+        self.assertEqual(after[0][3][1], (before[0][3][1][0], 'Military Press', 2))
+        self.assertEqual(after[1:], before[1:])
+        writes = [q for q in queries if q.startswith(('INSERT', 'UPDATE "tracker', 'DELETE'))]
+        self.assertEqual([sql.split('"')[1] for sql in writes], [
+            'tracker_catalogexercise', 'tracker_planexercise', 'tracker_plancatalogversion',
+        ])
+        self.assertEqual(plan_catalog_version(), version + 1)
+
+    def test_days_added_removed_and_reordered(self):
+        pull_id = self.days['tuesday'].id
+        self.post(self.form(**{
+            'monday_rest': 'on',
+            'friday_name': 'Friday: Arms',
+            'friday_exercises[]': ['Curls', ''],
+            'tuesday_exercises[]': ['Rows', 'Pull-ups', 'Face Pulls'],
+        }))
+        tree = self.tree()
+
+        self.assertEqual([(name, order) for _, name, order, _ in tree], [
+            ('Tuesday: Pull', 1), ('Wednesday: Legs', 2), ('Friday: Arms', 3),
+        ])
+        self.assertEqual(tree[0][0], pull_id)
+        self.assertEqual([name for _, name, _ in tree[0][3]], ['Rows', 'Pull-ups', 'Face Pulls'])
+        self.assertEqual([name for _, name, _ in tree[2][3]], ['Curls'])
+        self.assertFalse(PlanExercise.objects.filter(name='Bench Press').exists())
+
+
+class ExerciseCatalogTests(TestCase):
+    def test_resolve_reuses_and_creates_entries(self):
+        squats = CatalogExercise.objects.create(name='Squats', normalized_name='squats')
+        resolved = CatalogExercise.objects.resolve([' squats', 'Front  Squats', 'front squats'])
+
+        self.assertEqual(resolved[' squats'], squats)
+        self.assertEqual(resolved['Front  Squats'], resolved['front squats'])
+        self.assertEqual(resolved['Front  Squats'].name, 'Front Squats')
+        self.assertEqual(CatalogExercise.objects.count(), 2)
+
+    def test_plan_exercises_are_linked(self):
+        plan = WorkoutPlan.objects.create(name='Plan')
+        day = PlanDay.objects.create(plan=plan, name='Day')
+        exercise = PlanExercise.objects.create(day=day, name='Deadlifts ')
+        self.assertEqual(exercise.catalog.normalized_name, 'deadlifts')
+
+
+class QueryPlanTests(TestCase):
+    """Every main query of the read views must be answered through an index"""
+
+    # Tables a view is expected to read in full
+    FULL_SCAN_ALLOWED = {'tracker_workoutplan'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        other = User.objects.create_user('other@example.com', password='pass12345')
+        start = datetime.date(2024, 1, 1)
+        for user in (self.user, other):
+            for day in range(5):
+                log_session(user, start + datetime.timedelta(days=day), {
+                    'Squats': [(5, 100), (5, 105)],
+                    'Bench Press': [(5, 80)],
+                })
+            Goal.objects.create(user=user, title='Squat 150', goal_type='strength', target_value=150)
+            BMIRecord.objects.create(user=user, weight=80, height=180, bmi=24.7)
+        plan = WorkoutPlan.objects.create(name='Full Body')
+        day = PlanDay.objects.create(plan=plan, name='Workout A')
+        PlanExercise.objects.create(day=day, name='Squats')
+
+    def full_scans(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        scans = []
+        for query in ctx.captured_queries:
+            if not query['sql'].startswith('SELECT') or '"tracker_' not in query['sql']:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                for row in cursor.fetchall():
+                    match = re.match(r'SCAN (\w+)$', row[3])
+                    if match and match[1] not in self.FULL_SCAN_ALLOWED:
+                        scans.append(f"{row[3]}\n    {query['sql']}")
+        return scans
+
+    def test_read_views_use_indexes(self):
+        urls = [
+            reverse('workout_history'),
+            reverse('workout_history') + '?exercise=Squats&start=2024-01-02',
+            reverse('progress') + '?exercise=Squats&exercise=Bench+Press',
+            reverse('fitness_goals'),
+            reverse('bmi_history'),
+            reverse('log_workout'),
+            reverse('workout_plans'),
+            reverse('start_workout', args=[PlanDay.objects.get().id]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                scans = self.full_scans(url)
+                self.assertFalse(scans, 'Full table scans:\n' + '\n'.join(scans))
+
+
+class DashboardSummaryTests(TestCase):
+    FIELDS = ['lifetime_volume', 'total_sessions', 'week_start', 'week_sessions',
+              'last_workout_date', 'streak', 'latest_bmi', 'active_goals']
+
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.today = timezone.now().date()
+
+    def snapshot(self):
+        summary = DashboardSummary.objects.get(user=self.user)
+        return {field: getattr(summary, field) for field in self.FIELDS}
+
+    def add_exercise(self, name, *sets):
+        data = {'add_exercise': '1', 'exercise_name': name, 'sets_count': len(sets)}
+        for i, (reps, weight) in enumerate(sets, 1):
+            data.update({f'reps_{i}': reps, f'weight_{i}': weight})
+        self.client.post(reverse('log_workout'), data)
+
+    def test_incremental_updates_match_rebuild(self):
+        self.client.get(reverse('dashboard'))
+        self.add_exercise('Squats', (5, 100), (5, 110))
+        self.add_exercise('Bench Press', (8, 60))
+        self.client.post(reverse('bmi_calculator'), {'weight': 80, 'height': 180})
+        self.client.post(reverse('add_goal'), {'title': 'Squat 150', 'goal_type': 'strength',
+                                               'target_value': 150, 'unit': 'kg'})
+        self.client.post(reverse('add_goal'), {'title': 'Bench 100', 'goal_type': 'strength',
+                                               'target_value': 100, 'unit': 'kg'})
+        goal = Goal.objects.get(title='Bench 100')
+        self.client.post(reverse('update_goal_progress', args=[goal.id]), {'current_value': 100})
+        self.client.post(reverse('log_workout'), {
+            'delete_exercise': '1', 'exercise_id': Exercise.objects.get(name='Bench Press').id,
+        })
+
+        incremental = self.snapshot()
+        self.assertEqual(incremental['lifetime_volume'], Decimal('1050'))
+        self.assertEqual(incremental['total_sessions'], 1)
+        self.assertEqual(incremental['latest_bmi'], Decimal('24.7'))
+        self.assertEqual(incremental['active_goals'], 1)
+
+        rebuild_summary(self.user.id)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_streak_and_week(self):
+        for days_ago in (5, 3, 2, 1):
+            workout = Workout.objects.create(user=self.user)
+            Workout.objects.filter(id=workout.id).update(date=self.today - datetime.timedelta(days=days_ago))
+        summary = rebuild_summary(self.user.id)
+        self.assertEqual(summary.current_streak, 3)
+
+        self.add_exercise('Squats', (5, 100))
+        summary = DashboardSummary.objects.get(user=self.user)
+        self.assertEqual(summary.current_streak, 4)
+        self.assertEqual(summary.sessions_this_week,
+                         Workout.objects.filter(user=self.user, date__gte=self.today - datetime.timedelta(days=self.today.weekday())).count())
+        self.assertEqual(summary.total_sessions, 5)
+
+        self.assertEqual(rebuild_summary(self.user.id).current_streak, 4)
+
+    def test_dashboard_is_a_single_lookup(self):
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Lifetime volume')
+        tracker_queries = [q['sql'] for q in ctx.captured_queries if '"tracker_' in q['sql']]
+        self.assertEqual(len(tracker_queries), 1)
+
+
+class PersonalRecordTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+
+    def stored(self, kind):
+        return [
+            (record.value, record.reps, record.weight)
+            for record in PersonalRecord.objects.filter(user=self.user, catalog__normalized_name='squats', kind=kind)
+        ]
+
+    def test_generated_columns(self):
+        workout = log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(1, 140), (10, 90)]})
+        sets = ExerciseSet.objects.filter(exercise__workout=workout).order_by('set_number')
+        self.assertEqual([(s.e1rm, s.volume) for s in sets], [
+            (Decimal('140.00'), Decimal('140.00')),
+            (Decimal('120.00'), Decimal('900.00')),
+        ])
+
+    def test_top_k_is_maintained_as_sets_are_logged(self):
+        start = datetime.date(2024, 1, 1)
+        for day in range(PR_TOP_K + 2):
+            log_session(self.user, start + datetime.timedelta(days=day), {
+                'Squats': [(5, 100 + day), (8, 90)],
+            })
+
+        heaviest = self.stored('weight')
+        self.assertEqual(len(heaviest), PR_TOP_K)
+        self.assertEqual([weight for value, reps, weight in heaviest], [106, 105, 104, 103, 102])
+        self.assertEqual(self.stored('volume')[0], (Decimal('720.00'), 8, 90))
+
+        incremental = {kind: self.stored(kind) for kind in ('weight', 'e1rm', 'volume')}
+        rebuild_records(self.user.id)
+        self.assertEqual({kind: self.stored(kind) for kind in ('weight', 'e1rm', 'volume')}, incremental)
+
+    def test_deleting_an_exercise_refills_the_list(self):
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100)]})
+        self.client.post(reverse('log_workout'), {
+            'add_exercise': '1', 'exercise_name': 'Squats', 'sets_count': 1, 'reps_1': 3, 'weight_1': 150,
+        })
+        self.assertEqual(self.stored('weight')[0][2], 150)
+
+        exercise = Exercise.objects.get(workout__date=timezone.now().date())
+        self.client.post(reverse('log_workout'), {'delete_exercise': '1', 'exercise_id': exercise.id})
+        self.assertEqual(self.stored('weight'), [(Decimal('100.00'), 5, 100)])
+
+    def test_progress_page_shows_records(self):
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100)]})
+        response = self.client.get(reverse('progress'), {'exercise': 'Squats'})
+        self.assertEqual(list(response.context['personal_records']), ['Squats'])
+        self.assertContains(response, 'Heaviest weight')
+        self.assertEqual(personal_records(self.user, ['Bench Press']), {})
+
+    def test_chart_data_cannot_close_the_script(self):
+        name = '</script><script>alert(1)</script>'
+        log_session(self.user, datetime.date(2024, 1, 1), {name: [(5, 100)]})
+        response = self.client.get(reverse('progress'), {'exercise': name})
+        self.assertIn(name, response.context['chart_data'])
+        self.assertNotContains(response, '<script>alert(1)')
+        self.assertContains(response, '\\u003C/script\\u003E\\u003Cscript\\u003Ealert(1)')
+
+
+class HistoryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        log_session(self.user, datetime.date(2024, 1, 2), {'Squats': [(5, 100), (3, 110)]})
+        log_session(self.user, datetime.date(2024, 1, 1), {'Bench Press': [(8, 60)]})
+        other = User.objects.create_user('other@example.com', password='pass12345')
+        log_session(other, datetime.date(2024, 1, 1), {'Deadlift': [(5, 180)]})
+
+    def export(self, fmt, **params):
+        response = self.client.get(reverse('export_history', args=[fmt]), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="fitlife-history-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(
+            [(row['date'], row['exercise'], row['set_number'], row['reps'], row['weight'], row['volume']) for row in rows],
+            [
+                ('2024-01-01', 'Bench Press', '1', '8', '60.00', '480.00'),
+                ('2024-01-02', 'Squats', '1', '5', '100.00', '500.00'),
+                ('2024-01-02', 'Squats', '2', '3', '110.00', '330.00'),
+            ],
+        )
+
+    def test_gzipped_jsonl_export(self):
+        response, body = self.export('jsonl', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.jsonl.gz"'))
+        rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual(rows[2]['e1rm'], '121.00')
+
+    def test_export_is_a_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.export('csv')
+        self.assertEqual(len([q for q in queries if 'tracker_exerciseset' in q['sql']]), 1)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('export_history', args=['xml']))
+        self.assertEqual(response.status_code, 404)
+
+
+class HistoryImportTests(TestCase):
+    CSV = (
+        'date,exercise,reps,weight\n'
+        '2024-01-01,Squats,5,100\n'
+        '2024-01-01,Squats,5,105\n'
+        '2024-01-01,Bench Press,8,60\n'
+        '2024-01-03,Squats,3,120\n'
+        '2024-01-03,Squats,3,122.5\n'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+
+    def logged(self):
+        return [
+            (s.exercise.workout.date.day, s.exercise.catalog.name, s.set_number, s.reps, s.weight)
+            for s in ExerciseSet.objects.filter(exercise__workout__user=self.user)
+            .select_related('exercise__workout', 'exercise__catalog')
+            .order_by('exercise__workout__date', 'exercise_id', 'set_number')
+        ]
+
+    def test_batches_continue_exercises_and_update_derived_tables(self):
+        job = start_import(self.user, 'history.csv', 'abc')
+        seen = []
+        run_import(job, io.StringIO(self.CSV), 'csv', batch_size=2, progress=lambda job: seen.append(job.rows_imported))
+
+        self.assertEqual(seen, [2, 4, 5])
+        self.assertEqual((job.status, job.sets_created), ('done', 5))
+        self.assertEqual(self.logged(), [
+            (1, 'Squats', 1, 5, Decimal('100.00')),
+            (1, 'Squats', 2, 5, Decimal('105.00')),
+            (1, 'Bench Press', 1, 8, Decimal('60.00')),
+            (3, 'Squats', 1, 3, Decimal('120.00')),
+            (3, 'Squats', 2, 3, Decimal('122.50')),
+        ])
+        self.assertEqual(Exercise.objects.filter(workout__user=self.user).count(), 3)
+        summary = DashboardSummary.objects.get(user=self.user)
+        self.assertEqual((summary.total_sessions, summary.lifetime_volume), (2, Decimal('2232.50')))
+        self.assertTrue(PersonalRecord.objects.filter(user=self.user, kind='weight', value=Decimal('122.50')).exists())
+
+    def test_failed_import_resumes_after_last_committed_batch(self):
+        broken = self.CSV.replace('3,120', 'three,120')
+        job = start_import(self.user, 'history.csv', 'abc')
+        with self.assertRaisesMessage(ImportRowError, 'Row 4'):
+            run_import(job, io.StringIO(broken), 'csv', batch_size=2)
+        self.assertEqual((job.status, job.rows_imported), ('failed', 2))
+        self.assertEqual(len(self.logged()), 2)
+
+        job = start_import(self.user, 'history.csv', 'abc')
+        run_import(job, io.StringIO(self.CSV), 'csv', batch_size=2)
+        self.assertEqual(len(self.logged()), 5)
+        self.assertEqual(ImportJob.objects.get().status, 'done')
+
+    def test_zero_weight_is_not_a_missing_column(self):
+        lines = '{"date": "2024-01-01", "exercise": "Pull Ups", "reps": 8, "weight": 0}\n'
+        run_import(start_import(self.user, 'history.jsonl', 'abc'), io.StringIO(lines), 'jsonl')
+        self.assertEqual(self.logged(), [(1, 'Pull Ups', 1, 8, Decimal('0.00'))])
+
+    def test_upload_round_trips_an_export(self):
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100), (3, 110)]})
+        export = b''.join(self.client.get(reverse('export_history', args=['jsonl']), {'gzip': '1'}).streaming_content)
+        self.user = User.objects.create_user('mover@example.com', password='pass12345')
+        self.client.force_login(self.user)
+
+        upload = SimpleUploadedFile('history.jsonl.gz', export)
+        response = self.client.post(reverse('import_history'), {'file': upload}, follow=True)
+        self.assertContains(response, 'Imported 2 sets')
+        self.assertEqual(self.logged(), [(1, 'Squats', 1, 5, Decimal('100.00')), (1, 'Squats', 2, 3, Decimal('110.00'))])
+
+        job = ImportJob.objects.get(user=self.user)
+        self.assertEqual(self.client.get(reverse('import_status', args=[job.id])).json()['status'], 'done')
+        response = self.client.post(reverse('import_history'), {'file': SimpleUploadedFile('copy.jsonl.gz', export)}, follow=True)
+        self.assertContains(response, 'was already imported')
+        self.assertEqual(len(self.logged()), 2)
+
+    def test_unreadable_upload_fails_the_job(self):
+        uploads = [
+            SimpleUploadedFile('history.csv.gz', self.CSV.encode()),
+            SimpleUploadedFile('history.csv', self.CSV.replace('Squats', 'Kniebeugen \xe4').encode('latin-1')),
+        ]
+        for upload in uploads:
+            with self.subTest(upload.name):
+                response = self.client.post(reverse('import_history'), {'file': upload}, follow=True)
+                self.assertContains(response, 'The file could not be read')
+                job = ImportJob.objects.get(user=self.user, source=upload.name)
+                status = self.client.get(reverse('import_status', args=[job.id])).json()
+                self.assertEqual(status['status'], 'failed')
+                self.assertIn('could not be read', status['error'])
+        self.assertEqual(self.logged(), [])
+
+
+@skipUnless(analytics.np, 'NumPy is not installed')
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        # Mondays 2024-01-01 and 2024-01-15; the week in between is empty
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100), (5, 100)], 'Bench Press': [(10, 50)]})
+        log_session(self.user, datetime.date(2024, 1, 3), {'Squats': [(1, 150)]})
+        log_session(self.user, datetime.date(2024, 1, 21), {'Squats': [(10, 60)]})
+
+    def test_columns(self):
+        columns = analytics.load_sets(self.user)
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(str(columns.days[0]), '2024-01-01')
+        self.assertEqual(columns.tonnage.sum(), 2250)
+
+    def test_weekly_metrics(self):
+        metrics = analytics.training_metrics(self.user)
+        self.assertEqual(metrics['weeks'], ['2024-01-01', '2024-01-08', '2024-01-15'])
+        self.assertEqual(metrics['tonnage'], [1650.0, 0.0, 600.0])
+        self.assertEqual(metrics['rolling_tonnage'], [1650.0, 825.0, 750.0])
+        self.assertEqual(metrics['week_over_week'], [None, -100.0, None])
+
+    def test_intensity_is_relative_to_each_exercise(self):
+        # Best squat e1RM is 150 (a single); bench press only has one set, which is its own best
+        metrics = analytics.training_metrics(self.user)
+        self.assertEqual(dict(zip(metrics['intensity']['labels'], metrics['intensity']['sets'])), {
+            '<50%': 1, '50-60%': 0, '60-70%': 2, '70-80%': 1, '80-90%': 0, '90%+': 1,
+        })
+
+    def test_single_exercise_and_empty_history(self):
+        squats = CatalogExercise.objects.get(name='Squats')
+        self.assertEqual(analytics.training_metrics(self.user, squats.id)['tonnage'], [1150.0, 0.0, 600.0])
+        other = User.objects.create_user('new@example.com', password='pass12345')
+        self.assertEqual(analytics.training_metrics(other)['weeks'], [])
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        # 2024-01-29 (Mon) and 2024-02-02 (Fri) share an ISO week but not a month
+        log_session(self.user, datetime.date(2024, 1, 29), {'Squats': [(5, 100), (5, 110)]})
+        log_session(self.user, datetime.date(2024, 2, 2), {'Squats': [(3, 120)], 'Bench Press': [(8, 60)]})
+
+    def rollups(self, model):
+        return [
+            (r.catalog.name, r.period_start.isoformat(), r.sets, r.reps, r.tonnage, r.max_weight)
+            for r in model.objects.filter(user=self.user).select_related('catalog').order_by('catalog__name', 'period_start')
+        ]
+
+    def test_sets_are_rolled_up_as_they_are_saved(self):
+        self.assertEqual(self.rollups(WeeklyRollup), [
+            ('Bench Press', '2024-01-29', 1, 8, Decimal('480.00'), Decimal('60.00')),
+            ('Squats', '2024-01-29', 3, 13, Decimal('1410.00'), Decimal('120.00')),
+        ])
+        self.assertEqual(self.rollups(MonthlyRollup), [
+            ('Bench Press', '2024-02-01', 1, 8, Decimal('480.00'), Decimal('60.00')),
+            ('Squats', '2024-01-01', 2, 10, Decimal('1050.00'), Decimal('110.00')),
+            ('Squats', '2024-02-01', 1, 3, Decimal('360.00'), Decimal('120.00')),
+        ])
+
+        weekly, monthly = self.rollups(WeeklyRollup), self.rollups(MonthlyRollup)
+        rebuild_rollups(self.user.id)
+        self.assertEqual((self.rollups(WeeklyRollup), self.rollups(MonthlyRollup)), (weekly, monthly))
+
+    def test_logging_and_deleting_refresh_the_current_period(self):
+        today = timezone.now().date()
+        self.client.post(reverse('log_workout'), {
+            'add_exercise': '1', 'exercise_name': 'Squats', 'sets_count': 1, 'reps_1': 5, 'weight_1': 90,
+        })
+        current = WeeklyRollup.objects.get(user=self.user, period_start=today - datetime.timedelta(days=today.weekday()))
+        self.assertEqual((current.sets, current.tonnage), (1, Decimal('450.00')))
+
+        exercise = Exercise.objects.get(workout__date=today)
+        self.client.post(reverse('log_workout'), {'delete_exercise': '1', 'exercise_id': exercise.id})
+        self.assertFalse(WeeklyRollup.objects.filter(id=current.id).exists())
+        self.assertEqual(WeeklyRollup.objects.filter(user=self.user).count(), 2)
+
+    def test_progress_chart_reads_rollups(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('progress'), {'exercise': 'Squats', 'period': 'month'})
+        self.assertFalse([q for q in queries if 'tracker_exerciseset' in q['sql']])
+        self.assertEqual(
+            [(point['date'], point['weight'], point['volume']) for point in response.context['chart_data']['Squats']],
+            [('2024-01-01', 110.0, 1050.0), ('2024-02-01', 120.0, 360.0)],
+        )
+
+
+class SetInputFragmentTests(TestCase):
+    def test_fragments_need_no_session_or_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('get_set_inputs'), {'sets_count': 3})
+        self.assertEqual(len(queries), 0)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        html = response.json()['html']
+        self.assertEqual(re.findall(r'name="(\w+)"', html), ['reps_1', 'weight_1', 'reps_2', 'weight_2', 'reps_3', 'weight_3'])
+
+    def test_etag_revalidation(self):
+        etags = {self.client.get(reverse('get_set_inputs'), {'sets_count': n})['ETag'] for n in range(1, MAX_SETS + 1)}
+        self.assertEqual(len(etags), MAX_SETS)
+
+        etag = self.client.get(reverse('get_set_inputs'), {'sets_count': 2})['ETag']
+        response = self.client.get(reverse('get_set_inputs'), {'sets_count': 2}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_invalid_counts(self):
+        for value in ['0', str(MAX_SETS + 1), 'many']:
+            response = self.client.get(reverse('get_set_inputs'), {'sets_count': value})
+            self.assertEqual(response.json(), {'error': 'Invalid sets count'})
+            self.assertNotIn('ETag', response)
+
+    def test_log_form_requests_the_versioned_url(self):
+        user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse('log_workout')), f'&v={set_inputs_version()}')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100)]})
+
+    def revisit(self, url, params=None):
+        # The first page view sets the CSRF cookie, which is part of the ETag
+        self.client.get(url, params)
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(url, params, headers={'If-None-Match': first['ETag']})
+        # Everything but loading the session and its user
+        data_queries = [q['sql'] for q in queries if 'django_session' not in q['sql'] and 'auth_user' not in q['sql']]
+        return first, again, data_queries
+
+    def test_repeat_visit_costs_one_lookup(self):
+        for name, params in [
+            ('workout_history', None),
+            ('progress', {'exercise': 'Squats'}),
+            ('fitness_goals', None),
+            ('bmi_history', None),
+            ('workout_plans', None),
+        ]:
+            with self.subTest(name):
+                first, again, data_queries = self.revisit(reverse(name), params)
+                self.assertEqual(again.status_code, 304)
+                # The plans page also depends on the version of the shared plan catalog
+                versions = ['tracker_dataversion'] + (['tracker_plancatalogversion'] if name == 'workout_plans' else [])
+                self.assertEqual([sql.split('"')[1] for sql in data_queries], versions)
+
+    def test_writes_change_the_etag(self):
+        first, again, queries = self.revisit(reverse('workout_history'))
+        version = DataVersion.objects.get(user=self.user).version
+
+        self.client.post(reverse('add_goal'), {'title': 'Squat 150', 'goal_type': 'strength', 'target_value': 150, 'unit': 'kg'}, follow=True)
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 1)
+        response = self.client.get(reverse('workout_history'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+        self.client.post(reverse('clear_bmi_history'))
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 2)
+
+    def test_etag_depends_on_query_and_user(self):
+        first = self.client.get(reverse('workout_history'))
+        filtered = self.client.get(reverse('workout_history'), {'exercise': 'Squats'})
+        self.assertNotEqual(first['ETag'], filtered['ETag'])
+
+        other = User.objects.create_user('other@example.com', password='pass12345')
+        self.client.force_login(other)
+        response = self.client.get(reverse('workout_history'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_messages_are_rendered(self):
+        self.client.post(reverse('clear_bmi_history'))
+        response = self.client.get(reverse('bmi_history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(ROOT_URLCONF='fitlife.asgi_urls')
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100), (3, 110)]})
+        Goal.objects.create(user=self.user, title='Squat 150', goal_type='strength', target_value=150, unit='kg')
+        BMIRecord.objects.create(user=self.user, height=180, weight=80, bmi=24.7)
+        plan = WorkoutPlan.objects.create(name='Push Pull Legs', description='Three day split')
+        PlanDay.objects.create(plan=plan, name='Push')
+
+    async def test_pages_are_served_by_async_views(self):
+        await self.async_client.aforce_login(self.user)
+        for name, params, text in [
+            ('workout_history', {}, 'Squats'),
+            ('workout_history', {'stream': 1}, 'Squats'),
+            ('progress', {'exercise': 'Squats'}, '110'),
+            ('progress', {'exercise': 'Squats', 'period': 'week'}, '"sets": 2'),
+            ('fitness_goals', {}, 'Squat 150'),
+            ('bmi_history', {}, '24.7'),
+            ('workout_plans', {}, 'Push Pull Legs'),
+            ('dashboard', {}, '830 kg'),
+        ]:
+            with self.subTest(name, **params):
+                response = await self.async_client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.resolver_match.func.__module__, 'tracker.async_views')
+                content = b''.join([chunk async for chunk in response]) if response.streaming else response.content
+                self.assertIn(text, content.decode())
+
+    async def test_conditional_get(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('fitness_goals')
+        # The first page view sets the CSRF cookie, which is part of the ETag
+        await self.async_client.get(url)
+        first = await self.async_client.get(url)
+        again = await self.async_client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_anonymous_users_are_redirected(self):
+        response = await self.async_client.get(reverse('progress'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('?next=/progress/', response['Location'])
+
+    async def test_other_urls_fall_through(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('log_workout'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.resolver_match.func.__module__, 'tracker.views')
+
+
+class RecordingWriteQueue(WriteQueue):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def _commit(self, batch):
+        self.batches.append(len(batch))
+        super()._commit(batch)
+
+
+class WriteQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+
+    def add_goal(self, title, release=None):
+        if release is not None:
+            release.wait(5)
+        if not title:
+            raise ValueError('Goals need a title')
+        return Goal.objects.create(user_id=self.user.id, title=title, target_value=1).id
+
+    def test_concurrent_writes_share_a_transaction(self):
+        writes = RecordingWriteQueue()
+        release = threading.Event()
+        first = writes.submit(self.add_goal, 'First', release)
+        # Everything submitted while the first batch is busy goes into the next one
+        while not first.running():
+            pass
+        later = [writes.submit(self.add_goal, f'Goal {i}') for i in range(5)]
+        failing = writes.submit(self.add_goal, '')
+        release.set()
+
+        self.assertTrue(first.result(5))
+        self.assertEqual(len({future.result(5) for future in later}), 5)
+        with self.assertRaisesMessage(ValueError, 'Goals need a title'):
+            failing.result(5)
+        self.assertEqual(writes.batches, [1, 6])
+        # The failing write only rolled back its own savepoint
+        self.assertEqual(Goal.objects.filter(user=self.user).count(), 6)
+
+    def test_run_write_is_inline_unless_enabled(self):
+        with self.settings(TRACKER_WRITE_BATCHING=False):
+            self.assertEqual(threading.current_thread(), run_write(threading.current_thread))
+        with self.settings(TRACKER_WRITE_BATCHING=True):
+            self.assertNotEqual(threading.current_thread(), run_write(threading.current_thread))
+
+    @override_settings(TRACKER_WRITE_BATCHING=True)
+    def test_logging_through_the_queue(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('log_workout'), {
+            'add_exercise': '1', 'exercise_name': 'Bench Press', 'sets_count': 1, 'reps_1': 5, 'weight_1': 80,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ExerciseSet.objects.filter(exercise__workout__user=self.user).count(), 1)
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, 2)
+
+
+class UrlBenchmarkTests(TestCase):
+    def test_every_url_is_benchmarked(self):
+        benchmarked = {route.url_name for route in benchmark.ROUTES}
+        self.assertEqual({pattern.name for pattern in urls.urlpatterns} - benchmarked, set())
+
+    def test_measure_and_compare(self):
+        fixture = benchmark.seed(sets=64, goals=2, bmi_records=2, plans=1)
+        routes = {route.name: route for route in benchmark.ROUTES}
+        results = {
+            name: benchmark.measure(routes[name], fixture, iterations=3, warmup=1)
+            for name in ['workout_history', 'delete_goal', 'logout']
+        }
+        self.assertEqual(results['workout_history']['status'], 200)
+        self.assertGreater(results['workout_history']['queries'], 0)
+        self.assertGreater(results['workout_history']['bytes'], 0)
+        self.assertLessEqual(results['workout_history']['p50_ms'], results['workout_history']['p99_ms'])
+        self.assertEqual(results['delete_goal']['status'], 302)
+        self.assertEqual(results['logout']['status'], 302)
+
+        baseline = {name: dict(result) for name, result in results.items()}
+        self.assertEqual(benchmark.compare(results, baseline), [])
+        baseline['workout_history'].update(p95_ms=results['workout_history']['p95_ms'] / 10 - 1, queries=1)
+        self.assertEqual(
+            [(name, metric) for name, metric, before, after in benchmark.compare(results, baseline)],
+            [('workout_history', 'p95_ms'), ('workout_history', 'queries')],
+        )
+
+
+class QueryCountTests(TestCase):
+    """No route may issue more queries because there is more data behind it"""
+
+    SMALL = dict(sets=128, goals=2, bmi_records=3, plans=1)
+    LARGE = dict(sets=64 * 45, goals=30, bmi_records=60, plans=4)
+
+    def capture(self, fixture):
+        """The SQL of each route's second request; the first one warms the caches"""
+        statements = {}
+        for route in benchmark.ROUTES:
+            for iteration in range(2):
+                client = route.client(fixture)
+                path, data = route.request(fixture, iteration)
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(client, route.method)(path, data)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+            statements[route.name] = normalize_queries(query['sql'] for query in queries)
+        return statements
+
+    def test_query_counts_do_not_grow_with_data(self):
+        small = self.capture(benchmark.seed(**self.SMALL))
+        large = self.capture(benchmark.seed(**self.LARGE))
+        for route in benchmark.ROUTES:
+            with self.subTest(route=route.name):
+                before, after = small[route.name], large[route.name]
+                # Fewer is fine: a small history changes more records and rollups per logged set
+                if len(after) > len(before):
+                    diff = difflib.unified_diff(before, after, 'small fixture', 'large fixture', lineterm='')
+                    self.fail(
+                        f'{route.name}: {len(before)} queries with the small fixture, {len(after)} with the large one\n'
+                        + '\n'.join(diff)
+                    )
+
+
+def normalize_queries(statements):
+    """Statements with literals and savepoint names replaced by ?, so the same query reads the same for any row.
+
+    The batches of one bulk insert count as a single statement: their
+    number depends on the rows inserted, not on a query per object.
+    """
+    normalized = []
+    for sql in statements:
+        sql = re.sub(r'"s\d+_x\d+"', '?', sql)
+        sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+        sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+        sql = re.sub(r'\?(?:, \?)+', '?, ...', sql)
+        sql = re.sub(r'\(\?, \.\.\.\)(?:, \(\?, \.\.\.\))+', '(?, ...), ...', sql)
+        if normalized and sql.startswith('INSERT') and '), ...' in sql and sql == normalized[-1]:
+            continue
+        normalized.append(sql)
+    return normalized
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, prefix, seed=0):
+        call_command('generate_data', users=2, years=0.5, seed=seed, prefix=prefix, stdout=io.StringIO())
+        return [
+            list(
+                ExerciseSet.objects
+                .filter(exercise__workout__user__username=f'{prefix}-{i}@example.com')
+                .order_by('id')
+                .values_list('exercise__workout__date', 'exercise__catalog__name', 'set_number', 'reps', 'weight')
+            )
+            for i in range(2)
+        ]
+
+    def test_same_seed_same_history(self):
+        first = self.generate('first')
+        self.assertTrue(all(first))
+        self.assertEqual(self.generate('second'), first)
+        self.assertNotEqual(self.generate('third', seed=1), first)
+
+    def test_generated_users_are_complete(self):
+        self.generate('synthetic')
+        user = User.objects.get(username='synthetic-0@example.com')
+        self.assertTrue(user.check_password('fitlife-synthetic'))
+        self.assertTrue(Goal.objects.filter(user=user).exists())
+        self.assertTrue(BMIRecord.objects.filter(user=user).exists())
+        self.assertTrue(PersonalRecord.objects.filter(user=user).exists())
+        self.assertTrue(WeeklyRollup.objects.filter(user=user).exists())
+        volume = sum(s.reps * s.weight for s in ExerciseSet.objects.filter(exercise__workout__user=user))
+        self.assertEqual(DashboardSummary.objects.get(user=user).lifetime_volume, volume)
+        self.assertEqual(set(WorkoutPlan.objects.values_list('name', flat=True)), {'Push Pull Legs (PPL)', 'Full Body Split'})
+
+    def test_existing_users_need_clear(self):
+        self.generate('synthetic')
+        with self.assertRaises(CommandError):
+            self.generate('synthetic')
+        call_command('generate_data', users=1, years=0.2, prefix='synthetic', clear=True, stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='synthetic-').count(), 1)
+        self.assertEqual(WorkoutPlan.objects.count(), 2)
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        log_session(self.user, datetime.date(2024, 1, 1), {'Squats': [(5, 100)]})
+
+    def server_timing(self, response):
+        return {
+            name: (desc, float(duration))
+            for name, desc, duration in re.findall(r'(\w+);desc="([^"]*)";dur=([\d.]+)', response['Server-Timing'])
+        }
+
+    def test_header_reports_queries_templates_and_total(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('workout_history'))
+        timing = self.server_timing(response)
+        self.assertEqual(timing['db'][0], f'{len(queries)} queries')
+        self.assertGreater(timing['tpl'][1], 0)
+        self.assertEqual(timing['app'][0], 'workout_history')
+        self.assertGreaterEqual(timing['app'][1], timing['tpl'][1])
+
+    @override_settings(ROOT_URLCONF='fitlife.asgi_urls')
+    async def test_async_views_are_timed(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('fitness_goals'))
+        self.assertEqual(response.resolver_match.func.__module__, 'tracker.async_views')
+        desc, duration = self.server_timing(response)['db']
+        self.assertGreater(int(desc.split()[0]), 0)
+
+    def test_metrics_endpoint(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('workout_history'))
+        self.client.get(reverse('workout_history'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE fitlife_request_duration_seconds histogram', body)
+        self.assertIn('fitlife_request_duration_seconds_count{view="workout_history",method="GET",status="200"} 2', body)
+        self.assertIn('fitlife_template_duration_seconds_count{view="workout_history"} 2', body)
+
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('demo_seconds', 'Demo', ('view',), buckets=(0.1, 1))
+        for value in [0.05, 0.1, 0.5, 3]:
+            histogram.observe(value, 'a"b')
+        self.assertEqual(histogram.expose()[2:], [
+            'demo_seconds_bucket{view="a\\"b",le="0.1"} 2',
+            'demo_seconds_bucket{view="a\\"b",le="1"} 3',
+            'demo_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+            'demo_seconds_sum{view="a\\"b"} 3.65',
+            'demo_seconds_count{view="a\\"b"} 4',
+        ])
+
+
+class GoalProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+
+    def add_exercise(self, name, *sets):
+        data = {'add_exercise': '1', 'exercise_name': name, 'sets_count': len(sets)}
+        for i, (reps, weight) in enumerate(sets, 1):
+            data.update({f'reps_{i}': reps, f'weight_{i}': weight})
+        self.client.post(reverse('log_workout'), data)
+
+    def add_goal(self, title, goal_type, target, **extra):
+        self.client.post(reverse('add_goal'), {
+            'title': title, 'goal_type': goal_type, 'target_value': target, 'unit': 'kg', **extra,
+        })
+        return Goal.objects.get(title=title)
+
+    def test_strength_goal_follows_the_heaviest_set(self):
+        self.add_exercise('Squats', (5, 100))
+        goal = self.add_goal('Squat 120', 'strength', 120, exercise='squats')
+        self.assertTrue(goal.is_tracked)
+        self.assertEqual(goal.current_value, Decimal('100'))
+
+        self.add_exercise('Bench Press', (5, 130))
+        self.add_exercise('Squats', (3, 110), (1, 115))
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_value, goal.status), (Decimal('115'), 'active'))
+
+        self.client.post(reverse('log_workout'), {
+            'delete_exercise': '1', 'exercise_id': Exercise.objects.filter(name='Squats').latest('id').id,
+        })
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_value, Decimal('100'))
+
+        self.add_exercise('Squats', (1, 122.5))
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_value, goal.status), (Decimal('122.5'), 'completed'))
+        self.assertEqual(DashboardSummary.objects.get(user=self.user).active_goals, 0)
+
+    def test_frequency_and_bodyweight_goals(self):
+        weekly = self.add_goal('Train 3x a week', 'frequency', 3, period='week')
+        monthly = self.add_goal('Train 12x a month', 'frequency', 12, period='month')
+        bodyweight = self.add_goal('Cut to 75', 'bodyweight', 75)
+        self.add_exercise('Squats', (5, 100))
+        self.client.post(reverse('bmi_calculator'), {'weight': 80, 'height': 180})
+        self.client.post(reverse('bmi_calculator'), {'weight': 74, 'height': 180})
+
+        for goal in (weekly, monthly, bodyweight):
+            goal.refresh_from_db()
+        self.assertEqual((weekly.current_value, monthly.current_value), (1, 1))
+        # Direction is unknown for bodyweight, so reaching the number does not complete it
+        self.assertEqual((bodyweight.current_value, bodyweight.status), (Decimal('74'), 'active'))
+
+        today = timezone.localdate()
+        self.assertEqual(goals.period_start('week', today).weekday(), 0)
+        self.assertEqual(goals.period_start('month', today).day, 1)
+        goals.rebuild_goals(self.user.id, today=today + datetime.timedelta(days=40))
+        weekly.refresh_from_db()
+        self.assertEqual(weekly.current_value, 0)
+
+    def test_tracked_goals_refuse_manual_updates(self):
+        custom = self.add_goal('Yoga', 'custom', 10)
+        tracked = self.add_goal('Bodyweight', 'bodyweight', 70)
+        self.assertFalse(custom.is_tracked)
+        self.client.post(reverse('update_goal_progress', args=[custom.id]), {'current_value': 4})
+        self.client.post(reverse('update_goal_progress', args=[tracked.id]), {'current_value': 4})
+        custom.refresh_from_db()
+        tracked.refresh_from_db()
+        self.assertEqual((custom.current_value, tracked.current_value), (4, 0))
+
+        response = self.client.get(reverse('fitness_goals'))
+        self.assertContains(response, 'Updated automatically from your BMI records')
+
+    def test_goal_page_does_not_scan_history(self):
+        self.add_exercise('Squats', (5, 100))
+        self.add_goal('Squat 120', 'strength', 120, exercise='Squats')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('fitness_goals'))
+        self.assertFalse([q['sql'] for q in queries if 'tracker_exerciseset' in q['sql'] or 'tracker_workout' in q['sql']])
+
+    def test_recompute_command(self):
+        self.add_exercise('Squats', (5, 100))
+        goal = self.add_goal('Squat 120', 'strength', 120, exercise='Squats')
+        Goal.objects.filter(id=goal.id).update(current_value=0)
+        out = io.StringIO()
+        call_command('recompute_goals', stdout=out)
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_value, Decimal('100'))
+        self.assertIn('Recomputed goals for 1 user', out.getvalue())
+
+
+class GoalLifecycleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.other = User.objects.create_user('idle@example.com', password='pass12345')
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+
+    def goal(self, title, user=None, days_since_update=0, **fields):
+        fields = {'goal_type': 'custom', 'target_value': 100, **fields}
+        goal = Goal.objects.create(user=user or self.user, title=title, **fields)
+        Goal.objects.filter(id=goal.id).update(updated_at=self.now - datetime.timedelta(days=days_since_update))
+        return goal
+
+    def statuses(self):
+        return dict(Goal.objects.values_list('title', 'status'))
+
+    def test_transitions(self):
+        self.goal('reached', current_value=100, deadline=self.today - datetime.timedelta(days=1))
+        self.goal('late', current_value=50, deadline=self.today - datetime.timedelta(days=1))
+        self.goal('quiet', current_value=50, days_since_update=45)
+        self.goal('busy', current_value=50, days_since_update=3, deadline=self.today)
+        self.goal('paused', current_value=100, status='paused')
+        self.goal('cut', goal_type='bodyweight', current_value=110)
+        self.goal('elsewhere', user=self.other, current_value=10)
+        rebuild_summary(self.user.id)
+        version = DataVersion.objects.get(user=self.user).version
+        other_version = DataVersion.objects.get(user=self.other).version
+
+        changed = goals.evaluate_goals(self.now)
+        self.assertEqual(changed, {'completed': 1, 'overdue': 1, 'stalled': 1})
+        self.assertEqual(self.statuses(), {
+            'reached': 'completed', 'late': 'overdue', 'quiet': 'stalled', 'busy': 'active',
+            'paused': 'paused', 'cut': 'active', 'elsewhere': 'active',
+        })
+        # Stalled goals are still open
+        self.assertEqual(DashboardSummary.objects.get(user=self.user).active_goals, 3)
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 1)
+        self.assertEqual(DataVersion.objects.get(user=self.other).version, other_version)
+
+        self.assertEqual(goals.evaluate_goals(self.now), {'completed': 0, 'overdue': 0, 'stalled': 0})
+
+    def test_goals_stamped_with_the_same_time_are_left_alone(self):
+        # Completed by another path with the timestamp the caller passes in
+        self.goal('done elsewhere', user=self.other, status='completed', current_value=100)
+        self.goal('late', deadline=self.today - datetime.timedelta(days=1))
+        other_version = DataVersion.objects.get(user=self.other).version
+        version = DataVersion.objects.get(user=self.user).version
+
+        self.assertEqual(goals.evaluate_goals(self.now), {'completed': 0, 'overdue': 1, 'stalled': 0})
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 1)
+        self.assertEqual(DataVersion.objects.get(user=self.other).version, other_version)
+
+    def test_progress_revives_stalled_goals(self):
+        self.client.force_login(self.user)
+        manual = self.goal('manual', current_value=10, days_since_update=45)
+        tracked = self.goal('tracked', goal_type='bodyweight', current_value=90, days_since_update=45)
+        goals.evaluate_goals(self.now)
+
+        self.client.post(reverse('update_goal_progress', args=[manual.id]), {'current_value': 20})
+        self.client.post(reverse('bmi_calculator'), {'weight': 85, 'height': 180})
+        self.assertEqual(self.statuses(), {'manual': 'active', 'tracked': 'active'})
+        self.assertContains(self.client.get(reverse('fitness_goals')), 'status-active')
+
+    def test_command_reports_counts(self):
+        self.goal('late', deadline=self.today - datetime.timedelta(days=1))
+        self.goal('quiet', days_since_update=10)
+        out = io.StringIO()
+        call_command('evaluate_goals', '--stall-days', 7, stdout=out)
+        self.assertIn('completed: 0 goals', out.getvalue())
+        self.assertIn('overdue: 1 goal\n', out.getvalue())
+        self.assertIn('stalled: 1 goal\n', out.getvalue())
+        self.assertIn('Updated 2 goals', out.getvalue())
+
+    def test_recompute_includes_stalled_goals(self):
+        weekly = self.goal('weekly', goal_type='frequency', period='week', target_value=3)
+        Workout.objects.create(user=self.user, date=self.today)
+        Goal.objects.filter(id=weekly.id).update(status='stalled', current_value=0)
+        out = io.StringIO()
+        call_command('recompute_goals', stdout=out)
+        self.assertIn('Recomputed goals for 1 user', out.getvalue())
+        weekly.refresh_from_db()
+        self.assertEqual((weekly.current_value, weekly.status), (1, 'active'))
+
+
+class ChartSeriesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.start = datetime.date(2024, 1, 1)
+
+    def points(self, values):
+        return [
+            {'date': (self.start + datetime.timedelta(days=i)).isoformat(), 'weight': value}
+            for i, value in enumerate(values)
+        ]
+
+    def decode(self, body, name):
+        origin = datetime.date.fromisoformat(body['origin']).toordinal()
+        encoded = body['series'][name]
+        days, values, day, value = [], [], origin, 0
+        for dx, dy in zip(encoded['x'], encoded['y']):
+            day, value = day + dx, value + dy
+            days.append(datetime.date.fromordinal(day).isoformat())
+            values.append(value / body['scale'])
+        return list(zip(days, values))
+
+    def test_lttb_keeps_the_ends_and_the_peaks(self):
+        values = [100.0] * 200
+        values[57], values[140] = 180.0, 20.0
+        points = self.points(values)
+        sampled = series.lttb(points, 10, 'weight')
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual((sampled[0], sampled[-1]), (points[0], points[-1]))
+        self.assertIn(points[57], sampled)
+        self.assertIn(points[140], sampled)
+        self.assertEqual(series.lttb(points[:5], 10, 'weight'), points[:5])
+
+    def test_progress_series_endpoint(self):
+        for i, weight in enumerate([100, 105, 95, 110, 120]):
+            log_session(self.user, self.start + datetime.timedelta(days=i * 2), {'Squats': [(5, weight)]})
+
+        response = self.client.get(reverse('progress_series'), {'exercise': 'Squats', 'points': 3})
+        body = response.json()
+        self.assertEqual((body['metric'], body['origin'], body['series']['Squats']['points']), ('weight', '2024-01-01', 5))
+        self.assertEqual(self.decode(body, 'Squats'), [('2024-01-01', 100), ('2024-01-05', 95), ('2024-01-09', 120)])
+
+        response = self.client.get(reverse('progress_series'), {
+            'exercise': 'squats', 'metric': 'volume', 'start': '2024-01-03', 'end': '2024-01-07',
+        })
+        body = response.json()
+        self.assertEqual(body['origin'], '2024-01-03')
+        self.assertEqual(self.decode(body, 'Squats'), [('2024-01-03', 525), ('2024-01-05', 475), ('2024-01-07', 550)])
+
+        response = self.client.get(reverse('progress_series'), {'exercise': 'Squats', 'metric': 'e1rm'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bmi_series_endpoint(self):
+        for weight in (90, 85.5, 80):
+            self.client.post(reverse('bmi_calculator'), {'weight': weight, 'height': 180})
+        body = self.client.get(reverse('bmi_series'), {'metric': 'weight'}).json()
+        today = timezone.localdate().isoformat()
+        self.assertEqual(list(body['series']), ['Bodyweight'])
+        self.assertEqual(self.decode(body, 'Bodyweight'), [(today, 90), (today, 85.5), (today, 80)])
+        body = self.client.get(reverse('bmi_series'), {'start': '2000-01-01', 'end': '2000-12-31'}).json()
+        self.assertEqual(body['series']['BMI'], {'points': 0, 'x': [], 'y': []})
+
+    def test_progress_page_is_downsampled(self):
+        benchmark.create_history(self.user, 64 * (series.CHART_POINTS + 20))
+        response = self.client.get(reverse('progress'), {'exercise': 'Squats'})
+        chart = response.context['chart_data']['Squats']
+        self.assertEqual(len(chart), series.CHART_POINTS)
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter@example.com', password='pass12345', first_name='Sam')
+        self.client.force_login(self.user)
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries if '"django_session"' in q['sql'] or '"auth_user"' in q['sql']]
+
+    def test_warm_cache_skips_session_and_user_queries(self):
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(self.auth_queries(reverse('dashboard')), [])
+        self.assertEqual(self.auth_queries(reverse('fitness_goals')), [])
+
+    def test_user_update_is_written_through(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Alex'
+            self.user.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedUserBackend().get_user(self.user.id).first_name, 'Alex')
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('new-pass-98765')
+            self.user.save()
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 302)
+
+    def test_logout_and_deactivation(self):
+        self.client.get(reverse('dashboard'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.id)))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.id)))
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 302)
+
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        # Bulk updates send no signal; the cached copy is dropped by hand
+        forget_user(self.user.id)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 302)
@@ -14,7 +14,11 @@ urlpatterns = [
     path('exercises/<int:day_id>/', views.plan_exercises, name='plan_exercises'),
     path('start/<int:day_id>/', views.start_workout, name='start_workout'),
     path('workout-history/', views.workout_history, name='workout_history'),
+    path('workout-history/export/<str:fmt>/', views.export_history, name='export_history'),
+    path('workout-history/import/', views.import_history, name='import_history'),
+    path('workout-history/import/<int:job_id>/', views.import_status, name='import_status'),
     path('progress/', views.progress_tracking, name='progress'),
+    path('progress/series/', views.progress_series, name='progress_series'),
     path('goals/', views.fitness_goals, name='fitness_goals'),
     path('goals/add/', views.add_goal, name='add_goal'),
     path('goals/update/<int:goal_id>/', views.update_goal_progress, name='update_goal_progress'),
@@ -22,7 +26,9 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('bmi-calculator/', views.bmi_calculator, name='bmi_calculator'),
     path('bmi-history/', views.bmi_history, name='bmi_history'),
+    path('bmi-history/series/', views.bmi_series, name='bmi_series'),
     path('bmi-learn-more/', views.bmi_learn_more, name='bmi_learn_more'),
     path('clear-bmi-history/', views.clear_bmi_history, name='clear_bmi_history'),
-    path('logout/', views.custom_logout_view, name='logout')
+    path('logout/', views.custom_logout_view, name='logout'),
+    path('metrics/', views.metrics_view, name='metrics'),
     ]
@@ -0,0 +1,104 @@
+"""Per-user data versions and the conditional GETs they drive.
+
+Every write to a user's workouts, sets, goals or BMI records bumps their
+DataVersion row in the same transaction: single-row saves through the
+receivers in tracker.signals, bulk writes and deletes by calling
+``bump_data_version`` directly. Read views decorated with
+``conditional_on_data_version`` derive their ETag and Last-Modified from it,
+so a repeat visit with an unchanged version is answered with 304 after one
+primary-key lookup and without running the view.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+
+def bump_data_version(user_id):
+    now = timezone.now()
+    if not DataVersion.objects.filter(user_id=user_id).update(version=F('version') + 1, updated_at=now):
+        DataVersion.objects.get_or_create(user_id=user_id, defaults={'version': 1, 'updated_at': now})
+
+
+def _version_row(user_id):
+    return DataVersion.objects.filter(user_id=user_id).values_list('version', 'updated_at')
+
+
+def user_data_version(request):
+    """``(user id, version, updated_at)`` for the requesting user, looked up once per request"""
+    if not hasattr(request, '_tracker_data_version'):
+        user_id = request.user.id
+        request._tracker_data_version = (user_id,) + (_version_row(user_id).first() or (0, None))
+    return request._tracker_data_version
+
+
+async def auser_data_version(request):
+    """Async version of user_data_version"""
+    if not hasattr(request, '_tracker_data_version'):
+        user_id = (await request.auser()).id
+        request._tracker_data_version = (user_id,) + (await _version_row(user_id).afirst() or (0, None))
+    return request._tracker_data_version
+
+
+def _cacheable(request):
+    # A page with pending flash messages must be rendered so they are shown
+    return request.method in ('GET', 'HEAD') and not len(messages.get_messages(request))
+
+
+def conditional_on_data_version(*extra_versions):
+    """Make a read view answer If-None-Match / If-Modified-Since from the user's data version.
+
+    The ETag also covers the URL (filters, cursors), the CSRF cookie the
+    page's forms were rendered for, and any ``extra_versions`` callables for
+    data that is not the user's own, such as the shared plan catalog. They
+    are called with the request; async views take coroutine functions there.
+    """
+    def etag(request, *args, **kwargs):
+        if not _cacheable(request):
+            return None
+        user_id, version, updated_at = request._tracker_data_version
+        parts = [
+            request.get_full_path(),
+            str(user_id),
+            str(version),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ] + [str(value) for value in request._tracker_extra_versions]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+    def last_modified(request, *args, **kwargs):
+        # Extra versions carry no timestamp, so only the ETag can cover them
+        if extra_versions or not _cacheable(request):
+            return None
+        return request._tracker_data_version[2]
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        # condition() calls etag() synchronously, so the versions are looked up first
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                await auser_data_version(request)
+                request._tracker_extra_versions = [await extra(request) for extra in extra_versions]
+                response = await conditional_view(request, *args, **kwargs)
+                # Browsers may keep the page but must revalidate it; shared caches must not store it
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+        else:
+            @wraps(view)
+            def wrapped(request, *args, **kwargs):
+                user_data_version(request)
+                request._tracker_extra_versions = [extra(request) for extra in extra_versions]
+                response = conditional_view(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+        return wrapped
+    return decorator
@@ -1,15 +1,28 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
-from .models import Workout, Exercise, ExerciseSet, WorkoutPlan, PlanDay, PlanExercise, Goal, BMIRecord
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .models import CatalogExercise, Workout, Exercise, ExerciseSet, WorkoutPlan, PlanDay, PlanExercise, Goal, BMIRecord, ImportJob
 from .forms import ExerciseForm, SetForm, LoginForm, RegisterForm, BMICalculatorForm
+from .progress import exercise_progress, user_exercise_names
+from . import goals, metrics, records, rollups, series, summary
+from .workout_log import parse_set, save_exercises
+from .write_queue import run_write
+from .plans import plan_catalog, plan_catalog_version, invalidate_plan_catalog, submitted_plan_days, update_plan_tree
+from .history import history_queryset, iter_workout_chunks, parse_history_date, workout_page
+from .export import EXPORT_FORMATS, export_stream
+from .versions import bump_data_version, conditional_on_data_version
+from .set_inputs import MAX_SETS, SET_INPUTS_MAX_AGE, set_input_fragments, set_inputs_version
+from .importer import ImportRowError, fingerprint, import_format, open_text, run_import, start_import
 import json
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 
 
 @login_required
@@ -36,7 +49,8 @@ def log_workout(request):
         'form': form,
         'workout': workout,
         'exercises': exercises,
-        'range': range(1, 9), 
+        'range': range(1, MAX_SETS + 1),
+        'set_inputs_version': set_inputs_version(),
     }
     
     return render(request, 'workouts/log_workout.html', context)
@@ -56,7 +70,7 @@ def add_exercise(request, workout):
     
     sets_count = int(sets_count)
     
-    # Validate all set data
+    # Validate all set data before anything is written
     sets_data = []
     for i in range(1, sets_count + 1):
         reps = request.POST.get(f'reps_{i}')
@@ -67,31 +81,13 @@ def add_exercise(request, workout):
             return redirect('log_workout')
         
         try:
-            reps = int(reps)
-            weight = float(weight)
-            
-            if reps < 1 or weight < 0:
-                raise ValueError
-                
-            sets_data.append({'reps': reps, 'weight': weight})
+            sets_data.append(parse_set(reps, weight))
         except ValueError:
             messages.error(request, f'Invalid reps or weight for Set {i}')
             return redirect('log_workout')
     
-    # Create exercise
-    exercise = Exercise.objects.create(
-        workout=workout,
-        name=exercise_name
-    )
-    
-    # Create sets
-    for i, set_data in enumerate(sets_data, 1):
-        ExerciseSet.objects.create(
-            exercise=exercise,
-            set_number=i,
-            reps=set_data['reps'],
-            weight=set_data['weight']
-        )
+    # Create the exercise and its sets in one transaction
+    run_write(save_exercises, [(exercise_name, sets_data)], workout=workout)
     
     messages.success(request, f'Added {exercise_name} to workout')
     return redirect('log_workout')
@@ -103,48 +99,36 @@ def delete_exercise(request):
         try:
             exercise = get_object_or_404(Exercise, id=exercise_id, workout__user=request.user)
             exercise_name = exercise.name
-            exercise.delete()
+            with transaction.atomic():
+                summary.forget_exercise(exercise)
+                exercise.delete()
+                records.rebuild_records(request.user.id, [exercise.catalog_id])
+                goals.refresh_strength(request.user.id, [exercise.catalog_id])
+                rollups.refresh_rollups(request.user.id, [(exercise.catalog_id, exercise.workout.date)])
+                bump_data_version(request.user.id)
             messages.success(request, f'Deleted {exercise_name} from workout')
         except Exercise.DoesNotExist:
             messages.error(request, 'Exercise not found')
     
     return redirect('log_workout')
 
-# AJAX view for dynamic set inputs
-@login_required
+# AJAX view for dynamic set inputs. The fragments are the same for everyone,
+# so this deliberately skips login_required to avoid a session lookup
 def get_set_inputs(request):
-    sets_count = request.GET.get('sets_count', 0)
     try:
-        sets_count = int(sets_count)
-        if sets_count < 1 or sets_count > 8:
-            return JsonResponse({'error': 'Invalid sets count'})
+        sets_count = int(request.GET.get('sets_count', 0))
     except ValueError:
         return JsonResponse({'error': 'Invalid sets count'})
     
-    html = ''
-    for i in range(1, sets_count + 1):
-        html += f'''
-        <div class="set-group">
-            <div class="set-title">Set {i}</div>
-            <div class="set-row">
-                <input type="number" 
-                       name="reps_{i}" 
-                       class="set-input" 
-                       placeholder="Reps" 
-                       min="1"
-                       required>
-                <input type="number" 
-                       name="weight_{i}" 
-                       class="set-input" 
-                       placeholder="Weight (kg)" 
-                       min="0" 
-                       step="0.5"
-                       required>
-            </div>
-        </div>
-        '''
-    
-    return JsonResponse({'html': html})
+    fragment = set_input_fragments().get(sets_count)
+    if fragment is None:
+        return JsonResponse({'error': 'Invalid sets count'})
+    
+    body, etag = fragment
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=SET_INPUTS_MAX_AGE, immutable=True)
+    return get_conditional_response(request, etag=etag, response=response)
 
 
 def login_view(request):
@@ -177,9 +161,10 @@ def register_view(request):
 
 
 @login_required
+@conditional_on_data_version(plan_catalog_version)
 def workout_plans(request):
     """Display all workout plans"""
-    plans = WorkoutPlan.objects.all()
+    plans = plan_catalog(plan_catalog_version(request))
     return render(request, 'workouts/plans.html', {'plans': plans})
 
 @login_required
@@ -199,33 +184,32 @@ def start_workout(request, day_id):
     exercises = day.exercises.all()
     
     if request.method == 'POST':
-        # Create new workout
-        workout = Workout.objects.create(user=request.user)
-        
-        # Process each exercise
+        # Validate every exercise before anything is written
+        entries = []
         for plan_exercise in exercises:
             # Get number of sets for this exercise
-            sets_count = int(request.POST.get(f'sets_{plan_exercise.id}', 0))
+            try:
+                sets_count = int(request.POST.get(f'sets_{plan_exercise.id}', 0))
+            except ValueError:
+                sets_count = 0
             
             if sets_count > 0:
-                # Create exercise record
-                exercise = Exercise.objects.create(
-                    workout=workout,
-                    name=plan_exercise.name
-                )
-                
-                # Create sets
+                sets_data = []
                 for set_num in range(1, sets_count + 1):
                     reps = request.POST.get(f'reps_{plan_exercise.id}_{set_num}')
                     weight = request.POST.get(f'weight_{plan_exercise.id}_{set_num}')
                     
                     if reps and weight:
-                        ExerciseSet.objects.create(
-                            exercise=exercise,
-                            set_number=set_num,
-                            reps=int(reps),
-                            weight=float(weight)
-                        )
+                        try:
+                            sets_data.append(parse_set(reps, weight))
+                        except ValueError:
+                            messages.error(request, f'Invalid reps or weight for {plan_exercise.name}, Set {set_num}')
+                            return redirect('start_workout', day_id=day.id)
+                
+                entries.append((plan_exercise.name, sets_data))
+        
+        # Create the workout, exercises and sets in one transaction
+        run_write(save_exercises, entries, user=request.user)
         
         messages.success(request, 'Workout saved successfully!')
         return redirect('workout_plans')
@@ -236,57 +220,162 @@ def start_workout(request, day_id):
     })
 
 @login_required
+@conditional_on_data_version()
 def workout_history(request):
-    """Display user's workout history"""
-    workouts = Workout.objects.filter(user=request.user).prefetch_related('exercises__sets')
-    return render(request, 'workouts/history.html', {'workouts': workouts})
+    """Display user's workout history, one keyset page at a time"""
+    filters = {
+        'start': parse_history_date(request.GET.get('start')),
+        'end': parse_history_date(request.GET.get('end')),
+        'exercise': request.GET.get('exercise', '').strip(),
+    }
+    workouts = history_queryset(request.user, **filters)
+    context = {'filters': filters}
+    
+    if request.GET.get('stream'):
+        return stream_workout_history(request, workouts, context)
+    
+    page, next_cursor = workout_page(workouts, request.GET.get('cursor'))
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f'?{params.urlencode()}'
+    
+    context.update({'workouts': page, 'next_url': next_url})
+    return render(request, 'workouts/history.html', context)
+
+def stream_workout_history(request, workouts, context):
+    """Send the page chrome first, then the workouts in bounded chunks"""
+    marker = '<!-- workout-history-stream -->'
+    page = render_to_string('workouts/history.html', {**context, 'stream_marker': marker}, request)
+    head, tail = page.split(marker)
+    
+    def content():
+        yield head
+        streamed = False
+        for chunk in iter_workout_chunks(workouts):
+            streamed = True
+            yield render_to_string('workouts/history_workouts.html', {'workouts': chunk})
+        if not streamed:
+            yield render_to_string('workouts/history_workouts.html', {'workouts': []})
+        yield tail
+    
+    return StreamingHttpResponse(content(), content_type='text/html; charset=utf-8')
 
 @login_required
+def export_history(request, fmt):
+    """Stream the user's full training history as CSV or JSON lines"""
+    if fmt not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    
+    compress = request.GET.get('gzip') == '1'
+    filename = f'fitlife-history-{timezone.now().date().isoformat()}.{fmt}'
+    content_type = EXPORT_FORMATS[fmt]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    
+    response = StreamingHttpResponse(export_stream(request.user, fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+def import_history(request):
+    """Import an uploaded CSV or JSON-lines history in checkpointed batches"""
+    if request.method != 'POST':
+        return redirect('workout_history')
+    
+    upload = request.FILES.get('file')
+    fmt = import_format(upload.name) if upload else None
+    if fmt is None:
+        messages.error(request, 'Please choose a .csv or .jsonl file (optionally gzipped)')
+        return redirect('workout_history')
+    
+    job = start_import(request.user, upload.name[:255], fingerprint(upload))
+    if job.status == 'done':
+        messages.info(request, f'{upload.name} was already imported')
+        return redirect('workout_history')
+    
+    try:
+        run_import(job, open_text(upload, upload.name), fmt)
+    except ImportRowError as error:
+        messages.error(request, f'{error}. {job.rows_imported} rows before it were imported.')
+        return redirect('workout_history')
+    
+    messages.success(request, f'Imported {job.sets_created} sets from {upload.name}')
+    return redirect('workout_history')
+
+@login_required
+def import_status(request, job_id):
+    """Progress of an import, for polling while a large upload is processed"""
+    job = get_object_or_404(ImportJob, id=job_id, user=request.user)
+    return JsonResponse({
+        'source': job.source,
+        'status': job.status,
+        'rows_imported': job.rows_imported,
+        'sets_created': job.sets_created,
+        'error': job.error,
+    })
+
+@login_required
+@conditional_on_data_version()
 def progress_tracking(request):
     """Display progress tracking with charts"""
     # Get all unique exercises for the user
-    user_exercises = Exercise.objects.filter(
-        workout__user=request.user
-    ).values_list('name', flat=True).distinct().order_by('name')
-    
-    selected_exercise = request.GET.get('exercise')
-    chart_data = []
-    
-    if selected_exercise and selected_exercise in user_exercises:
-        # Get workout data for selected exercise
-        exercises = Exercise.objects.filter(
-            workout__user=request.user,
-            name=selected_exercise
-        ).prefetch_related('sets', 'workout').order_by('workout__date')
-        
-        # Calculate max weight for each workout date
-        workout_data = {}
-        for exercise in exercises:
-            date = exercise.workout.date
-            max_weight = exercise.sets.aggregate(
-                max_weight=models.Max('weight')
-            )['max_weight']
-            
-            if max_weight and (date not in workout_data or max_weight > workout_data[date]):
-                workout_data[date] = max_weight
-        
-        # Convert to chart format
-        chart_data = [
-            {
-                'date': date.strftime('%Y-%m-%d'),
-                'weight': float(weight)
-            }
-            for date, weight in sorted(workout_data.items())
-        ]
+    user_exercises = user_exercise_names(request.user)
+    
+    # Several exercises can be selected to overlay them on one chart
+    selected_exercises = [name for name in request.GET.getlist('exercise') if name]
+    
+    # Long ranges read the weekly or monthly rollups instead of every set
+    period = request.GET.get('period')
+    if period in rollups.ROLLUP_PERIODS:
+        chart_data = rollups.rollup_series(request.user, selected_exercises, period)
+    else:
+        period = None
+        chart_data = exercise_progress(request.user, selected_exercises)
+    # A chart cannot show more points than it is wide
+    chart_data = series.downsample(chart_data, series.CHART_POINTS)
     
     return render(request, 'workouts/progress.html', {
         'exercises': user_exercises,
-        'selected_exercise': selected_exercise,
-        'chart_data': chart_data
+        'selected_exercises': selected_exercises,
+        'selected_exercise': selected_exercises[0] if selected_exercises else None,
+        'period': period,
+        'chart_data': chart_data,
+        'personal_records': records.personal_records(request.user, selected_exercises),
     })
 
 
 @login_required
+@conditional_on_data_version()
+def progress_series(request):
+    """Progress of the selected exercises as downsampled, delta-encoded JSON for charts"""
+    metric = request.GET.get('metric', 'weight')
+    if metric not in series.PROGRESS_METRICS:
+        return JsonResponse({'error': f'metric must be one of {", ".join(series.PROGRESS_METRICS)}'}, status=400)
+    start = parse_history_date(request.GET.get('start'))
+    end = parse_history_date(request.GET.get('end'))
+    
+    points = exercise_progress(request.user, request.GET.getlist('exercise'), start, end)
+    return JsonResponse(series.encode_series(points, metric, series.point_budget(request.GET.get('points')), start))
+
+@login_required
+@conditional_on_data_version()
+def bmi_series(request):
+    """BMI or bodyweight history as downsampled, delta-encoded JSON for charts"""
+    metric = request.GET.get('metric', 'bmi')
+    if metric not in series.BMI_METRICS:
+        return JsonResponse({'error': f'metric must be one of {", ".join(series.BMI_METRICS)}'}, status=400)
+    start = parse_history_date(request.GET.get('start'))
+    end = parse_history_date(request.GET.get('end'))
+    
+    points = {series.BMI_METRICS[metric]: series.bmi_points(request.user, start, end)}
+    return JsonResponse(series.encode_series(points, metric, series.point_budget(request.GET.get('points')), start))
+
+
+@login_required
+@conditional_on_data_version()
 def fitness_goals(request):
     """Display user's fitness goals"""
     goals = Goal.objects.filter(user=request.user)
@@ -303,24 +392,33 @@ def add_goal(request):
         current_value = request.POST.get('current_value', 0)
         unit = request.POST.get('unit')
         deadline = request.POST.get('deadline')
+        exercise_name = request.POST.get('exercise', '').strip()
+        period = request.POST.get('period') if request.POST.get('period') in dict(Goal.PERIODS) else 'week'
         
         if title and target_value and unit:
-            goal = Goal.objects.create(
-                user=request.user,
-                title=title,
-                description=description,
-                goal_type=goal_type,
-                target_value=float(target_value),
-                current_value=float(current_value),
-                unit=unit,
-                deadline=deadline if deadline else None
-            )
+            with transaction.atomic():
+                exercise = None
+                if goal_type == 'strength' and exercise_name:
+                    exercise = CatalogExercise.objects.resolve([exercise_name])[exercise_name]
+                # Tracked goals get their current value from tracker.goals when saved
+                goal = Goal.objects.create(
+                    user=request.user,
+                    title=title,
+                    description=description,
+                    goal_type=goal_type,
+                    target_value=float(target_value),
+                    current_value=float(current_value),
+                    unit=unit,
+                    deadline=deadline if deadline else None,
+                    exercise=exercise,
+                    period=period,
+                )
             messages.success(request, f'Goal "{title}" added successfully!')
             return redirect('fitness_goals')
         else:
             messages.error(request, 'Please fill all required fields.')
     
-    return render(request, 'workouts/add_goal.html')
+    return render(request, 'workouts/add_goal.html', {'exercise_names': user_exercise_names(request.user)})
 
 @login_required
 def update_goal_progress(request, goal_id):
@@ -329,14 +427,19 @@ def update_goal_progress(request, goal_id):
     
     if request.method == 'POST':
         current_value = request.POST.get('current_value')
-        if current_value:
+        if goal.is_tracked:
+            messages.error(request, f'"{goal.title}" is updated automatically from your logged data.')
+        elif current_value:
             goal.current_value = float(current_value)
+            if goal.status == 'stalled':
+                goal.status = 'active'
             
             # Check if goal is completed
             if goal.current_value >= goal.target_value:
                 goal.status = 'completed'
             
-            goal.save()
+            with transaction.atomic():
+                goal.save()
             messages.success(request, f'Progress updated for "{goal.title}"!')
         else:
             messages.error(request, 'Please enter a valid progress value.')
@@ -348,7 +451,10 @@ def delete_goal(request, goal_id):
     """Delete a fitness goal"""
     goal = get_object_or_404(Goal, id=goal_id, user=request.user)
     goal_title = goal.title
-    goal.delete()
+    with transaction.atomic():
+        goal.delete()
+        summary.refresh_active_goals(request.user.id)
+        bump_data_version(request.user.id)
 
     return redirect('fitness_goals')
 
@@ -358,6 +464,7 @@ def dashboard(request):
 
     context = {
         'user': user,
+        'summary': summary.get_summary(user.id),
     }
     return render(request, 'workouts/dashboard.html', context)
 
@@ -384,7 +491,8 @@ def bmi_calculator(request):
             bmi_record = form.save(commit=False)
             bmi_record.user = request.user
             bmi_record.bmi = round(bmi, 1)
-            bmi_record.save()
+            with transaction.atomic():
+                bmi_record.save()
             
             bmi_result = {
                 'bmi': round(bmi, 1),
@@ -401,6 +509,7 @@ def bmi_calculator(request):
     return render(request, 'workouts/bmi_calculator.html', context)
 
 @login_required
+@conditional_on_data_version()
 def bmi_history(request):
     bmi_records = BMIRecord.objects.filter(user=request.user)
     
@@ -420,7 +529,11 @@ def bmi_learn_more(request):
 @login_required
 def clear_bmi_history(request):
     if request.method == 'POST':
-        BMIRecord.objects.filter(user=request.user).delete()
+        with transaction.atomic():
+            BMIRecord.objects.filter(user=request.user).delete()
+            summary.refresh_latest_bmi(request.user.id)
+            goals.refresh_bodyweight(request.user.id)
+            bump_data_version(request.user.id)
         messages.success(request, 'BMI history cleared successfully.')
     return redirect('bmi_history')
 
@@ -439,43 +552,14 @@ def create_workout_plan(request):
             messages.error(request, 'Please enter a plan name')
             return render(request, 'workouts/create_plan.html')
         
-        # Create the workout plan
-        plan = WorkoutPlan.objects.create(
-            name=plan_name,
-            description=plan_description
-        )
-        
-        # Process each day
-        days_of_week = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        order = 1
-        
-        for day in days_of_week:
-            is_rest_day = request.POST.get(f'{day}_rest') == 'on'
-            day_name = request.POST.get(f'{day}_name', '').strip()
-            
-            if not is_rest_day and day_name:
-                # Create plan day
-                plan_day = PlanDay.objects.create(
-                    plan=plan,
-                    name=day_name,
-                    order=order
-                )
-                
-                # Get exercises for this day
-                exercise_names = request.POST.getlist(f'{day}_exercises[]')
-                exercise_order = 1
-                
-                for exercise_name in exercise_names:
-                    exercise_name = exercise_name.strip()
-                    if exercise_name:
-                        PlanExercise.objects.create(
-                            day=plan_day,
-                            name=exercise_name,
-                            order=exercise_order
-                        )
-                        exercise_order += 1
-                
-                order += 1
+        # Create the workout plan with its days and exercises in bulk
+        with transaction.atomic():
+            plan = WorkoutPlan.objects.create(
+                name=plan_name,
+                description=plan_description
+            )
+            update_plan_tree(plan, submitted_plan_days(request.POST))
+            invalidate_plan_catalog()
         
         messages.success(request, f'Workout plan "{plan_name}" created successfully!')
         return redirect('workout_plans')
@@ -495,50 +579,23 @@ def update_workout_plan(request, plan_id):
             messages.error(request, 'Please enter a plan name')
             return render(request, 'workouts/update_plan.html', {'plan': plan})
         
-        # Update the workout plan
-        plan.name = plan_name
-        plan.description = plan_description
-        plan.save()
-        
-        # Delete existing days and recreate
-        plan.days.all().delete()
-        
-        # Process each day (same logic as create)
-        days_of_week = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        order = 1
-        
-        for day in days_of_week:
-            is_rest_day = request.POST.get(f'{day}_rest') == 'on'
-            day_name = request.POST.get(f'{day}_name', '').strip()
+        # Update the workout plan, writing only what actually changed
+        with transaction.atomic():
+            renamed = (plan.name, plan.description) != (plan_name, plan_description)
+            if renamed:
+                plan.name = plan_name
+                plan.description = plan_description
+                plan.save(update_fields=['name', 'description'])
             
-            if not is_rest_day and day_name:
-                plan_day = PlanDay.objects.create(
-                    plan=plan,
-                    name=day_name,
-                    order=order
-                )
-                
-                exercise_names = request.POST.getlist(f'{day}_exercises[]')
-                exercise_order = 1
-                
-                for exercise_name in exercise_names:
-                    exercise_name = exercise_name.strip()
-                    if exercise_name:
-                        PlanExercise.objects.create(
-                            day=plan_day,
-                            name=exercise_name,
-                            order=exercise_order
-                        )
-                        exercise_order += 1
-                
-                order += 1
+            if update_plan_tree(plan, submitted_plan_days(request.POST)) or renamed:
+                invalidate_plan_catalog()
         
         messages.success(request, f'Workout plan "{plan_name}" updated successfully!')
         return redirect('workout_plans')
     
     # Get existing data for form
     existing_days = {}
-    for day in plan.days.all():
+    for day in plan.days.prefetch_related('exercises'):
         # Extract day from name (assuming format like "Monday: Push Day")
         day_part = day.name.split(':')[0].strip().lower()
         existing_days[day_part] = {
@@ -555,13 +612,24 @@ def update_workout_plan(request, plan_id):
 @login_required
 def delete_workout_plan(request, plan_id):
     """Delete a workout plan"""
+    if request.method != 'POST':
+        return redirect('workout_plans')
+    
     plan = get_object_or_404(WorkoutPlan, id=plan_id)
     plan_name = plan.name
-    plan.delete()
+    with transaction.atomic():
+        plan.delete()
+        invalidate_plan_catalog()
     messages.success(request, f'Workout plan "{plan_name}" deleted successfully!')
     return redirect('workout_plans')
 
 def custom_logout_view(request):
     logout(request)
     messages.success(request, "You have been logged out.")
-    return redirect('login')  
\ No newline at end of file
+    return redirect('login')
+
+def metrics_view(request):
+    """Request, SQL and template histograms in the Prometheus text format, for INTERNAL_IPS only"""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
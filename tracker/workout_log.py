@@ -0,0 +1,53 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import goals, records, rollups, summary
+from .models import CatalogExercise, Workout, Exercise, ExerciseSet
+from .versions import bump_data_version
+
+
+def parse_set(reps, weight):
+    """Validate one set's raw form values, raising ValueError if they are unusable"""
+    try:
+        reps = int(reps)
+        weight = Decimal(weight)
+    except (TypeError, InvalidOperation):
+        raise ValueError('Invalid reps or weight')
+    if reps < 1 or not weight.is_finite() or weight < 0 or weight >= 10000:
+        raise ValueError('Invalid reps or weight')
+    return reps, weight.quantize(Decimal('0.01'))
+
+
+def save_exercises(entries, workout=None, user=None):
+    """Write already-validated exercises and their sets in one transaction.
+
+    ``entries`` is a list of ``(name, [(reps, weight), ...])``. When no
+    ``workout`` is given they are added to ``user``'s workout for today. Exercises and sets
+    each go in with a single batched INSERT, so a full plan day costs a
+    catalog lookup, three INSERTs and one commit however many sets it has.
+    """
+    with transaction.atomic():
+        catalog = CatalogExercise.objects.resolve([name for name, sets in entries])
+        if workout is None:
+            workout, created = Workout.objects.get_or_create(user=user, date=timezone.now().date())
+
+        exercises = Exercise.objects.bulk_create([
+            Exercise(workout=workout, catalog=catalog[name], name=name) for name, sets in entries
+        ])
+        sets = ExerciseSet.objects.bulk_create([
+            ExerciseSet(exercise=exercise, set_number=i, reps=reps, weight=weight)
+            for exercise, (name, sets) in zip(exercises, entries)
+            for i, (reps, weight) in enumerate(sets, 1)
+        ])
+        # bulk_create sends no signals, so update the summary, records, goals and rollups here
+        summary.record_volume(workout.user_id, sum(
+            exercise_set.reps * Decimal(exercise_set.weight) for exercise_set in sets
+        ))
+        records.record_sets(workout.user_id, [exercise_set.id for exercise_set in sets])
+        goals.refresh_strength(workout.user_id, {exercise.catalog_id for exercise in exercises})
+        rollups.refresh_rollups(workout.user_id, {(exercise.catalog_id, workout.date) for exercise in exercises})
+        bump_data_version(workout.user_id)
+
+    return workout
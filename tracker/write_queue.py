@@ -0,0 +1,93 @@
+"""Group concurrent small writes into shared transactions.
+
+SQLite has a single write lock and syncs once per commit, so many users
+logging sets at the same time queue up behind each other's commits. With
+``TRACKER_WRITE_BATCHING`` enabled, ``run_write`` hands the write to one
+background thread instead. That thread takes everything submitted while the
+previous batch was committing and runs it in one transaction. Each write
+runs in its own savepoint, so a failing write only rolls back itself. Callers
+block until their batch commits and get their own result or exception back.
+
+Writes must be self-contained: they run on another thread and connection,
+and must not touch the request. With batching disabled, or when the caller
+is already inside a transaction, ``run_write`` just runs the write in an
+atomic block.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+WRITE_BATCH_SIZE = 200
+
+
+class WriteQueue:
+    def __init__(self, max_batch=WRITE_BATCH_SIZE):
+        self.max_batch = max_batch
+        self._pending = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)``; the returned Future resolves once its batch commits"""
+        future = Future()
+        self._pending.put((future, fn, args, kwargs))
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='tracker-write-queue', daemon=True)
+                self._worker.start()
+        return future
+
+    def _next_batch(self):
+        # Block for the first write, then take whatever else is already waiting
+        batch = [self._pending.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for future, fn, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as error:
+                        outcomes.append((future, None, error))
+        except Exception as error:
+            # The batch as a whole failed to commit, so none of its writes happened
+            for future, fn, args, kwargs in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_write_queue = WriteQueue()
+
+
+def run_write(fn, *args, **kwargs):
+    """Run a write in a transaction, batched with concurrent writes when enabled"""
+    if not getattr(settings, 'TRACKER_WRITE_BATCHING', False) or connection.in_atomic_block:
+        with transaction.atomic():
+            return fn(*args, **kwargs)
+    return _write_queue.submit(fn, *args, **kwargs).result()